@@ -12,59 +12,208 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from vyos.utils.process import rc_cmd
+import re
+import socket
+import threading
 
-def get_server_statistics(accel_statistics, pattern, sep=':') -> dict:
-    import re
+from subprocess import PIPE
+from subprocess import STDOUT
+from subprocess import run
 
-    stat_dict = {'sessions': {}}
+# accel-ppp CLI, see [cli] in the accel-ppp configuration templates
+CLI_HOST = '127.0.0.1'
+CLI_TIMEOUT = 30
+RECV_SIZE = 65536
+# The TCP CLI has no end of output marker. A known single line command is
+# sent after each command, its reply marks the end of the preceding output.
+END_COMMAND = 'show version'
+
+# usernames in session matches: a regular expression without whitespace or
+# characters with a meaning to the accel-ppp CLI or a shell
+session_match_re = re.compile(r'^[\w.@+*?^$\[\]-]+$')
+
+# persistent clients of each thread, keyed by CLI port
+_clients = threading.local()
+
+
+class AccelClient:
+    """
+    Client for the accel-ppp TCP CLI, keeping the connection open between
+    commands. Output is read incrementally and handed out line by line, so
+    large "show sessions" tables are never held in memory as a whole.
+
+    The commands and replies of a connection must not interleave, a client
+    must only be used by one thread, see get_client().
+    """
+    def __init__(self, port: int, host: str = CLI_HOST, timeout: int = CLI_TIMEOUT):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.sock = None
+        self.buffer = b''
+        self.pos = 0
+        self.end_line = None
+
+    def connect(self):
+        self.close()
+        self.sock = socket.create_connection(self.address, timeout=self.timeout)
+        self.sock.sendall(f'{END_COMMAND}\n'.encode())
+        self.end_line = self._readline()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        self.sock = None
+        self.buffer = b''
+        self.pos = 0
+
+    def _readline(self) -> str:
+        while True:
+            end = self.buffer.find(b'\n', self.pos)
+            if end >= 0:
+                line = self.buffer[self.pos:end]
+                self.pos = end + 1
+                return line.rstrip(b'\r').decode(errors='replace')
+            chunk = self.sock.recv(RECV_SIZE)
+            if not chunk:
+                self.close()
+                raise ConnectionError('accel-ppp closed the CLI connection')
+            self.buffer = self.buffer[self.pos:] + chunk
+            self.pos = 0
+
+    def stream(self, command: str):
+        """ Execute a CLI command and yield its output line by line """
+        request = f'{command}\n{END_COMMAND}\n'.encode()
+        try:
+            if self.sock is None:
+                self.connect()
+            self.sock.sendall(request)
+            line = self._readline()
+        except OSError:
+            # accel-ppp was restarted since the last command, the stale
+            # connection fails on the first send or read
+            self.connect()
+            self.sock.sendall(request)
+            line = self._readline()
+
+        complete = False
+        try:
+            while line != self.end_line:
+                yield line
+                line = self._readline()
+            complete = True
+        finally:
+            # the caller stopped early, skip the rest of the output to keep
+            # the connection usable for the next command
+            if not complete and self.sock is not None:
+                try:
+                    while self._readline() != self.end_line:
+                        pass
+                except OSError:
+                    self.close()
 
-    cpu = re.search(r'cpu(.*)', accel_statistics).group(0)
-    # Find all lines with pattern, for example 'sstp:'
-    data = re.search(rf'{pattern}(.*)', accel_statistics, re.DOTALL).group(0)
-    session_starting = re.search(r'starting(.*)', data).group(0)
-    session_active = re.search(r'active(.*)', data).group(0)
-
-    for entry in {cpu, session_starting, session_active}:
-        if sep in entry:
-            key, value = entry.split(sep)
-            if key in ['starting', 'active', 'finishing']:
-                stat_dict['sessions'][key] = value.strip()
+    def execute(self, command: str) -> str:
+        return '\n'.join(self.stream(command))
+
+    def sessions(self, columns: list[str], match: tuple = None,
+                 order: str = None, limit: int = None):
+        """
+        Yield the sessions of "show sessions" as dictionaries with the
+        requested columns. Columns, sort order and match (a column and a
+        regular expression) are passed on to accel-ppp, limit stops after
+        the given number of sessions.
+        """
+        command = f'show sessions {",".join(columns)}'
+        if order:
+            command += f' order {order}'
+        if match:
+            column, regex = match
+            if not session_match_re.match(regex):
+                raise ValueError(f'Invalid session match "{regex}"')
+            command += f' match {column} {regex}'
+
+        count = 0
+        field_names = None
+        for line in self.stream(command):
+            if '|' not in line:
                 continue
-            if key == 'cpu':
-                stat_dict['cpu_load_percentage'] = int(re.sub(r'%', '', value.strip()))
+            values = [value.strip() for value in line.split('|')]
+            if field_names is None:
+                field_names = values
                 continue
-            stat_dict[key] = value.strip()
-    return stat_dict
+            if limit is not None and count >= limit:
+                break
+            yield dict(zip(field_names, values))
+            count += 1
 
 
-def accel_cmd(port: int, command: str) -> str:
-    _, output = rc_cmd(f'/usr/bin/accel-cmd -p{port} {command}')
-    return output
-
+def get_client(port: int) -> AccelClient:
+    """
+    Return the persistent CLI client of the calling thread for an accel-ppp
+    instance. Op-mode functions may run in parallel threads (GraphQL), each
+    one gets its own connection.
+    """
+    clients = getattr(_clients, 'clients', None)
+    if clients is None:
+        clients = _clients.clients = {}
+    if port not in clients:
+        clients[port] = AccelClient(port)
+    return clients[port]
 
-def accel_out_parse(accel_output: list[str]) -> list[dict[str, str]]:
-    """ Parse accel-cmd show sessions output """
-    data_list: list[dict[str, str]] = list()
-    field_names: list[str] = list()
 
-    field_names_unstripped: list[str] = accel_output.pop(0).split('|')
-    for field_name in field_names_unstripped:
-        field_names.append(field_name.strip())
+def parse_statistics(accel_statistics: str, sep=':') -> dict:
+    """
+    Parse "show stat" output into a dictionary. Indented lines belong to
+    the section started by the preceding "name:" line, e.g.
 
-    while accel_output:
-        if '|' not in accel_output[0]:
-            accel_output.pop(0)
+      uptime: 0.00:12:15
+      cpu: 0%
+      sessions:
+        starting: 0
+        active: 2
+      pppoe:
+        starting: 0
+        active: 2
+    """
+    stat_dict = {}
+    section = None
+    for line in accel_statistics.splitlines():
+        if sep not in line:
             continue
+        key, _, value = line.partition(sep)
+        value = value.strip()
+        if not line[0].isspace():
+            if value:
+                stat_dict[key.strip()] = value
+                section = None
+            else:
+                section = stat_dict.setdefault(key.strip(), {})
+        elif section is not None:
+            section[key.strip()] = value
+    return stat_dict
 
-        current_item: list[str] = accel_output.pop(0).split('|')
-        item_dict: dict[str, str] = {}
+def get_server_statistics(accel_statistics, pattern, sep=':') -> dict:
+    stat_dict = {'sessions': {}}
+    statistics = parse_statistics(accel_statistics, sep=sep)
 
-        for field_index in range(len(current_item)):
-            field_name: str = field_names[field_index]
-            field_value: str = current_item[field_index].strip()
-            item_dict[field_name] = field_value
+    cpu = statistics.get('cpu')
+    if cpu is not None:
+        stat_dict['cpu_load_percentage'] = int(cpu.rstrip('%'))
+    protocol = statistics.get(pattern.rstrip(sep), {})
+    for key in ['starting', 'active']:
+        if key in protocol:
+            stat_dict['sessions'][key] = protocol[key]
+    return stat_dict
 
-        data_list.append(item_dict)
 
-    return data_list
+def accel_cmd(port: int, command: str) -> str:
+    try:
+        return get_client(port).execute(command)
+    except OSError:
+        # fall back to accel-cmd, which reports the error
+        try:
+            result = run(['/usr/bin/accel-cmd', f'-p{port}'] + command.split(),
+                         stdout=PIPE, stderr=STDOUT)
+        except OSError as e:
+            return str(e)
+        return result.stdout.decode(errors='replace').strip()
+
@@ -0,0 +1,242 @@
+# Copyright 2025 VyOS maintainers and contributors <maintainers@vyos.io>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Boot plan cache for the commit of the boot configuration.
+
+For every conf_mode script run at boot the plan stores a digest of the
+config dictionary returned by get_config(), which is the complete input of
+its generate() phase, together with the digests of the files written by
+generate(). On the next boot generate() is skipped for scripts whose input
+is unchanged and whose files are still in place, only verify() and apply()
+run for them.
+
+generate() is only ever skipped if it did nothing else than writing files
+outside of /run: scripts that run commands from generate(), modify the
+config dictionary for apply(), or create links, remove or rename files are
+always run completely.
+"""
+
+import builtins
+import io
+import json
+import os
+
+from contextlib import contextmanager
+from hashlib import sha256
+from time import monotonic
+
+from vyos.defaults import directories
+
+boot_plan_file = '/var/lib/vyos/boot-plan.json'
+boot_timeline_file = os.path.join(directories['log'], 'vyos-boot-timeline.json')
+
+# artefacts in these directories are gone on every boot
+volatile_dirs = ('/run/', '/var/run/')
+# file system calls of generate() which can not be verified by a digest
+untracked_calls = ('symlink', 'link', 'unlink', 'remove', 'rmdir', 'rename',
+                   'replace', 'truncate', 'mknod', 'mkfifo')
+# calls only tracked when applied to an artefact
+artefact_calls = ('chmod', 'chown')
+
+def _digest(obj) -> str:
+    # objects that are not JSON serializable only lead to cache misses
+    data = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=repr)
+    return sha256(data.encode()).hexdigest()
+
+def file_digest(path: str) -> str:
+    """ Return the SHA-256 hex digest of a file, None if it can not be read """
+    h = sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+def image_digest() -> str:
+    """ Digest identifying the running image, plans of other images are void """
+    from vyos.version import get_version_data
+    version = get_version_data()
+    return _digest([version.get('version'), version.get('built_on')])
+
+def _abspath(file) -> str:
+    if isinstance(file, (str, bytes, os.PathLike)):
+        return os.path.abspath(os.fsdecode(file))
+    return None
+
+def file_calls() -> list:
+    """
+    Calls generate() can change the file system with, as (module, name):
+    open(), io.open() (used by pathlib), os.open() and the os functions of
+    untracked_calls and artefact_calls
+    """
+    calls = [(builtins, 'open'), (io, 'open'), (os, 'open')]
+    calls += [(os, name) for name in untracked_calls + artefact_calls if hasattr(os, name)]
+    return calls
+
+@contextmanager
+def patch_file_calls(wrap):
+    """
+    Replace every call of file_calls() with wrap(module, name, original)
+    while the context is active
+    """
+    originals = [(module, name, getattr(module, name)) for module, name in file_calls()]
+    for module, name, original in originals:
+        setattr(module, name, wrap(module, name, original))
+    try:
+        yield
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+@contextmanager
+def _track_writes(paths: set, untracked: list):
+    """
+    Collect the names of all files opened for writing via open(), io.open()
+    (used by pathlib) and os.open(). Other calls modifying the file system
+    are added to untracked.
+    """
+    def tracking_open(real_open):
+        def wrapper(file, mode='r', *args, **kwargs):
+            path = _abspath(file)
+            if path and any(m in mode for m in 'wax+'):
+                paths.add(path)
+            return real_open(file, mode, *args, **kwargs)
+        return wrapper
+
+    def tracking_os_open(real_open):
+        def wrapper(path, flags, *args, **kwargs):
+            if flags & (os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC):
+                file = _abspath(path)
+                if file and kwargs.get('dir_fd') is None:
+                    paths.add(file)
+                else:
+                    untracked.append(f'open {path}')
+            return real_open(path, flags, *args, **kwargs)
+        return wrapper
+
+    def untracked_call(name, real_call, artefacts_only):
+        def wrapper(path, *args, **kwargs):
+            if not artefacts_only or _abspath(path) not in paths:
+                untracked.append(f'{name} {path}')
+            return real_call(path, *args, **kwargs)
+        return wrapper
+
+    def wrap(module, name, original):
+        if name != 'open':
+            return untracked_call(name, original, name in artefact_calls)
+        if module is os:
+            return tracking_os_open(original)
+        return tracking_open(original)
+
+    with patch_file_calls(wrap):
+        yield paths
+
+class BootPlan:
+    def __init__(self, previous: dict = {}):
+        self.image = image_digest()
+        # entries of the previous boot are only valid for the same image
+        if previous.get('image') != self.image:
+            previous = {}
+        self.previous = previous.get('scripts', {})
+        self.scripts = {}
+        self.timeline = []
+        self._start = monotonic()
+
+    @classmethod
+    def load(cls, file_name=boot_plan_file):
+        from vyos.utils.file import read_json
+        previous = read_json(file_name, {})
+        return cls(previous if isinstance(previous, dict) else {})
+
+    def can_skip_generate(self, key: str, config_dict) -> bool:
+        """
+        True if the generate() phase of the script identified by key can be
+        skipped: the config dictionary is identical to the previous boot and
+        all files written by generate() still have the same content.
+        """
+        entry = self.previous.get(key)
+        if not entry or not entry.get('skippable'):
+            return False
+        if entry.get('input') != _digest(config_dict):
+            return False
+        for path, digest in entry.get('artefacts', {}).items():
+            if file_digest(path) != digest:
+                return False
+        self.scripts[key] = entry
+        return True
+
+    def invalidate(self, key: str):
+        """ Forget the entry of a script, its next boot runs generate() """
+        self.scripts.pop(key, None)
+
+    @contextmanager
+    def record_generate(self, key: str, config_dict):
+        """
+        Context for running the generate() phase of a script. The files it
+        writes and the commands it runs are recorded; the entry is stored
+        when the context is left without an exception.
+        """
+        from vyos.utils.process import command_stats
+
+        input_digest = _digest(config_dict)
+        stats = command_stats()
+        paths = set()
+        untracked = []
+        with _track_writes(paths, untracked):
+            yield
+
+        # generate() results that are not files can not be restored, this
+        # requires the commands of generate() to be recorded
+        skippable = (stats is not None and
+                     len(command_stats()) == len(stats) and
+                     _digest(config_dict) == input_digest and
+                     not untracked and
+                     not any(path.startswith(volatile_dirs) for path in paths))
+        self.scripts[key] = {
+            'input': input_digest,
+            'artefacts': {path: file_digest(path) for path in sorted(paths)
+                          if os.path.isfile(path)},
+            'skippable': skippable,
+        }
+
+    def add_timeline(self, key: str, start: float, phases: dict, skipped: bool = False):
+        """
+        Add a script to the boot timeline: start is the monotonic() time the
+        script started, phases maps phase names to their duration in seconds.
+        """
+        self.timeline.append({
+            'script': key,
+            'start': round(start - self._start, 6),
+            'phases': {name: round(duration, 6) for name, duration in phases.items()},
+            'generate_skipped': skipped,
+        })
+
+    def save(self, file_name=boot_plan_file, timeline_file=boot_timeline_file):
+        from vyos.utils.file import makedir
+        from vyos.utils.file import write_file
+
+        makedir(os.path.dirname(file_name))
+        write_file(file_name, json.dumps({'image': self.image,
+                                          'scripts': self.scripts}))
+        skipped = sum(1 for entry in self.timeline if entry['generate_skipped'])
+        write_file(timeline_file, json.dumps({
+            'duration': round(monotonic() - self._start, 6),
+            'scripts': len(self.timeline),
+            'generate_skipped': skipped,
+            'timeline': self.timeline,
+        }, indent=2))
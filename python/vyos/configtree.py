@@ -21,6 +21,9 @@
 
 LIBPATH = '/usr/lib/libvyosconfig.so.0'
 
+# number of lines decoded at once by the iter_commands() methods
+COMMAND_CHUNK_SIZE = 10000
+
 
 def replace_backslash(s, search, replace):
     """Modify quoted strings containing backslashes not of escape sequences"""
@@ -51,6 +54,26 @@ def extract_version(s):
     return (s, ''.join(t[1:]))
 
 
+def iter_line_chunks(data: bytes, chunk_size=COMMAND_CHUNK_SIZE):
+    """Decode the non-empty lines of a library result in lists of at most
+    chunk_size lines, only one chunk is held as Python strings at a time"""
+    start = 0
+    end = len(data)
+    while start < end:
+        pos = start
+        for _ in range(chunk_size):
+            pos = data.find(b'\n', pos)
+            if pos < 0:
+                pos = end
+                break
+            pos += 1
+        chunk = unescape_backslash(data[start:pos].decode())
+        lines = [line for line in chunk.splitlines() if line]
+        if lines:
+            yield lines
+        start = pos
+
+
 def check_path(path):
     # Necessary type checking
     if not isinstance(path, list):
@@ -210,6 +233,12 @@ def to_commands(self, op='set'):
         commands = unescape_backslash(commands)
         return commands
 
+    def iter_commands(self, op='set', chunk_size=COMMAND_CHUNK_SIZE):
+        """Iterate over the commands of to_commands() in lists of at most
+        chunk_size commands, without building the complete command list"""
+        return iter_line_chunks(self.__to_commands(self.__config, op.encode()),
+                                chunk_size)
+
     def to_json(self):
         return self.__to_json(self.__config).decode()
 
@@ -597,6 +626,12 @@ def to_commands(self):
         delete = self.delete.to_commands(op='delete')
         return delete + '\n' + add
 
+    def iter_commands(self, chunk_size=COMMAND_CHUNK_SIZE):
+        """Iterate over the commands of to_commands() in chunks, see
+        ConfigTree.iter_commands()"""
+        yield from self.delete.iter_commands(op='delete', chunk_size=chunk_size)
+        yield from self.add.iter_commands(chunk_size=chunk_size)
+
 
 def deep_copy(config_tree: ConfigTree) -> ConfigTree:
     """An inelegant, but reasonably fast, copy; replace with backend copy"""
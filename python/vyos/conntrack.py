@@ -0,0 +1,573 @@
+# Copyright 2025 VyOS maintainers and contributors <maintainers@vyos.io>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+# Minimal ctnetlink client. Conntrack tables can hold millions of entries,
+# messages are therefore decoded straight from the receive buffer and flows
+# are yielded while the kernel dump is still in progress.
+
+import errno
+import socket
+import struct
+
+from ipaddress import ip_address
+from ipaddress import ip_network
+
+NETLINK_NETFILTER = 12
+NFNL_SUBSYS_CTNETLINK = 1
+
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+NLMSG_ERROR = 0x2
+NLMSG_DONE = 0x3
+
+IPCTNL_MSG_CT_NEW = 0
+IPCTNL_MSG_CT_GET = 1
+IPCTNL_MSG_CT_DELETE = 2
+IPCTNL_MSG_CT_GET_STATS_CPU = 4
+IPCTNL_MSG_CT_GET_STATS = 5
+
+# https://github.com/torvalds/linux/blob/master/include/uapi/linux/netfilter/nf_conntrack_common.h
+IPS_SEEN_REPLY = 1 << 1
+IPS_ASSURED = 1 << 2
+IPS_OFFLOAD = 1 << 14
+
+# Netlink attribute types of ctnetlink messages
+# https://github.com/torvalds/linux/blob/master/include/uapi/linux/netfilter/nfnetlink_conntrack.h
+CTA_TUPLE_ORIG = 1
+CTA_TUPLE_REPLY = 2
+CTA_STATUS = 3
+CTA_PROTOINFO = 4
+CTA_TIMEOUT = 7
+CTA_MARK = 8
+CTA_COUNTERS_ORIG = 9
+CTA_COUNTERS_REPLY = 10
+CTA_ID = 12
+CTA_ZONE = 18
+CTA_TIMESTAMP = 20
+CTA_MARK_MASK = 21
+CTA_FILTER = 25
+
+CTA_TUPLE_IP = 1
+CTA_TUPLE_PROTO = 2
+
+CTA_IP_V4_SRC = 1
+CTA_IP_V4_DST = 2
+CTA_IP_V6_SRC = 3
+CTA_IP_V6_DST = 4
+
+CTA_PROTO_NUM = 1
+CTA_PROTO_SRC_PORT = 2
+CTA_PROTO_DST_PORT = 3
+CTA_PROTO_ICMP_ID = 4
+CTA_PROTO_ICMP_TYPE = 5
+CTA_PROTO_ICMP_CODE = 6
+CTA_PROTO_ICMPV6_ID = 7
+CTA_PROTO_ICMPV6_TYPE = 8
+CTA_PROTO_ICMPV6_CODE = 9
+
+CTA_PROTOINFO_TCP = 1
+CTA_PROTOINFO_SCTP = 3
+# CTA_PROTOINFO_TCP_STATE and CTA_PROTOINFO_SCTP_STATE
+CTA_PROTOINFO_STATE = 1
+
+CTA_COUNTERS_PACKETS = 1
+CTA_COUNTERS_BYTES = 2
+CTA_COUNTERS32_PACKETS = 3
+CTA_COUNTERS32_BYTES = 4
+
+CTA_TIMESTAMP_START = 1
+CTA_TIMESTAMP_STOP = 2
+
+CTA_FILTER_ORIG_FLAGS = 1
+CTA_FILTER_REPLY_FLAGS = 2
+
+CTA_FILTER_F_CTA_IP_SRC = 1 << 0
+CTA_FILTER_F_CTA_IP_DST = 1 << 1
+CTA_FILTER_F_CTA_PROTO_NUM = 1 << 3
+CTA_FILTER_F_CTA_PROTO_SRC_PORT = 1 << 4
+CTA_FILTER_F_CTA_PROTO_DST_PORT = 1 << 5
+
+# Per CPU statistics in the order of `conntrack --stats`
+CTA_STATS_TO_NAME = {
+    2: 'found',
+    4: 'invalid',
+    8: 'insert',
+    9: 'insert_failed',
+    10: 'drop',
+    11: 'early_drop',
+    12: 'error',
+    13: 'search_restart',
+    14: 'clash_resolve',
+    15: 'chaintoolong',
+}
+CTA_STATS_GLOBAL_ENTRIES = 1
+CTA_STATS_GLOBAL_MAX_ENTRIES = 2
+
+NLA_TYPE_MASK = 0x3fff
+NLA_F_NESTED = 0x8000
+
+# struct nlmsghdr followed by struct nfgenmsg
+NLMSG_HEADER = struct.Struct('=IHHII')
+NFGENMSG = struct.Struct('=BBH')
+NLA_HEADER = struct.Struct('=HH')
+CT_ATTR_OFFSET = NLMSG_HEADER.size + NFGENMSG.size
+
+RECV_BUFFER_SIZE = 1024 * 1024
+
+# https://github.com/torvalds/linux/blob/master/include/uapi/linux/netfilter/nf_conntrack_tcp.h
+TCP_CONNTRACK_TO_NAME = {
+    1: 'SYN_SENT',
+    2: 'SYN_RECV',
+    3: 'ESTABLISHED',
+    4: 'FIN_WAIT',
+    5: 'CLOSE_WAIT',
+    6: 'LAST_ACK',
+    7: 'TIME_WAIT',
+    8: 'CLOSE',
+    9: 'LISTEN',
+    10: 'MAX',
+    11: 'IGNORE',
+    12: 'RETRANS',
+    13: 'UNACK',
+    14: 'TIMEOUT_MAX',
+}
+
+# https://github.com/torvalds/linux/blob/master/include/uapi/linux/netfilter/nf_conntrack_sctp.h
+SCTP_CONNTRACK_TO_NAME = {
+    1: 'CLOSED',
+    2: 'COOKIE_WAIT',
+    3: 'COOKIE_ECHOED',
+    4: 'ESTABLISHED',
+    5: 'SHUTDOWN_SENT',
+    6: 'SHUTDOWN_RECD',
+    7: 'SHUTDOWN_ACK_SENT',
+    8: 'HEARTBEAT_SENT',
+    9: 'HEARTBEAT_ACKED',
+    10: 'MAX',
+}
+
+PROTOINFO_TO_NAME = {
+    CTA_PROTOINFO_TCP: TCP_CONNTRACK_TO_NAME,
+    CTA_PROTOINFO_SCTP: SCTP_CONNTRACK_TO_NAME,
+}
+
+PROTO_TO_NAME = {
+    socket.IPPROTO_ICMP: 'icmp',
+    socket.IPPROTO_TCP: 'tcp',
+    socket.IPPROTO_UDP: 'udp',
+    socket.IPPROTO_ICMPV6: 'icmpv6',
+    socket.IPPROTO_SCTP: 'sctp',
+    socket.IPPROTO_GRE: 'gre',
+    33: 'dccp',
+    136: 'udplite',
+}
+
+# Layer 4 tuple attributes per protocol in display order,
+# (attribute type, struct format, key)
+PROTO_TUPLE_KEYS = {
+    socket.IPPROTO_ICMP: ((CTA_PROTO_ICMP_TYPE, 'B', 'type'),
+                          (CTA_PROTO_ICMP_CODE, 'B', 'code'),
+                          (CTA_PROTO_ICMP_ID, '!H', 'id')),
+    socket.IPPROTO_ICMPV6: ((CTA_PROTO_ICMPV6_TYPE, 'B', 'type'),
+                            (CTA_PROTO_ICMPV6_CODE, 'B', 'code'),
+                            (CTA_PROTO_ICMPV6_ID, '!H', 'id')),
+}
+PORT_TUPLE_KEYS = ((CTA_PROTO_SRC_PORT, '!H', 'sport'),
+                   (CTA_PROTO_DST_PORT, '!H', 'dport'))
+
+IP_TUPLE_KEYS = {
+    socket.AF_INET: (CTA_IP_V4_SRC, CTA_IP_V4_DST),
+    socket.AF_INET6: (CTA_IP_V6_SRC, CTA_IP_V6_DST),
+}
+
+def nla_table(data: bytes, offset: int, end: int) -> dict:
+    """
+    Index the netlink attributes in data[offset:end] by type. Returns a dict
+    of attribute type -> (payload start, payload end) without decoding any
+    payload.
+    """
+    table = dict()
+    while offset + 4 <= end:
+        length, nla_type = NLA_HEADER.unpack_from(data, offset)
+        if length < 4 or offset + length > end:
+            break
+        table[nla_type & NLA_TYPE_MASK] = (offset + 4, offset + length)
+        offset += (length + 3) & ~3
+    return table
+
+def nla(nla_type: int, payload: bytes, nested: bool=False) -> bytes:
+    """ Encode a single netlink attribute including padding """
+    if nested:
+        nla_type |= NLA_F_NESTED
+    attr = NLA_HEADER.pack(4 + len(payload), nla_type) + payload
+    return attr + bytes(-len(attr) % 4)
+
+def nlmsg(msg_type: int, flags: int, family: int, attrs: bytes=b'', seq: int=0, res_id: int=0) -> bytes:
+    """ Encode a ctnetlink message with nfgenmsg header """
+    header = NLMSG_HEADER.pack(CT_ATTR_OFFSET + len(attrs),
+                               (NFNL_SUBSYS_CTNETLINK << 8) | msg_type,
+                               flags, seq, 0)
+    return header + NFGENMSG.pack(family, 0, socket.htons(res_id)) + attrs
+
+def get_protocol_number(protocol) -> int:
+    """
+    Return the IP protocol number for a protocol name or number,
+    raise ValueError if unknown
+    """
+    if isinstance(protocol, int) or str(protocol).isdigit():
+        number = int(protocol)
+        if not 0 <= number <= 255:
+            raise ValueError(f'Invalid protocol number "{protocol}"')
+        return number
+    for number, name in PROTO_TO_NAME.items():
+        if name == protocol.lower():
+            return number
+    try:
+        return socket.getprotobyname(protocol)
+    except OSError:
+        raise ValueError(f'Unknown protocol "{protocol}"')
+
+def _parse_u32(data: bytes, attr) -> int:
+    if not attr:
+        return None
+    return struct.unpack_from('!I', data, attr[0])[0]
+
+def _parse_flow(data: bytes, family: int, tuple_attr, counters_attr) -> tuple:
+    """
+    Decode one flow direction. Returns (protocol number, flow dict)
+    """
+    flow = {}
+    proto_num = None
+
+    if tuple_attr:
+        tuple_table = nla_table(data, *tuple_attr)
+        if ip_attr := tuple_table.get(CTA_TUPLE_IP):
+            ip_table = nla_table(data, *ip_attr)
+            src_key, dst_key = IP_TUPLE_KEYS[family]
+            if tmp := ip_table.get(src_key):
+                flow['src'] = socket.inet_ntop(family, data[tmp[0]:tmp[1]])
+            if tmp := ip_table.get(dst_key):
+                flow['dst'] = socket.inet_ntop(family, data[tmp[0]:tmp[1]])
+
+        if proto_attr := tuple_table.get(CTA_TUPLE_PROTO):
+            proto_table = nla_table(data, *proto_attr)
+            if tmp := proto_table.get(CTA_PROTO_NUM):
+                proto_num = data[tmp[0]]
+            for nla_type, fmt, key in PROTO_TUPLE_KEYS.get(proto_num, PORT_TUPLE_KEYS):
+                if tmp := proto_table.get(nla_type):
+                    flow[key] = struct.unpack_from(fmt, data, tmp[0])[0]
+
+    if counters_attr:
+        counters_table = nla_table(data, *counters_attr)
+        if tmp := counters_table.get(CTA_COUNTERS_PACKETS):
+            flow['packets'] = struct.unpack_from('!Q', data, tmp[0])[0]
+        elif tmp := counters_table.get(CTA_COUNTERS32_PACKETS):
+            flow['packets'] = struct.unpack_from('!I', data, tmp[0])[0]
+        if tmp := counters_table.get(CTA_COUNTERS_BYTES):
+            flow['bytes'] = struct.unpack_from('!Q', data, tmp[0])[0]
+        elif tmp := counters_table.get(CTA_COUNTERS32_BYTES):
+            flow['bytes'] = struct.unpack_from('!I', data, tmp[0])[0]
+
+    return proto_num, flow
+
+def decode_flow(data: bytes, offset: int, end: int) -> dict:
+    """
+    Decode a single IPCTNL_MSG_CT_NEW message located at data[offset:end]
+    into a conntrack entry dictionary
+    """
+    family = data[offset + NLMSG_HEADER.size]
+    if family not in IP_TUPLE_KEYS:
+        return None
+
+    attrs = nla_table(data, offset + CT_ATTR_OFFSET, end)
+    proto_num, original = _parse_flow(data, family, attrs.get(CTA_TUPLE_ORIG),
+                                      attrs.get(CTA_COUNTERS_ORIG))
+    _, reply = _parse_flow(data, family, attrs.get(CTA_TUPLE_REPLY),
+                           attrs.get(CTA_COUNTERS_REPLY))
+
+    entry = {
+        'id': _parse_u32(data, attrs.get(CTA_ID)),
+        'family': 'inet6' if family == socket.AF_INET6 else 'inet',
+        'protocol': PROTO_TO_NAME.get(proto_num, str(proto_num)),
+        'original': original,
+        'reply': reply,
+        'state': None,
+        'status': _parse_u32(data, attrs.get(CTA_STATUS)) or 0,
+        # flowtable offloaded entries have no timeout
+        'timeout': _parse_u32(data, attrs.get(CTA_TIMEOUT)),
+        'mark': _parse_u32(data, attrs.get(CTA_MARK)),
+        'zone': None,
+    }
+
+    if protoinfo_attr := attrs.get(CTA_PROTOINFO):
+        protoinfo_table = nla_table(data, *protoinfo_attr)
+        for proto, state_names in PROTOINFO_TO_NAME.items():
+            if proto_attr := protoinfo_table.get(proto):
+                if tmp := nla_table(data, *proto_attr).get(CTA_PROTOINFO_STATE):
+                    entry['state'] = state_names.get(data[tmp[0]], 'unknown')
+                break
+
+    if tmp := attrs.get(CTA_ZONE):
+        entry['zone'] = struct.unpack_from('!H', data, tmp[0])[0]
+
+    return entry
+
+def _netlink_request(request: bytes):
+    """
+    Send a ctnetlink request and yield (buffer, offset, end, res_id) for
+    every reply message until the kernel signals the end of the dump.
+    The socket is closed when the caller stops iterating.
+    """
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_NETFILTER)
+    try:
+        sock.bind((0, 0))
+        sock.send(request)
+        while True:
+            data = sock.recv(RECV_BUFFER_SIZE)
+            if not data:
+                return
+            offset = 0
+            while offset + NLMSG_HEADER.size <= len(data):
+                length, msg_type, flags, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+                if length < NLMSG_HEADER.size or offset + length > len(data):
+                    break
+                if msg_type == NLMSG_DONE:
+                    return
+                if msg_type == NLMSG_ERROR:
+                    error = struct.unpack_from('=i', data, offset + NLMSG_HEADER.size)[0]
+                    if error:
+                        raise OSError(-error, f'ctnetlink: {errno.errorcode.get(-error, -error)}')
+                    # acknowledgement of a non dump request
+                    return
+                res_id = socket.ntohs(struct.unpack_from('=H', data, offset + NLMSG_HEADER.size + 2)[0])
+                yield data, offset, offset + length, res_id
+                offset += (length + 3) & ~3
+    finally:
+        sock.close()
+
+class ConntrackFilter:
+    """
+    Conntrack entry filter. Every criteria the kernel supports is added to
+    the dump request so non matching entries are never sent to userspace,
+    the remaining criteria (address prefixes, state) are matched on the
+    decoded entry. Entries are always matched in full in userspace, so the
+    result is identical on kernels lacking filter support.
+    """
+    def __init__(self, family: str=None, protocol=None, source: str=None,
+                 destination: str=None, source_port: int=None,
+                 destination_port: int=None, state: str=None, zone: int=None,
+                 mark: int=None):
+        self.family = {'inet': socket.AF_INET, 'inet6': socket.AF_INET6,
+                       None: socket.AF_UNSPEC}[family]
+        self.protocol = get_protocol_number(protocol) if protocol is not None else None
+        self.source = ip_network(source, strict=False) if source else None
+        self.destination = ip_network(destination, strict=False) if destination else None
+        self.source_port = source_port
+        self.destination_port = destination_port
+        self.state = state.upper() if state else None
+        self.zone = zone
+        self.mark = mark
+
+        for network in [self.source, self.destination]:
+            if network is None:
+                continue
+            if self.family == socket.AF_UNSPEC:
+                self.family = socket.AF_INET6 if network.version == 6 else socket.AF_INET
+            elif (network.version == 6) != (self.family == socket.AF_INET6):
+                raise ValueError(f'Address "{network}" does not match address family')
+
+    def _host(self, network):
+        if network is not None and network.prefixlen == network.max_prefixlen:
+            return network.network_address.packed
+        return None
+
+    def request_attrs(self) -> bytes:
+        """ Dump request attributes for the kernel side filter """
+        attrs = b''
+        if self.mark is not None:
+            attrs += nla(CTA_MARK, struct.pack('!I', self.mark))
+            attrs += nla(CTA_MARK_MASK, struct.pack('!I', 0xffffffff))
+        # zone 0 is the kernel's "no zone filter" value
+        if self.zone:
+            attrs += nla(CTA_ZONE, struct.pack('!H', self.zone))
+
+        # CTA_FILTER needs an address family
+        if self.family == socket.AF_UNSPEC:
+            return attrs
+
+        flags = 0
+        ip_attrs = b''
+        proto_attrs = b''
+        src_key, dst_key = IP_TUPLE_KEYS[self.family]
+        if src := self._host(self.source):
+            flags |= CTA_FILTER_F_CTA_IP_SRC
+            ip_attrs += nla(src_key, src)
+        if dst := self._host(self.destination):
+            flags |= CTA_FILTER_F_CTA_IP_DST
+            ip_attrs += nla(dst_key, dst)
+        if self.protocol is not None:
+            flags |= CTA_FILTER_F_CTA_PROTO_NUM
+            proto_attrs += nla(CTA_PROTO_NUM, struct.pack('B', self.protocol))
+            # ports are only defined together with a protocol
+            if self.protocol not in PROTO_TUPLE_KEYS:
+                if self.source_port is not None:
+                    flags |= CTA_FILTER_F_CTA_PROTO_SRC_PORT
+                    proto_attrs += nla(CTA_PROTO_SRC_PORT, struct.pack('!H', self.source_port))
+                if self.destination_port is not None:
+                    flags |= CTA_FILTER_F_CTA_PROTO_DST_PORT
+                    proto_attrs += nla(CTA_PROTO_DST_PORT, struct.pack('!H', self.destination_port))
+        if not flags:
+            return attrs
+
+        tuple_attrs = b''
+        if ip_attrs:
+            tuple_attrs += nla(CTA_TUPLE_IP, ip_attrs, nested=True)
+        if proto_attrs:
+            tuple_attrs += nla(CTA_TUPLE_PROTO, proto_attrs, nested=True)
+        attrs += nla(CTA_TUPLE_ORIG, tuple_attrs, nested=True)
+        attrs += nla(CTA_FILTER, nla(CTA_FILTER_ORIG_FLAGS, struct.pack('=I', flags)) +
+                                 nla(CTA_FILTER_REPLY_FLAGS, struct.pack('=I', 0)),
+                     nested=True)
+        return attrs
+
+    def match(self, entry: dict) -> bool:
+        """ Match a decoded conntrack entry against all criteria """
+        original = entry['original']
+        if self.protocol is not None and entry['protocol'] != PROTO_TO_NAME.get(self.protocol, str(self.protocol)):
+            return False
+        if self.source is not None and ('src' not in original or ip_address(original['src']) not in self.source):
+            return False
+        if self.destination is not None and ('dst' not in original or ip_address(original['dst']) not in self.destination):
+            return False
+        if self.source_port is not None and original.get('sport') != self.source_port:
+            return False
+        if self.destination_port is not None and original.get('dport') != self.destination_port:
+            return False
+        if self.state is not None and entry['state'] != self.state:
+            return False
+        if self.zone is not None and (entry['zone'] or 0) != self.zone:
+            return False
+        if self.mark is not None and entry['mark'] != self.mark:
+            return False
+        return True
+
+def iter_flows(conntrack_filter: ConntrackFilter=None):
+    """
+    Stream the conntrack table. Yields one entry dictionary per flow
+    matching conntrack_filter while the kernel dump is in progress.
+    """
+    if conntrack_filter is None:
+        conntrack_filter = ConntrackFilter()
+
+    def dump(attrs):
+        request = nlmsg(IPCTNL_MSG_CT_GET, NLM_F_REQUEST | NLM_F_DUMP,
+                        conntrack_filter.family, attrs)
+        for data, offset, end, _ in _netlink_request(request):
+            entry = decode_flow(data, offset, end)
+            if entry and conntrack_filter.match(entry):
+                yield entry
+
+    attrs = conntrack_filter.request_attrs()
+    yielded = False
+    try:
+        for entry in dump(attrs):
+            yielded = True
+            yield entry
+    except OSError as e:
+        # kernel without support for a filter attribute, filter in userspace
+        if yielded or not attrs or e.errno not in [errno.EINVAL, errno.EOPNOTSUPP]:
+            raise
+        yield from dump(b'')
+
+def _raw_meta(direction: str, family: str, protocol: str, flow: dict) -> dict:
+    meta = {'direction': direction}
+    layer3 = {'protonum': '10', 'protoname': 'ipv6'} if family == 'inet6' else \
+             {'protonum': '2', 'protoname': 'ipv4'}
+    for key in ['src', 'dst']:
+        if key in flow:
+            layer3[key] = flow[key]
+    meta['layer3'] = layer3
+    try:
+        layer4 = {'protonum': str(get_protocol_number(protocol)), 'protoname': protocol}
+    except ValueError:
+        layer4 = {'protoname': protocol}
+    for key in ['sport', 'dport', 'type', 'code', 'id']:
+        if key in flow:
+            layer4[key] = str(flow[key])
+    meta['layer4'] = layer4
+    if 'packets' in flow or 'bytes' in flow:
+        meta['counters'] = {'packets': str(flow.get('packets', 0)),
+                            'bytes': str(flow.get('bytes', 0))}
+    return meta
+
+def raw_flow(entry: dict) -> dict:
+    """
+    A conntrack entry in the layout of a flow of `conntrack --dump --output
+    xml` converted by xmltodict, the raw op-mode schema. Values are strings
+    as in the XML output, valueless flags like "assured" are None.
+    """
+    independent = {'direction': 'independent'}
+    if entry['state'] is not None:
+        independent['state'] = entry['state']
+    # flowtable offloaded entries have no timeout
+    if entry['timeout'] is not None:
+        independent['timeout'] = str(entry['timeout'])
+    if entry['mark'] is not None:
+        independent['mark'] = str(entry['mark'])
+    if entry['zone'] is not None:
+        independent['zone'] = str(entry['zone'])
+    if entry['id'] is not None:
+        independent['id'] = str(entry['id'])
+    if entry['status'] & IPS_ASSURED:
+        independent['assured'] = None
+    if not entry['status'] & IPS_SEEN_REPLY:
+        independent['unreplied'] = None
+    if entry['status'] & IPS_OFFLOAD:
+        independent['offload'] = None
+
+    return {'meta': [
+        _raw_meta('original', entry['family'], entry['protocol'], entry['original']),
+        _raw_meta('reply', entry['family'], entry['protocol'], entry['reply']),
+        independent,
+    ]}
+
+def get_statistics() -> list:
+    """
+    Return the per CPU conntrack statistics as a list of dictionaries
+    """
+    request = nlmsg(IPCTNL_MSG_CT_GET_STATS_CPU, NLM_F_REQUEST | NLM_F_DUMP,
+                    socket.AF_UNSPEC)
+    statistics = []
+    for data, offset, end, cpu in _netlink_request(request):
+        attrs = nla_table(data, offset + CT_ATTR_OFFSET, end)
+        entry = {'cpu': cpu}
+        for nla_type, name in CTA_STATS_TO_NAME.items():
+            entry[name] = _parse_u32(data, attrs.get(nla_type)) or 0
+        statistics.append(entry)
+    return sorted(statistics, key=lambda entry: entry['cpu'])
+
+def get_global_statistics() -> dict:
+    """
+    Return the number of conntrack entries and the table size limit
+    """
+    request = nlmsg(IPCTNL_MSG_CT_GET_STATS, NLM_F_REQUEST, socket.AF_UNSPEC)
+    for data, offset, end, _ in _netlink_request(request):
+        attrs = nla_table(data, offset + CT_ATTR_OFFSET, end)
+        return {
+            'entries': _parse_u32(data, attrs.get(CTA_STATS_GLOBAL_ENTRIES)),
+            'max_entries': _parse_u32(data, attrs.get(CTA_STATS_GLOBAL_MAX_ENTRIES)),
+        }
+    return {}
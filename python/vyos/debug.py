@@ -63,6 +63,9 @@ def enabled(flag):
      - ifconfig: when modifying an interface,
        prints command with result and sysfs access on stdout for interface
      - command: print command run with result
+     - configd: vyos-configd records every commit (config strings and
+       node messages) to /run/vyos-configd-commit.json for replay by
+       scripts/configd-benchmark.py
 
     Having the flag setup on the filesystem is required to have
     debuging at boot time, however, setting the flag via environment
@@ -75,7 +78,7 @@ def enabled(flag):
 
     # this is to force all new flags to be registered here to be
     # documented both here and a reminder to update readthedocs :-)
-    if flag not in ['developer', 'log', 'ifconfig', 'command']:
+    if flag not in ['developer', 'log', 'ifconfig', 'command', 'configd']:
         return ''
 
     return _fromenv(flag) or _fromfile(flag)
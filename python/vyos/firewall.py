@@ -14,9 +14,17 @@
 
 import csv
 import gzip
+import json
+import mmap
 import os
 import re
+import struct
 
+from hashlib import sha1
+from ipaddress import IPv4Address
+from ipaddress import IPv6Address
+from ipaddress import ip_address
+from ipaddress import ip_network
 from pathlib import Path
 from socket import AF_INET
 from socket import AF_INET6
@@ -220,20 +228,11 @@ def parse_rule(rule_conf, hook, fw_name, rule_id, ip_name):
 
             if dict_search_args(side_conf, 'geoip', 'country_code'):
                 operator = ''
-                hook_name = ''
                 if dict_search_args(side_conf, 'geoip', 'inverse_match') != None:
                     operator = '!='
-                if hook == 'FWD':
-                    hook_name = 'forward'
-                if hook == 'INP':
-                    hook_name = 'input'
-                if hook == 'OUT':
-                    hook_name = 'output'
-                if hook == 'PRE':
-                    hook_name = 'prerouting'
-                if hook == 'NAM':
-                    hook_name = f'name'
-                output.append(f'{ip_name} {prefix}addr {operator} @GEOIP_CC{def_suffix}_{hook_name}_{fw_name}_{rule_id}')
+                # rules matching the same countries share one set
+                set_name = geoip_set_name(side_conf['geoip']['country_code'], ipv6=(def_suffix == '6'))
+                output.append(f'{ip_name} {prefix}addr {operator} @{set_name}')
 
             if 'mac_address' in side_conf:
                 suffix = side_conf["mac_address"]
@@ -679,29 +678,241 @@ def parse_time(time):
         out.append(f'day {{{",".join(out_days)}}}')
     return " ".join(out)
 
+# Nested groups
+
+# group types supporting "include": group type -> (member key, member kind)
+nested_group_types = {
+    'address_group': ('address', 'ipv4'),
+    'ipv6_address_group': ('address', 'ipv6'),
+    'network_group': ('network', 'ipv4'),
+    'ipv6_network_group': ('network', 'ipv6'),
+    'port_group': ('port', 'port'),
+    'mac_group': ('mac_address', None),
+    'interface_group': ('interface', None),
+}
+
+def _member_interval(member, kind):
+    # (first, last) of an address, range, prefix or port member
+    if kind == 'port':
+        first, _, last = member.partition('-')
+        return int(first), int(last or first)
+    version = 4 if kind == 'ipv4' else 6
+    if '-' in member:
+        first, last = (ip_address(item) for item in member.split('-', 1))
+        if first.version != version or last.version != version:
+            raise ValueError(member)
+        return int(first), int(last)
+    network = ip_network(member, strict=False)
+    if network.version != version:
+        raise ValueError(member)
+    return int(network.network_address), int(network.broadcast_address)
+
+def merge_group_members(members, kind):
+    """
+    Merge overlapping and adjacent addresses, ranges, prefixes (kind "ipv4"
+    or "ipv6") or ports (kind "port") into the minimal list of intervals.
+    Members which can not be parsed, like service names, are kept as is.
+    """
+    intervals = []
+    other = []
+    for member in members:
+        try:
+            intervals.append(_member_interval(member, kind))
+        except ValueError:
+            other.append(member)
+
+    merged = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+
+    if kind == 'port':
+        out = [str(first) if first == last else f'{first}-{last}' for first, last in merged]
+    else:
+        version = 4 if kind == 'ipv4' else 6
+        out = [_range_element(first, last, version) for first, last in merged]
+    return out + other
+
+def resolve_nested_groups(groups, key, kind=None, strict=True):
+    """
+    Resolve the members of all groups of one type, including the members of
+    nested groups. Returns a dictionary: group name -> list of members.
+
+    Every group is flattened once and the result is reused by all groups
+    including it. Members are merged into intervals for the kinds supported
+    by merge_group_members(), otherwise only duplicates are removed.
+
+    With strict, a ValueError is raised for circular references and includes
+    of groups that do not exist, otherwise these includes are ignored.
+    """
+    flat = {}
+    visiting = set()
+
+    def visit(name):
+        if name in flat:
+            return flat[name]
+        if name in visiting:
+            if strict:
+                raise ValueError(f'Group "{name}" has a circular reference')
+            return {}
+        if name not in groups:
+            if strict:
+                raise ValueError(f'Nested group "{name}" does not exist')
+            return {}
+
+        visiting.add(name)
+        group_conf = groups[name] or {}
+        # dictionary keys keep the order of the members
+        members = dict.fromkeys(group_conf.get(key, []))
+        for include in group_conf.get('include', []):
+            members.update(visit(include))
+        visiting.discard(name)
+        flat[name] = members
+        return members
+
+    for name in groups:
+        visit(name)
+
+    if kind is None:
+        return {name: list(members) for name, members in flat.items()}
+    return {name: merge_group_members(members, kind) for name, members in flat.items()}
+
+def resolve_firewall_groups(group):
+    """
+    Resolve all nested firewall groups once and keep the result in the
+    "resolved" key of the group dictionary: group type -> group name ->
+    members. The templates get the members through the nft_group_members
+    filter. Invalid includes are ignored here and reported by verify().
+    """
+    if not group:
+        return
+    group['resolved'] = {}
+    for group_type, (key, kind) in nested_group_types.items():
+        if group_type in group:
+            group['resolved'][group_type] = resolve_nested_groups(group[group_type], key, kind,
+                                                                  strict=False)
+
 # GeoIP
 
 nftables_geoip_conf = '/run/nftables-geoip.conf'
 geoip_database = '/usr/share/vyos-geoip/dbip-country-lite.csv.gz'
+geoip_index = '/usr/share/vyos-geoip/dbip-country-lite.idx'
 geoip_lock_file = '/run/vyos-geoip.lock'
-
-def geoip_load_data(codes=[]):
-    data = None
-
-    if not os.path.exists(geoip_database):
-        return []
-
+# elements of the GeoIP sets as loaded into nftables, used for incremental updates
+geoip_state = '/run/vyos-geoip-sets.json'
+
+# The GeoIP index holds the merged address ranges of every country and
+# address family: a header (magic, mtime of the database it was built from,
+# number of entries), a directory entry per country and family (country code,
+# family, offset and number of ranges) followed by the ranges themselves
+# (first and last address, IPv6 addresses as two 64 bit halves).
+GEOIP_INDEX_MAGIC = b'VYGEOIP1'
+_geoip_header = struct.Struct('!8sQI')
+_geoip_entry = struct.Struct('!2sBxII')
+_geoip_range = {4: struct.Struct('!II'), 6: struct.Struct('!QQQQ')}
+
+def geoip_set_name(codes, ipv6=False):
+    """
+    Return the name of the nftables set matching the given country codes.
+    Rules matching the same countries share one set.
+    """
+    suffix = '_'.join(sorted(set(code.lower() for code in codes)))
+    if len(suffix) > 128:
+        suffix = sha1(suffix.encode()).hexdigest()[:16]
+    return f'GEOIP_CC{"6" if ipv6 else ""}_{suffix}'
+
+def _range_element(start, end, version):
+    # nftables element of an address range, a prefix if the range is one
+    address = IPv4Address if version == 4 else IPv6Address
+    size = end - start + 1
+    if start == end:
+        return str(address(start))
+    if size & (size - 1) == 0 and start % size == 0:
+        bits = 32 if version == 4 else 128
+        return f'{address(start)}/{bits - size.bit_length() + 1}'
+    return f'{address(start)}-{address(end)}'
+
+def geoip_build_index():
+    """
+    Build the GeoIP index from the CSV database. The address ranges of
+    every country are merged once, loading the sets later on only needs to
+    read the ranges of the countries in use.
+    """
+    ranges = {}
+    with gzip.open(geoip_database, mode='rt') as csv_fh:
+        for start, end, code in csv.reader(csv_fh):
+            start = ip_address(start)
+            ranges.setdefault((code.lower(), start.version), []).append(
+                (int(start), int(ip_address(end))))
+
+    directory = []
+    data = bytearray()
+    offset = _geoip_header.size + _geoip_entry.size * len(ranges)
+    for (code, version), items in sorted(ranges.items()):
+        # merge overlapping and adjacent ranges before splitting into prefixes
+        merged = []
+        for start, end in sorted(items):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        directory.append(_geoip_entry.pack(code.encode()[:2], version,
+                                           offset + len(data), len(merged)))
+        fmt = _geoip_range[version]
+        for start, end in merged:
+            if version == 4:
+                data += fmt.pack(start, end)
+            else:
+                data += fmt.pack(start >> 64, start & (2 ** 64 - 1),
+                                 end >> 64, end & (2 ** 64 - 1))
+
+    tmp = f'{geoip_index}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_geoip_header.pack(GEOIP_INDEX_MAGIC,
+                                   os.stat(geoip_database).st_mtime_ns,
+                                   len(directory)))
+        f.write(b''.join(directory))
+        f.write(data)
+    os.replace(tmp, geoip_index)
+
+def geoip_index_valid():
+    """ Check if the GeoIP index exists and was built from the current database """
     try:
-        with gzip.open(geoip_database, mode='rt') as csv_fh:
-            reader = csv.reader(csv_fh)
-            out = []
-            for start, end, code in reader:
-                if code.lower() in codes:
-                    out.append([start, end, code.lower()])
-            return out
-    except:
-        print('Error: Failed to open GeoIP database')
-    return []
+        with open(geoip_index, 'rb') as f:
+            magic, mtime, _ = _geoip_header.unpack(f.read(_geoip_header.size))
+        return magic == GEOIP_INDEX_MAGIC and mtime == os.stat(geoip_database).st_mtime_ns
+    except (OSError, struct.error):
+        return False
+
+def geoip_load_data(codes=[], ipv6=False):
+    """
+    Return the address ranges of the given countries from the GeoIP index
+    as nftables set elements in a dictionary: country code -> elements
+    """
+    version = 6 if ipv6 else 4
+    fmt = _geoip_range[version]
+    out = {}
+
+    with open(geoip_index, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+        _, _, entries = _geoip_header.unpack_from(index, 0)
+        for i in range(entries):
+            code, family, offset, count = _geoip_entry.unpack_from(
+                index, _geoip_header.size + i * _geoip_entry.size)
+            code = code.decode()
+            if family != version or code not in codes:
+                continue
+            elements = out.setdefault(code, [])
+            for fields in fmt.iter_unpack(index[offset:offset + count * fmt.size]):
+                if version == 4:
+                    start, end = fields
+                else:
+                    start, end = (fields[0] << 64) | fields[1], (fields[2] << 64) | fields[3]
+                elements.append(_range_element(start, end, version))
+    return out
 
 def geoip_download_data():
     url = 'https://download.db-ip.com/free/dbip-country-lite-{}.csv.gz'.format(strftime("%Y-%m"))
@@ -712,6 +923,7 @@ def geoip_download_data():
 
         download(geoip_database, url)
         print("Downloaded GeoIP database")
+        geoip_build_index()
         return True
     except:
         print("Error: Failed to download GeoIP database")
@@ -731,12 +943,21 @@ def __enter__(self):
     def __exit__(self, exc_type, exc_value, tb):
         os.unlink(self.file)
 
-def geoip_update(firewall, force=False):
+def geoip_update(firewall, force=False, incremental=False):
+    """
+    Load the GeoIP sets used by the firewall. With incremental, the sets are
+    expected to hold the elements of the last update and only the changed
+    elements are removed or added.
+    """
     with GeoIPLock(geoip_lock_file) as lock:
         if not lock:
             print("Script is already running")
             return False
 
+        # sets were recreated empty by the firewall, the state is stale
+        if not incremental and os.path.exists(geoip_state):
+            os.unlink(geoip_state)
+
         if not firewall:
             print("Firewall is not configured")
             return True
@@ -747,50 +968,64 @@ def geoip_update(firewall, force=False):
         elif force:
             geoip_download_data()
 
-        ipv4_codes = {}
-        ipv6_codes = {}
-
-        ipv4_sets = {}
-        ipv6_sets = {}
-
-        # Map country codes to set names
+        # Map set names to country codes, one set per address family and
+        # list of countries
+        sets = {'ipv4': {}, 'ipv6': {}}
         for codes, path in dict_search_recursive(firewall, 'country_code'):
-            set_name = f'GEOIP_CC_{path[1]}_{path[2]}_{path[4]}'
-            if ( path[0] == 'ipv4'):
-                for code in codes:
-                    ipv4_codes.setdefault(code, []).append(set_name)
-            elif ( path[0] == 'ipv6' ):
-                set_name = f'GEOIP_CC6_{path[1]}_{path[2]}_{path[4]}'
-                for code in codes:
-                    ipv6_codes.setdefault(code, []).append(set_name)
-
-        if not ipv4_codes and not ipv6_codes:
+            if path[0] in sets:
+                set_name = geoip_set_name(codes, ipv6=(path[0] == 'ipv6'))
+                sets[path[0]][set_name] = codes
+
+        if not sets['ipv4'] and not sets['ipv6']:
             if force:
                 print("GeoIP not in use by firewall")
             return True
 
-        geoip_data = geoip_load_data([*ipv4_codes, *ipv6_codes])
+        try:
+            if not geoip_index_valid():
+                geoip_build_index()
+        except Exception as e:
+            print(f'Error: Failed to build GeoIP index: {e}')
+            return False
 
-        # Iterate IP blocks to assign to sets
-        for start, end, code in geoip_data:
-            ipv4 = is_ipv4(start)
-            if code in ipv4_codes and ipv4:
-                ip_range = f'{start}-{end}' if start != end else start
-                for setname in ipv4_codes[code]:
-                    ipv4_sets.setdefault(setname, []).append(ip_range)
-            if code in ipv6_codes and not ipv4:
-                ip_range = f'{start}-{end}' if start != end else start
-                for setname in ipv6_codes[code]:
-                    ipv6_sets.setdefault(setname, []).append(ip_range)
+        state = {}
+        if incremental and os.path.exists(geoip_state):
+            with open(geoip_state) as f:
+                state = json.load(f)
+
+        new_state = {}
+        updates = {'ipv4': {}, 'ipv6': {}}
+        changed = False
+        for family, family_sets in sets.items():
+            ranges = geoip_load_data([code for codes in family_sets.values() for code in codes],
+                                     ipv6=(family == 'ipv6'))
+            for set_name, codes in family_sets.items():
+                elements = [item for code in sorted(set(codes)) for item in ranges.get(code, [])]
+                new_state[set_name] = elements
+                if set_name in state:
+                    old, new = set(state[set_name]), set(elements)
+                    update = {'flush': False, 'delete': sorted(old - new), 'add': sorted(new - old)}
+                else:
+                    update = {'flush': True, 'delete': [], 'add': elements}
+                changed = changed or update['flush'] or update['delete'] or update['add']
+                updates[family][set_name] = update
+
+        if not changed:
+            return True
 
         render(nftables_geoip_conf, 'firewall/nftables-geoip-update.j2', {
-            'ipv4_sets': ipv4_sets,
-            'ipv6_sets': ipv6_sets
+            'ipv4_sets': updates['ipv4'] or None,
+            'ipv6_sets': updates['ipv6'] or None
         })
 
         result = run(f'nft --file {nftables_geoip_conf}')
         if result != 0:
+            if os.path.exists(geoip_state):
+                os.unlink(geoip_state)
             print('Error: GeoIP failed to update firewall')
             return False
 
+        with open(geoip_state, 'w') as f:
+            json.dump(new_state, f)
+
         return True
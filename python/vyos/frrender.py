@@ -606,8 +606,8 @@ def dict_helper_nhrp_defaults(nhrp):
 
 class FRRender:
     cached_config_dict = {}
-    def __init__(self):
-        self._frr_conf = '/run/frr/config/vyos.frr.conf'
+    def __init__(self, frr_conf=None):
+        self._frr_conf = frr_conf or '/run/frr/config/vyos.frr.conf'
 
     def generate(self, config_dict) -> None:
         """
@@ -15,6 +15,7 @@
 
 import os
 
+from glob import glob
 from time import time
 from datetime import datetime
 from functools import reduce
@@ -116,23 +117,22 @@ def save_counters(self, stats):
                 if v:
                     f.write(f'{k},{v}\n')
 
-    def load_counters(self):
+    @classmethod
+    def _read_counters(cls, ifname):
         """
-        load the stats from a file keeping vyatta compatibility
-        return a dict() with the value for each interface counter for the cache
+        read the stats cache file of an interface, return a dict() with
+        the value of each counter - all counters are 0 if there is no cache
         """
-        ifname = self.config['ifname']
-
         stats = {}
         no_stats = {}
-        for name in self._stats_all:
+        for name in cls._stats_all:
             stats[name] = 0
             no_stats[name] = 0
 
         try:
-            with open(self.cachefile(self.ifname),'r') as f:
+            with open(cls.cachefile(ifname),'r') as f:
                 magic = f.readline().strip()
-                if magic != self.cache_magic:
+                if magic != cls.cache_magic:
                     print(f'bad magic {ifname}')
                     return no_stats
                 stats['timestamp'] = f.readline().strip()
@@ -143,6 +143,29 @@ def load_counters(self):
         except IOError:
             return no_stats
 
+    @classmethod
+    def load_all_counters(cls):
+        """
+        load the stats cache of all interfaces which had their counters
+        cleared at once, return a dict() keyed by interface name
+
+        Interfaces without a cache file are not part of the result, use
+        load_counters() semantics (all counters 0) for them.
+        """
+        prefix, suffix = cls.cachefile('*').split('*')
+        counters = {}
+        for fname in glob(cls.cachefile('*')):
+            ifname = fname[len(prefix):-len(suffix)]
+            counters[ifname] = cls._read_counters(ifname)
+        return counters
+
+    def load_counters(self):
+        """
+        load the stats from a file keeping vyatta compatibility
+        return a dict() with the value for each interface counter for the cache
+        """
+        return self._read_counters(self.config['ifname'])
+
     def clear_counters(self):
         stats = self.get_stats()
         for counter, value in stats.items():
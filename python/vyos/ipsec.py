@@ -32,6 +32,81 @@ class ViciCommandError(Exception):
     pass
 
 
+class ViciSnapshot:
+    """
+    Point in time view of the IKE SAs and loaded connections of strongSwan
+
+    Both list-sas and list-conns are streamed once over a single VICI
+    session. Every streamed item is converted to CLI/API compatible types
+    right away and indexed so lookups by IKE and CHILD SA name do not need
+    to walk the whole list again.
+
+    :param ike: optional IKE SA/connection name to filter on (server side)
+    :param sas: retrieve IKE SAs
+    :param connections: retrieve loaded connections
+    """
+
+    def __init__(self, ike: str = None, sas: bool = True, connections: bool = True):
+        from vici import Session as vici_session
+        from vyos.utils.convert import convert_data
+
+        # list of {ike_name: ike_sa} as returned by VICI
+        self.sas = []
+        # list of {ike_name: connection} as returned by VICI
+        self.connections = []
+        # index: IKE SA name -> list of IKE SAs
+        self.sas_by_name = {}
+        # index: IKE SA unique id -> {ike_name: ike_sa}
+        self.sas_by_id = {}
+        # index: (IKE SA name, CHILD SA name) -> list of CHILD SAs
+        self.child_sas = {}
+        # index: connection name -> connection
+        self.connections_by_name = {}
+
+        try:
+            session = vici_session()
+        except Exception:
+            raise ViciInitiateError('IPsec not initialized')
+
+        vici_filter = {'ike': ike} if ike else {}
+        if sas:
+            try:
+                for item in session.list_sas(vici_filter):
+                    self._add_sa(convert_data(item))
+            except Exception:
+                raise ViciCommandError('Failed to get SAs')
+
+        if connections:
+            try:
+                for item in session.list_conns(vici_filter):
+                    self._add_connection(convert_data(item))
+            except Exception:
+                raise ViciCommandError('Failed to get connections')
+
+    def _add_sa(self, item: dict) -> None:
+        self.sas.append(item)
+        for ike_name, ike_sa in item.items():
+            self.sas_by_name.setdefault(ike_name, []).append(ike_sa)
+            if 'uniqueid' in ike_sa:
+                self.sas_by_id[ike_sa['uniqueid']] = item
+            for child_sa in ike_sa.get('child-sas', {}).values():
+                key = (ike_name, child_sa.get('name'))
+                self.child_sas.setdefault(key, []).append(child_sa)
+
+    def _add_connection(self, item: dict) -> None:
+        self.connections.append(item)
+        for conn_name, conn in item.items():
+            self.connections_by_name[conn_name] = conn
+
+    def get_sas(self, ike_name: str) -> list:
+        """ Return all IKE SAs of the given name """
+        return self.sas_by_name.get(ike_name, [])
+
+    def get_child_sas(self, ike_name: str, child_name: str) -> list:
+        """ Return all CHILD SAs of the given name below an IKE SA """
+        return self.child_sas.get((ike_name, child_name), [])
+
+
 def get_vici_sas():
     from vici import Session as vici_session
 
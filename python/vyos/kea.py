@@ -60,6 +60,15 @@
 
 kea_ctrl_socket = '/run/kea/dhcp{inet}-ctrl-socket'
 
+# number of leases retrieved per lease{4,6}-get-page command
+kea_lease_page_size = 1000
+
+# Kea control channel result codes
+KEA_RESULT_SUCCESS = 0
+KEA_RESULT_EMPTY = 3
+
+lease_state_long = {0: 'active', 1: 'rejected', 2: 'expired'}
+
 
 def _format_hex_string(in_str):
     out_str = ''
@@ -364,24 +373,75 @@ def _ctrl_socket_command(inet, command, args=None):
         if args:
             payload['arguments'] = args
 
-        sock.send(bytes(json.dumps(payload), 'utf-8'))
-        result = b''
+        sock.sendall(bytes(json.dumps(payload), 'utf-8'))
+
+        # Kea may deliver a response in any number of chunks and closes the
+        # connection after the response, it is decoded once at the end
+        result = bytearray()
         while True:
-            data = sock.recv(4096)
-            result += data
-            if len(data) < 4096:
+            data = sock.recv(65536)
+            if not data:
                 break
+            result += data
 
-        return json.loads(result.decode('utf-8'))
+        return json.loads(result) if result else None
+
+
+def kea_iter_leases(inet, subnets=None, page_size=kea_lease_page_size):
+    """
+    Retrieve all leases from Kea and yield them one by one
+
+    Leases are fetched in pages of page_size via lease{4,6}-get-page so only
+    a single page is held in memory at a time. With subnets (a list of Kea
+    subnet ids) only the leases of these subnets are returned. Kea has no
+    paged command per subnet, the filter is applied to each page.
+    """
+    if subnets is not None:
+        if not subnets:
+            return
+        subnets = {int(s) for s in subnets}
+
+    page_from = 'start'
+    while True:
+        args = {'from': page_from, 'limit': page_size}
+        page = _ctrl_socket_command(inet, f'lease{inet}-get-page', args)
+
+        # Kea answers with an empty result once "from" is past the last lease
+        if not page or page.get('result') == KEA_RESULT_EMPTY:
+            return
+        if page.get('result') != KEA_RESULT_SUCCESS:
+            return
+
+        leases = page.get('arguments', {}).get('leases', [])
+        if subnets is None:
+            yield from leases
+        else:
+            yield from (lease for lease in leases if lease['subnet-id'] in subnets)
+
+        if len(leases) < page_size:
+            return
+        # next page starts after the last address of this page
+        page_from = leases[-1]['ip-address']
 
 
 def kea_get_leases(inet):
-    leases = _ctrl_socket_command(inet, f'lease{inet}-get-all')
+    return list(kea_iter_leases(inet))
+
 
-    if not leases or 'result' not in leases or leases['result'] != 0:
-        return []
+def kea_get_lease(inet, ip_address):
+    """
+    Return a single lease by its address or prefix, None if it does not exist
+    """
+    lease_types = ['IA_NA', 'IA_PD'] if inet == '6' else [None]
+    for lease_type in lease_types:
+        args = {'ip-address': ip_address}
+        if lease_type:
+            args['type'] = lease_type
+        result = _ctrl_socket_command(inet, f'lease{inet}-get', args)
+        if result and result.get('result') == KEA_RESULT_SUCCESS:
+            return result['arguments']
 
-    return leases['arguments']['leases']
+    return None
 
 
 def kea_delete_lease(inet, ip_address):
@@ -411,23 +471,32 @@ def kea_get_dhcp_pools(config, inet):
     return [network['name'] for network in shared_networks] if shared_networks else []
 
 
-def kea_get_pool_from_subnet_id(config, inet, subnet_id):
+def kea_get_subnet_pool_map(config, inet) -> dict:
+    """
+    Return a dictionary mapping every Kea subnet id to the name of the
+    shared-network (pool) it belongs to
+    """
     shared_networks = dict_search_args(
         config, 'arguments', f'Dhcp{inet}', 'shared-networks'
     )
 
+    subnet_pools = {}
     if not shared_networks:
-        return None
+        return subnet_pools
 
     for network in shared_networks:
         if f'subnet{inet}' not in network:
             continue
 
         for subnet in network[f'subnet{inet}']:
-            if 'id' in subnet and int(subnet['id']) == int(subnet_id):
-                return network['name']
+            if 'id' in subnet:
+                subnet_pools[int(subnet['id'])] = network['name']
 
-    return None
+    return subnet_pools
+
+
+def kea_get_pool_from_subnet_id(config, inet, subnet_id):
+    return kea_get_subnet_pool_map(config, inet).get(int(subnet_id))
 
 
 def kea_get_static_mappings(config, inet, pools=[]) -> list:
@@ -464,79 +533,106 @@ def kea_get_static_mappings(config, inet, pools=[]) -> list:
     return mappings
 
 
-def kea_get_server_leases(config, inet, pools=[], state=[], origin=None) -> list:
-    """
-    Get DHCP server leases from active Kea DHCPv4 or DHCPv6 configuration
-    :return list
-    """
-    leases = kea_get_leases(inet)
+def _kea_format_lease(lease, inet, pool, now) -> dict:
+    lifetime = lease['valid-lft']
+    start = lease['cltt']
+    expiry = start + lifetime
 
-    data = []
-    for lease in leases:
-        lifetime = lease['valid-lft']
-        start = lease['cltt']
-        expiry = start + lifetime
+    start_time = datetime.fromtimestamp(start, timezone.utc)
+    expire_time = datetime.fromtimestamp(expiry, timezone.utc) if expiry else None
 
-        lease['start_time'] = datetime.fromtimestamp(start, timezone.utc)
-        lease['expire_time'] = (
-            datetime.fromtimestamp(expiry, timezone.utc) if expiry else None
-        )
+    data_lease = {}
+    data_lease['ip'] = lease['ip-address']
+    data_lease['state'] = lease_state_long[lease['state']]
+    data_lease['pool'] = pool
+    data_lease['end'] = expire_time.timestamp() if expire_time else None
+    data_lease['origin'] = 'local'  # TODO: Determine remote in HA
+    # remove trailing dot in 'hostname' to ensure consistency for `vyos-hostsd-client`
+    data_lease['hostname'] = lease.get('hostname', '').rstrip('.') or '-'
 
-        data_lease = {}
-        data_lease['ip'] = lease['ip-address']
-        lease_state_long = {0: 'active', 1: 'rejected', 2: 'expired'}
-        data_lease['state'] = lease_state_long[lease['state']]
-        data_lease['pool'] = (
-            kea_get_pool_from_subnet_id(config, inet, lease['subnet-id'])
-            if config
-            else '-'
-        )
-        data_lease['end'] = (
-            lease['expire_time'].timestamp() if lease['expire_time'] else None
-        )
-        data_lease['origin'] = 'local'  # TODO: Determine remote in HA
-        # remove trailing dot in 'hostname' to ensure consistency for `vyos-hostsd-client`
-        data_lease['hostname'] = lease.get('hostname', '').rstrip('.') or '-'
+    if inet == '4':
+        data_lease['mac'] = lease['hw-address']
+        data_lease['start'] = start_time.timestamp()
 
-        if inet == '4':
-            data_lease['mac'] = lease['hw-address']
-            data_lease['start'] = lease['start_time'].timestamp()
+    if inet == '6':
+        data_lease['last_communication'] = start_time.timestamp()
+        data_lease['duid'] = _format_hex_string(lease['duid'])
+        data_lease['type'] = lease['type']
 
-        if inet == '6':
-            data_lease['last_communication'] = lease['start_time'].timestamp()
-            data_lease['duid'] = _format_hex_string(lease['duid'])
-            data_lease['type'] = lease['type']
+        if lease['type'] == 'IA_PD':
+            prefix_len = lease['prefix-len']
+            data_lease['ip'] += f'/{prefix_len}'
 
-            if lease['type'] == 'IA_PD':
-                prefix_len = lease['prefix-len']
-                data_lease['ip'] += f'/{prefix_len}'
+    data_lease['remaining'] = ''
 
-        data_lease['remaining'] = ''
+    if lifetime > 0 and expire_time > now:
+        # substraction gives us a timedelta object which can't be formatted
+        # with strftime so we use str(), split gets rid of the microseconds
+        data_lease['remaining'] = str(expire_time - now).split('.')[0]
 
-        now = datetime.now(timezone.utc)
-        if lease['valid-lft'] > 0 and lease['expire_time'] > now:
-            # substraction gives us a timedelta object which can't be formatted
-            # with strftime so we use str(), split gets rid of the microseconds
-            data_lease['remaining'] = str(lease['expire_time'] - now).split('.')[0]
+    return data_lease
+
+
+def kea_iter_server_leases(config, inet, pools=[], state=[], origin=None):
+    """
+    Get DHCP server leases from active Kea DHCPv4 or DHCPv6 configuration
+    and yield them one by one. Leases are filtered by pool and state while
+    they are retrieved, the pool filter is pushed down to Kea by subnet id
+    whenever only a subset of all pools is requested.
+    """
+    subnet_pools = kea_get_subnet_pool_map(config, inet) if config else {}
+
+    subnets = None
+    if subnet_pools and set(pools) != set(subnet_pools.values()):
+        subnets = [
+            subnet_id for subnet_id, pool in subnet_pools.items() if pool in pools
+        ]
+
+    now = datetime.now(timezone.utc)
+    # deduplicate
+    checked = set()
+    for lease in kea_iter_leases(inet, subnets=subnets):
+        pool = subnet_pools.get(lease['subnet-id']) if config else '-'
+        # Do not add leases of other pools
+        if pool not in pools:
+            continue
+
+        data_lease = _kea_format_lease(lease, inet, pool, now)
 
         # Do not add old leases
         if (
             data_lease['remaining'] != ''
-            and data_lease['pool'] in pools
             and data_lease['state'] != 'free'
             and (not state or state == 'all' or data_lease['state'] in state)
+            and data_lease['ip'] not in checked
         ):
-            data.append(data_lease)
-
-        # deduplicate
-        checked = []
-        for entry in data:
-            addr = entry.get('ip')
-            if addr not in checked:
-                checked.append(addr)
-            else:
-                idx = _find_list_of_dict_index(data, key='ip', value=addr)
-                if idx is not None:
-                    data.pop(idx)
+            checked.add(data_lease['ip'])
+            yield data_lease
+
+
+def kea_get_server_leases(config, inet, pools=[], state=[], origin=None):
+    """
+    Get DHCP server leases from active Kea DHCPv4 or DHCPv6 configuration
+    :return iterator, leases are retrieved while it is consumed
+    """
+    return kea_iter_server_leases(config, inet, pools, state, origin)
+
+
+def kea_get_server_lease_index(config, inet) -> dict:
+    """
+    Build an index of the valid (non expired) DHCP server lease addresses
+    keyed by Kea subnet id, retrieving all leases only once
+    :return dict
+    """
+    now = datetime.now(timezone.utc)
+    index = {}
+    for lease in kea_iter_leases(inet):
+        expiry = lease['cltt'] + lease['valid-lft']
+        if lease['valid-lft'] <= 0 or datetime.fromtimestamp(expiry, timezone.utc) <= now:
+            continue
+        address = lease['ip-address']
+        if inet == '6' and lease.get('type') == 'IA_PD':
+            address += f'/{lease["prefix-len"]}'
+        index.setdefault(lease['subnet-id'], set()).add(address)
 
-    return data
+    return index
@@ -20,22 +20,31 @@
 performance of each.
 """
 
+import re
 import sys
+from itertools import chain
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Union, Literal, TypeAlias, get_type_hints, get_args
+from typing import Iterable, Union, Literal, TypeAlias, get_type_hints, get_args
 
 from vyos.config import Config
-from vyos.configtree import ConfigTree, DiffTree
+from vyos.configtree import ConfigTree, ConfigTreeError, DiffTree
 from vyos.configsource import ConfigSourceSession, VyOSError
 from vyos.migrate import ConfigMigrate, ConfigMigrateError
-from vyos.utils.process import popen, DEVNULL
+from vyos.xml_ref import is_leaf, is_multi, is_tag, is_valueless
 
 Variety: TypeAlias = Literal['explicit', 'batch', 'tree', 'legacy']
 ConfigObj: TypeAlias = Union[str, ConfigTree]
 
 thismod = sys.modules[__name__]
 
+# set/delete command as rendered by ConfigTree.to_commands(): path elements
+# separated by spaces, followed by the value in single quotes, if any
+command_re = re.compile(r"^(set|delete) ([^']+?)(?: '(.*)')?$")
+# cli-shell-api loadFile reports nodes it could not set or delete, but
+# still exits with success
+load_failed_re = re.compile(r'^(?:Set|Delete)\b.*\bfailed\b.*$', re.MULTILINE)
+
 class LoadConfigError(Exception):
     """Raised when an error occurs loading a config file.
     """
@@ -72,24 +81,70 @@ def check_session(strict: bool, switch: Variety) -> None:
 def diff_to_commands(ctree: ConfigTree, ntree: ConfigTree) -> list:
     """Calculate the diff between the current and proposed config."""
     # Calculate the diff between the current and new config tree
-    commands = DiffTree(ctree, ntree).to_commands()
-    # on an empty set of 'add' or 'delete' commands, to_commands
-    # returns '\n'; prune below
-    command_list = commands.splitlines()
-    command_list = [c for c in command_list if c]
-    return command_list
-
-def set_commands(cmds: list) -> None:
-    """Set commands in the config session."""
-    if not cmds:
-        print('no commands to set')
-        return
+    return list(chain.from_iterable(DiffTree(ctree, ntree).iter_commands()))
+
+def apply_commands(tree: ConfigTree, cmds: Iterable[str]) -> tuple[int, list]:
+    """Apply set and delete commands to a config tree, with the semantics
+    of the CLI: set replaces the value of a leaf node unless it is a multi
+    node. Paths are checked against the reference tree, value constraints
+    are left to the session. Returns the number of commands and the list
+    of errors.
+    """
+    count = 0
     error_out = []
-    for op in cmds:
-        out, rc = popen(f'/opt/vyatta/sbin/my_{op}', shell=True, stderr=DEVNULL)
-        if rc != 0:
-            error_out.append(out)
+    tag_nodes = set()
+    for line in cmds:
+        count += 1
+        res = command_re.match(line)
+        if not res:
+            error_out.append(f'Invalid command: {line}')
             continue
+        op, path, value = res.group(1), res.group(2).split(), res.group(3)
+        try:
+            if op == 'delete':
+                if value is None:
+                    tree.delete(path)
+                else:
+                    tree.delete_value(path, value)
+                continue
+            # the reference tree lookups also validate the path
+            if is_leaf(path):
+                valid = (value is None) == is_valueless(path)
+            else:
+                valid = value is None
+            if not valid:
+                error_out.append(f'Invalid value: {line}')
+                continue
+            replace = value is None or not is_multi(path)
+            # nodes created by set need the tag flag for rendering
+            tags = [path[:i] for i in range(1, len(path))
+                    if tuple(path[:i]) not in tag_nodes and is_tag(path[:i])]
+            tree.set(path, value, replace=replace)
+            for tag in tags:
+                tree.set_tag(tag)
+                tag_nodes.add(tuple(tag))
+        except ConfigTreeError as e:
+            error_out.append(f'{line}: {e}')
+        except ValueError:
+            # not in the reference tree
+            error_out.append(f'Invalid path: {line}')
+    return count, error_out
+
+def set_commands(cmds: Iterable[str], config: Config = None) -> None:
+    """Set commands in the config session. The commands are applied to
+    the session config in memory, which is then loaded with a single
+    session call instead of one call per command.
+    """
+    if config is None:
+        config = Config()
+    tree = config.get_config_tree() or ConfigTree('')
+    count, error_out = apply_commands(tree, cmds)
+    if not count:
+        print('no commands to set')
+        return
+    out = load_legacy(tree)
+    # values are only validated by the session
+    error_out.extend(load_failed_re.findall(out or ''))
     if error_out:
         out = '\n'.join(error_out)
         raise LoadConfigError(out)
@@ -135,9 +190,9 @@ def load_explicit(config_obj: ConfigObj):
     else:
         ntree = get_proposed_config(config_obj)
     # Calculate the diff between the current and proposed config
-    cmds = diff_to_commands(ctree, ntree)
+    cmds = DiffTree(ctree, ntree).iter_commands()
     # Set the commands in the config session
-    set_commands(cmds)
+    set_commands(chain.from_iterable(cmds), config)
 
 def load_batch(config_obj: ConfigObj):
     # requires legacy backend patch
@@ -159,7 +214,7 @@ def load_legacy(config_obj: ConfigObj):
     config = LoadConfig()
 
     try:
-        config.load_config(config_file)
+        return config.load_config(config_file)
     except VyOSError as e:
         raise LoadConfigError(e) from e
     finally:
@@ -0,0 +1,165 @@
+# Copyright 2025 VyOS maintainers and contributors <maintainers@vyos.io>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+status_file_location = '/run/openvpn/{ifname}.status'
+
+STATUS_HEADER_SERVER = 'OpenVPN CLIENT LIST'
+STATUS_HEADER_CLIENT = 'OpenVPN STATISTICS'
+
+# Parsed status files, keyed by file path. Each entry holds the (mtime, size)
+# tuple of the file at the time it was parsed together with the result, so a
+# status file is only read again once OpenVPN rewrote it (every 30 seconds).
+_status_cache = {}
+
+def _new_status() -> dict:
+    return {
+        'header': '',
+        'updated': '',
+        # all connected clients in the order of the status file
+        'clients': [],
+        # index: common name -> list of clients (duplicate-cn is allowed)
+        'clients_by_name': {},
+        # index: real address (host:port) -> client
+        'clients_by_address': {},
+        # index: virtual address -> routing table entry
+        'routes': {},
+        # index: real address (host:port) -> list of routing table entries
+        'routes_by_address': {},
+        # client and site-to-site mode counters
+        'statistics': {},
+    }
+
+def parse_status(lines) -> dict:
+    """
+    Parse the content of an OpenVPN status file (version 1) in a single pass
+
+    Server mode status files look like:
+
+      OpenVPN CLIENT LIST
+      Updated,Fri Aug 23 16:26:13 2019
+      Common Name,Real Address,Bytes Received,Bytes Sent,Connected Since
+      client1,172.18.202.10:55904,2880587,2882653,Fri Aug 23 16:25:48 2019
+      ROUTING TABLE
+      Virtual Address,Common Name,Real Address,Last Ref
+      10.10.2.0/25,client1,172.18.202.10:55904,Fri Aug 23 16:26:10 2019
+      10.23.1.10,client1,172.18.202.10:55904,Fri Aug 23 16:26:10 2019
+      GLOBAL STATS
+      Max bcast/mcast queue length,0
+      END
+
+    Client and site-to-site mode status files start with "OpenVPN STATISTICS"
+    followed by "key,value" counter lines.
+
+    Returns a dictionary with the clients and the routing table indexed by
+    common name, real address and virtual address.
+    """
+    status = _new_status()
+    section = None
+
+    for line_no, line in enumerate(lines):
+        line = line.rstrip('\n')
+
+        if line_no == 0:
+            status['header'] = line
+            section = 'clients' if line == STATUS_HEADER_SERVER else 'statistics'
+            continue
+
+        if line_no == 1:
+            if line.startswith('Updated,'):
+                status['updated'] = line[len('Updated,'):]
+            continue
+
+        if line == 'END':
+            break
+        if line == 'ROUTING TABLE':
+            section = 'routes'
+            continue
+        if line == 'GLOBAL STATS':
+            section = 'global'
+            continue
+        # column headers of the client list and routing table
+        if line.startswith('Common Name,') or line.startswith('Virtual Address,'):
+            continue
+
+        if section == 'clients':
+            fields = line.split(',', maxsplit=4)
+            if len(fields) < 5:
+                continue
+            client = {
+                'name': fields[0],
+                'real_address': fields[1],
+                'bytes_received': int(fields[2]),
+                'bytes_sent': int(fields[3]),
+                'connected_since': fields[4],
+            }
+            status['clients'].append(client)
+            status['clients_by_name'].setdefault(client['name'], []).append(client)
+            status['clients_by_address'][client['real_address']] = client
+
+        elif section == 'routes':
+            fields = line.split(',', maxsplit=3)
+            if len(fields) < 4:
+                continue
+            route = {
+                'virtual_address': fields[0],
+                'name': fields[1],
+                'real_address': fields[2],
+                'last_ref': fields[3],
+            }
+            status['routes'][route['virtual_address']] = route
+            status['routes_by_address'].setdefault(route['real_address'], []).append(route)
+
+        elif section in ['statistics', 'global']:
+            key, _, value = line.partition(',')
+            status['statistics'][key] = value
+
+    return status
+
+def get_status(ifname: str) -> dict:
+    """
+    Return the parsed status of an OpenVPN interface, or None if there is
+    no status file. The result is cached per process until the status file
+    is modified.
+    """
+    status_file = status_file_location.format(ifname=ifname)
+    try:
+        st = os.stat(status_file)
+    except FileNotFoundError:
+        _status_cache.pop(status_file, None)
+        return None
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _status_cache.get(status_file)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(status_file, 'r') as f:
+        status = parse_status(f)
+
+    _status_cache[status_file] = (stamp, status)
+    return status
+
+def get_tunnel_address(status: dict, real_address: str) -> str:
+    """
+    Return the tunnel (virtual) address assigned to the client connected
+    from real_address, 'n/a' if there is none. Subnet entries learned via
+    iroute are ignored.
+    """
+    for route in status['routes_by_address'].get(real_address, []):
+        if '/' not in route['virtual_address']:
+            return route['virtual_address']
+    return 'n/a'
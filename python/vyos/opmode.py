@@ -15,6 +15,7 @@
 
 import re
 import sys
+import types
 import typing
 from humps import decamelize
 
@@ -231,6 +232,29 @@ def _normalize_field_names(value):
         return value
 
 
+def _print_json_stream(items):
+    """Print the items of a generator as a JSON list, one item at a time,
+    the output is the same as for a list of the same items"""
+    from itertools import chain
+    from json import dumps
+    from textwrap import indent
+
+    # errors raised before the first item are reported without partial output
+    try:
+        first = next(items)
+    except StopIteration:
+        sys.stdout.write('[]\n')
+        return
+
+    separator = '\n'
+    sys.stdout.write('[')
+    for item in chain([first], items):
+        item = _normalize_field_names(decamelize(item))
+        sys.stdout.write(separator + indent(dumps(item, indent=4), '    '))
+        separator = ',\n'
+    sys.stdout.write('\n]\n')
+
+
 def run(module):
     from argparse import ArgumentParser
 
@@ -312,6 +336,10 @@ def run(module):
         res = func(**args)
         if not args['raw']:
             return res
+        elif isinstance(res, types.GeneratorType):
+            # Potentially large outputs are produced lazily,
+            # print them as they come instead of building the list in memory
+            _print_json_stream(res)
         else:
             if not isinstance(res, dict) and not isinstance(res, list):
                 raise InternalError(
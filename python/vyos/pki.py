@@ -13,8 +13,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import datetime
+import hashlib
 import ipaddress
 
+from collections import OrderedDict
+
 from cryptography import x509
 from cryptography.exceptions import InvalidSignature
 from cryptography.x509.extensions import ExtensionNotFound
@@ -73,6 +76,30 @@
     'sha512': hashes.SHA512,
 }
 
+# Parsed certificates and CRLs of this process, keyed by type and digest of
+# the PEM data. Parsed objects are immutable and can be shared, the cache is
+# bounded as long running processes like vyos-configd keep it across commits.
+PARSED_CACHE_SIZE = 8192
+_parsed_cache = OrderedDict()
+
+def _load_cached(kind, pem, loader):
+    key = (kind, hashlib.sha256(pem).digest())
+    try:
+        _parsed_cache.move_to_end(key)
+        return _parsed_cache[key]
+    except KeyError:
+        pass
+
+    try:
+        obj = loader(pem)
+    except ValueError:
+        obj = False
+
+    _parsed_cache[key] = obj
+    if len(_parsed_cache) > PARSED_CACHE_SIZE:
+        _parsed_cache.popitem(last=False)
+    return obj
+
 def get_certificate_fingerprint(cert, hash):
     hash_algorithm = hash_map[hash]()
     fp = cert.fingerprint(hash_algorithm)
@@ -323,19 +350,14 @@ def load_certificate(raw_data, wrap_tags=True):
     if wrap_tags:
         raw_data = wrap_certificate(raw_data)
 
-    try:
-        return x509.load_pem_x509_certificate(bytes(raw_data, 'utf-8'))
-    except ValueError:
-        return False
+    return _load_cached('certificate', bytes(raw_data, 'utf-8'),
+                        x509.load_pem_x509_certificate)
 
 def load_crl(raw_data, wrap_tags=True):
     if wrap_tags:
         raw_data = wrap_crl(raw_data)
 
-    try:
-        return x509.load_pem_x509_crl(bytes(raw_data, 'utf-8'))
-    except ValueError:
-        return False
+    return _load_cached('crl', bytes(raw_data, 'utf-8'), x509.load_pem_x509_crl)
 
 def load_dh_parameters(raw_data, wrap_tags=True):
     if wrap_tags:
@@ -420,55 +442,123 @@ def verify_ca_chain(sorted_names, pki_node):
     if len(sorted_names) == 1: # Single cert, no chain
         return True
 
+    index = CertificateIndex.from_config(pki_node, sorted_names)
     for name in sorted_names:
         cert = load_certificate(pki_node[name]['certificate'])
-        verified = False
-        for ca_name in sorted_names:
-            if name == ca_name:
-                continue
-            ca_cert = load_certificate(pki_node[ca_name]['certificate'])
-            if verify_certificate(cert, ca_cert):
-                verified = True
-                break
-        if not verified and name != sorted_names[-1]:
+        issuer = index.find_issuer(cert, exclude=[name])
+        if issuer is None and name != sorted_names[-1]:
             # Only permit top-most certificate to fail verify (e.g. signed by public CA not explicitly in chain)
             return False
     return True
 
 # Certificate chain
 
+def _key_identifier(cert, ext_class):
+    try:
+        ext = cert.extensions.get_extension_for_class(ext_class).value
+    except (ExtensionNotFound, x509.DuplicateExtension, ValueError):
+        return None
+    if ext_class is x509.SubjectKeyIdentifier:
+        return ext.digest
+    return ext.key_identifier
+
+class CertificateIndex:
+    """
+    Index of (CA) certificates by subject and subject key identifier. The
+    issuer of a certificate is looked up by its authority key identifier or
+    issuer name, so only matching candidates have their signature verified
+    instead of every certificate in the index.
+    """
+    def __init__(self, certs=[]):
+        self._by_subject = {}
+        self._by_key_id = {}
+        for cert in certs:
+            self.add(cert)
+
+    @classmethod
+    def from_config(cls, pki_node, names=None):
+        """
+        Build an index from a PKI CLI node (e.g. pki ca), optionally limited
+        to the given names. Certificates are indexed under their CLI name.
+        """
+        index = cls()
+        for name in (names if names is not None else pki_node):
+            cert_conf = pki_node.get(name, {})
+            if 'certificate' not in cert_conf:
+                continue
+            cert = load_certificate(cert_conf['certificate'])
+            if cert:
+                index.add(cert, name)
+        return index
+
+    def add(self, cert, name=None):
+        entry = (name, cert)
+        self._by_subject.setdefault(cert.subject, []).append(entry)
+        key_id = _key_identifier(cert, x509.SubjectKeyIdentifier)
+        if key_id:
+            self._by_key_id.setdefault(key_id, []).append(entry)
+
+    def _candidates(self, cert):
+        # certificates with the matching key identifier first, the issuer
+        # name is the fallback for certificates without identifiers
+        key_id = _key_identifier(cert, x509.AuthorityKeyIdentifier)
+        by_key_id = self._by_key_id.get(key_id, []) if key_id else []
+        return by_key_id + [entry for entry in self._by_subject.get(cert.issuer, [])
+                            if entry not in by_key_id]
+
+    def find_issuer(self, cert, exclude=[]):
+        """
+        Return the (name, certificate) tuple of the issuer of cert, None if
+        it is not in the index. Certificates equal to one in exclude (names
+        or certificate objects) are skipped.
+        """
+        for name, ca_cert in self._candidates(cert):
+            if name in exclude or ca_cert in exclude:
+                continue
+            if verify_certificate(cert, ca_cert):
+                return name, ca_cert
+        return None
+
 def find_parent(cert, ca_certs):
-    for ca_cert in ca_certs:
-        if verify_certificate(cert, ca_cert):
-            return ca_cert
-    return None
+    if not isinstance(ca_certs, CertificateIndex):
+        ca_certs = CertificateIndex(ca_certs)
+    issuer = ca_certs.find_issuer(cert)
+    return issuer[1] if issuer else None
 
 def find_chain(cert, ca_certs):
-    remaining = ca_certs.copy()
+    index = CertificateIndex(ca_certs)
+    used = []
     chain = [cert]
 
-    while remaining:
-        parent = find_parent(chain[-1], remaining)
-        if parent is None:
+    while len(used) < len(ca_certs):
+        issuer = index.find_issuer(chain[-1], exclude=used)
+        if issuer is None:
             # No parent in the list of remaining certificates or there's a circular dependency
             break
-        elif parent == chain[-1]:
+        parent = issuer[1]
+        if parent == chain[-1]:
             # Self-signed: must be root CA (end of chain)
             break
-        else:
-            remaining.remove(parent)
-            chain.append(parent)
+        used.append(parent)
+        chain.append(parent)
 
     return chain
 
 def sort_ca_chain(ca_names, pki_node):
-    def ca_cmp(ca_name1, ca_name2, pki_node):
-        cert1 = load_certificate(pki_node[ca_name1]['certificate'])
-        cert2 = load_certificate(pki_node[ca_name2]['certificate'])
+    # Order certificates from the leaf up to the root: every certificate
+    # comes before the one which issued it
+    index = CertificateIndex.from_config(pki_node, ca_names)
+    parent = {}
+    for name in ca_names:
+        cert = load_certificate(pki_node[name]['certificate'])
+        issuer = index.find_issuer(cert, exclude=[name]) if cert else None
+        parent[name] = issuer[0] if issuer else None
 
-        if verify_certificate(cert1, cert2): # cert1 is child of cert2
-            return -1
-        return 1
+    def depth(name):
+        seen = set()
+        while parent.get(name) and name not in seen:
+            seen.add(name)
+            name = parent[name]
+        return len(seen)
 
-    from functools import cmp_to_key
-    return sorted(ca_names, key=cmp_to_key(lambda cert1, cert2: ca_cmp(cert1, cert2, pki_node)))
+    return sorted(ca_names, key=depth, reverse=True)
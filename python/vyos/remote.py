@@ -13,6 +13,8 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
+import json
 import os
 import pwd
 import shutil
@@ -21,9 +23,12 @@
 import stat
 import sys
 import tempfile
+import threading
+import time
 import urllib.parse
 
 from contextlib import contextmanager
+from contextlib import nullcontext
 from pathlib import Path
 
 from ftplib import FTP
@@ -34,7 +39,9 @@
 
 from requests import Session
 from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
 from requests.packages.urllib3 import PoolManager
+from requests.packages.urllib3.exceptions import HTTPError as TransferError
 
 from vyos.progressbar import Progressbar
 from vyos.utils.io import ask_yes_no
@@ -46,6 +53,11 @@
 from vyos.base import Warning
 
 CHUNK_SIZE = 8192
+# HTTP downloads of files at least this large use several connections
+SEGMENT_MIN_SIZE = 16 * 1024 * 1024
+DOWNLOAD_CONNECTIONS = 4
+# Attempts to continue a segment after a transfer error without progress
+DOWNLOAD_RETRIES = 5
 
 class InteractivePolicy(MissingHostKeyPolicy):
     """
@@ -236,6 +248,214 @@ def upload(self, location: str):
                     sftp.put(location, path)
 
 
+class HttpDownload:
+    """
+    Download of a HTTP(S) resource using range requests, over several
+    connections for large files.
+
+    Data is written to "<location>.part" and the progress of every segment
+    is saved in "<location>.part.state". An interrupted download continues
+    where it stopped if the remote file did not change in the meantime
+    (same size, ETag and Last-Modified), also across invocations. Transfer
+    errors are retried per segment with the remaining range. A failed
+    download that can not be resumed removes its partial data.
+
+    The SHA-256 digest of the file is calculated while it is downloaded,
+    from the contiguous part of the file that is already complete.
+    """
+    def __init__(self, session, url, location, headers, timeout=10.0,
+                 connections=DOWNLOAD_CONNECTIONS):
+        self.session = session
+        self.url = url
+        self.location = location
+        self.part = f'{location}.part'
+        self.state_file = f'{location}.part.state'
+        self.timeout = timeout
+        try:
+            self.size = int(headers['Content-Length'])
+        except (KeyError, ValueError):
+            self.size = None
+        # resuming requires a known size and range support
+        self.ranges = bool(self.size) and headers.get('Accept-Ranges') == 'bytes'
+        self.validators = {
+            'size': self.size,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+        self.connections = connections if self.ranges and self.size >= SEGMENT_MIN_SIZE else 1
+        # cleared on errors a later attempt can not recover from
+        self.resumable = self.ranges
+        self.segments = None
+        self.error = None
+        self.sha256 = hashlib.sha256()
+        self.hashed = 0
+
+    def _load_state(self):
+        if not self.ranges:
+            return None
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            if state['validators'] != self.validators:
+                return None
+            if os.path.getsize(self.part) != self.size:
+                return None
+            return state['segments']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _remove_part(self):
+        for path in [self.part, self.state_file]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _save_state(self):
+        if not self.ranges:
+            return
+        with open(self.state_file, 'w') as f:
+            json.dump({'validators': self.validators,
+                       'segments': self.segments}, f)
+
+    def _done(self):
+        return sum(pos - start for start, _, pos in self.segments)
+
+    def _frontier(self):
+        # end of the contiguous completed part from the start of the file
+        for _, end, pos in self.segments:
+            if end is None or pos < end:
+                return pos
+        return self.segments[-1][1]
+
+    def _hash(self, fd):
+        frontier = self._frontier()
+        while self.hashed < frontier:
+            data = os.pread(fd, min(frontier - self.hashed, 1024 * 1024), self.hashed)
+            if not data:
+                break
+            self.sha256.update(data)
+            self.hashed += len(data)
+
+    def _fetch(self, fd, segment):
+        attempts = 0
+        while not self.error and (segment[1] is None or segment[2] < segment[1]):
+            headers = {}
+            if self.ranges:
+                headers['Range'] = f'bytes={segment[2]}-{segment[1] - 1}'
+            elif segment[2]:
+                # without range support the transfer starts over, the part
+                # already hashed is written again with the same content
+                segment[2] = 0
+            progress = segment[2]
+            try:
+                with self.session.get(self.url, headers=headers, stream=True,
+                                      timeout=self.timeout) as r:
+                    if 400 <= r.status_code < 500:
+                        r.raise_for_status()
+                    if r.status_code >= 500:
+                        raise TransferError(f'Server error {r.status_code}')
+                    if self.ranges and r.status_code != 206:
+                        self.resumable = False
+                        raise OSError(f'Server ignored the range request (status {r.status_code})')
+                    while segment[1] is None or segment[2] < segment[1]:
+                        chunk = r.raw.read(CHUNK_SIZE * 8)
+                        if not chunk:
+                            break
+                        os.pwrite(fd, chunk, segment[2])
+                        segment[2] += len(chunk)
+                if segment[1] is None:
+                    segment[1] = segment[2]
+                elif segment[2] < segment[1]:
+                    raise TransferError('Connection closed before the end of the range')
+            except (TransferError, RequestException) as e:
+                if getattr(e, 'response', None) is not None and e.response.status_code < 500:
+                    self.resumable = False
+                    self.error = e
+                    return
+                # a transfer that made progress gets a fresh set of attempts
+                attempts = 0 if segment[2] > progress else attempts + 1
+                if attempts > DOWNLOAD_RETRIES:
+                    self.error = e
+                    return
+                time.sleep(min(2 ** attempts, 30))
+            except Exception as e:
+                self.error = e
+                return
+
+    def run(self, progressbar=False, sha256=None) -> str:
+        """
+        Download the file and return its SHA-256 digest. If sha256 is given
+        and the file does not match, it is removed and an OSError raised.
+        """
+        try:
+            return self._run(progressbar, sha256)
+        except BaseException:
+            # the state saved for resuming covers only the data on disk
+            if not self.resumable:
+                self._remove_part()
+            raise
+
+    def _run(self, progressbar, sha256) -> str:
+        segments = self._load_state()
+        if segments is None:
+            if self.ranges:
+                step = -(-self.size // self.connections)
+                segments = [[start, min(start + step, self.size), start]
+                            for start in range(0, self.size, step)]
+            else:
+                segments = [[0, self.size, 0]]
+            with open(self.part, 'wb') as f:
+                if self.size:
+                    f.truncate(self.size)
+        elif progressbar:
+            print_error(f'Resuming download, {sum(p - s for s, _, p in segments) // (1024 * 1024)} MiB already present')
+        self.segments = segments
+
+        fd = os.open(self.part, os.O_RDWR)
+        try:
+            workers = [threading.Thread(target=self._fetch, args=(fd, segment), daemon=True)
+                       for segment in self.segments if segment[1] is None or segment[2] < segment[1]]
+            for worker in workers:
+                worker.start()
+
+            last_save = time.monotonic()
+            with Progressbar() if progressbar and self.size else nullcontext() as p:
+                while True:
+                    alive = [worker for worker in workers if worker.is_alive()]
+                    if not alive:
+                        break
+                    alive[0].join(timeout=0.25)
+                    self._hash(fd)
+                    if p:
+                        p.progress(self._done(), self.size)
+                    if time.monotonic() - last_save > 1.0:
+                        self._save_state()
+                        last_save = time.monotonic()
+                if p and not self.error:
+                    p.progress(self.size, self.size)
+            self._save_state()
+            if self.error:
+                raise self.error
+            self._hash(fd)
+        finally:
+            os.close(fd)
+
+        size = self.hashed
+        if self.size is not None and size != self.size:
+            self.resumable = False
+            raise OSError(f'Download incomplete: {size} of {self.size} bytes')
+        digest = self.sha256.hexdigest()
+        if sha256 and digest != sha256.lower():
+            self.resumable = False
+            raise OSError(f'Checksum mismatch: expected SHA-256 {sha256}, got {digest}')
+
+        os.replace(self.part, self.location)
+        if os.path.exists(self.state_file):
+            os.unlink(self.state_file)
+        return digest
+
+
 class HttpC:
     def __init__(self,
                  url,
@@ -251,6 +471,8 @@ def __init__(self,
         self.username = url.username or os.getenv('REMOTE_USERNAME')
         self.password = url.password or os.getenv('REMOTE_PASSWORD')
         self.timeout = timeout
+        # SHA-256 digest of the last download, calculated while downloading
+        self.digest = None
 
     def _establish(self):
         session = Session()
@@ -260,11 +482,11 @@ def _establish(self):
             session.auth = self.username, self.password
         return session
 
-    def download(self, location: str):
+    def download(self, location: str, sha256: str = None):
         with self._establish() as s:
             # We ask for uncompressed downloads so that we don't have to deal with decoding.
             # Not only would it potentially mess up with the progress bar but
-            # `shutil.copyfileobj(request.raw, file)` does not handle automatic decoding.
+            # writing `request.raw` to the file does not handle automatic decoding.
             s.headers.update({'Accept-Encoding': 'identity'})
             with s.head(self.urlstring,
                         allow_redirects=True,
@@ -275,24 +497,14 @@ def download(self, location: str):
                 final_urlstring = r.url
                 if r.history and self.progressbar:
                     print_error('Redirecting to ' + final_urlstring)
-                # Check for the prospective file size.
-                try:
-                    size = int(r.headers['Content-Length'])
-                # In case the server does not supply the header.
-                except KeyError:
-                    size = None
+                headers = r.headers
+            transfer = HttpDownload(s, final_urlstring, location, headers,
+                                    timeout=self.timeout)
             if self.check_space:
-                check_storage(location, size)
-            with s.get(final_urlstring, stream=True,
-                       timeout=self.timeout) as r, open(location, 'wb') as f:
-                if self.progressbar and size:
-                    with Progressbar(CHUNK_SIZE / size) as p:
-                        for chunk in iter(lambda: begin(p.increment(), r.raw.read(CHUNK_SIZE)), b''):
-                            f.write(chunk)
-                else:
-                    # We'll try to stream the download directly with `copyfileobj()` so that large
-                    #  files (like entire VyOS images) don't occupy much memory.
-                    shutil.copyfileobj(r.raw, f)
+                check_storage(location, transfer.size)
+            # Large files (like entire VyOS images) are written to disk as
+            # they arrive and never occupy much memory.
+            self.digest = transfer.run(progressbar=self.progressbar, sha256=sha256)
 
     def upload(self, location: str):
         # Does not yet support progressbars.
@@ -441,11 +653,31 @@ def urlc(urlstring, *args, **kwargs):
     except KeyError:
         raise ValueError(f'Unsupported URL scheme: "{scheme}"')
 
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
 def download(local_path, urlstring, progressbar=False, check_space=False,
-             source_host='', source_port=0, timeout=10.0, raise_error=False):
+             source_host='', source_port=0, timeout=10.0, raise_error=False,
+             sha256=None):
+    """
+    Download a file. If sha256 is given, the file must have this SHA-256
+    digest, otherwise the download fails. HTTP(S) downloads calculate the
+    digest while downloading and can be resumed, see HttpDownload.
+    """
     try:
         progressbar = progressbar and is_interactive()
-        urlc(urlstring, progressbar, check_space, source_host, source_port, timeout).download(local_path)
+        client = urlc(urlstring, progressbar, check_space, source_host, source_port, timeout)
+        if isinstance(client, HttpC):
+            client.download(local_path, sha256=sha256)
+        else:
+            client.download(local_path)
+            if sha256 and file_sha256(local_path) != sha256.lower():
+                os.unlink(local_path)
+                raise OSError(f'Checksum mismatch: expected SHA-256 {sha256}')
     except Exception as err:
         if raise_error:
             raise
@@ -647,25 +647,21 @@ def nft_intra_zone_action(zone_conf, ipv6=False):
             return f'jump {name_prefix}{name}'
     return 'return'
 
-@register_filter('nft_nested_group')
-def nft_nested_group(out_list, includes, groups, key):
-    if not vyos_defined(out_list):
-        out_list = []
-
-    def add_includes(name):
-        if key in groups[name]:
-            for item in groups[name][key]:
-                if item in out_list:
-                    continue
-                out_list.append(item)
-
-        if 'include' in groups[name]:
-            for name_inc in groups[name]['include']:
-                add_includes(name_inc)
-
-    for name in includes:
-        add_includes(name)
-    return out_list
+@register_filter('nft_group_members')
+def nft_group_members(group_name, group, group_type):
+    """
+    Members of a firewall group including nested groups, merged into
+    intervals where possible. Uses the result of resolve_firewall_groups()
+    if the group dictionary was resolved already.
+    """
+    from vyos.firewall import nested_group_types
+    from vyos.firewall import resolve_nested_groups
+
+    resolved = group.get('resolved', {}).get(group_type)
+    if resolved is None:
+        key, kind = nested_group_types[group_type]
+        resolved = resolve_nested_groups(group[group_type], key, kind, strict=False)
+    return resolved.get(group_name, [])
 
 @register_filter('nat_rule')
 def nat_rule(rule_conf, rule_id, nat_type, ipv6=False):
@@ -315,6 +315,93 @@ def embed_dict(p: list[str], d: dict) -> dict:
         ret = {path.pop(): ret}
     return ret
 
+def dict_digest(d) -> str:
+    """
+    Return a stable SHA-256 hex digest of a JSON serializable object,
+    independent of key order. None is returned for None, so a missing
+    config section has a well known digest as well.
+    """
+    if d is None:
+        return None
+    from hashlib import sha256
+    from json import dumps
+    data = dumps(d, sort_keys=True, separators=(',', ':'))
+    return sha256(data.encode()).hexdigest()
+
+def dict_to_delta_commands(old: dict, new: dict, path: list = None) -> list:
+    """
+    Compare two config dictionaries as returned by ConfigTree.to_json()
+    and return the list of commands turning old into new. Every command is
+    a dict with 'op' (set or delete), 'path' and, for leaf nodes, 'value'.
+    Deletions come first, so a node changing its type is removed before it
+    is set again. A removed node is deleted as a whole, without descending
+    into its children.
+    """
+    deletes = []
+    sets = []
+
+    def set_all(d, path):
+        if isinstance(d, dict):
+            if not d:
+                sets.append({'op': 'set', 'path': path})
+            for k, v in d.items():
+                set_all(v, path + [k])
+        elif isinstance(d, list):
+            for value in d:
+                sets.append({'op': 'set', 'path': path, 'value': value})
+        else:
+            sets.append({'op': 'set', 'path': path, 'value': d})
+
+    def compare(old, new, path):
+        for k, old_v in old.items():
+            if k not in new:
+                deletes.append({'op': 'delete', 'path': path + [k]})
+                continue
+            new_v = new[k]
+            if old_v == new_v:
+                continue
+            if isinstance(old_v, dict) and isinstance(new_v, dict):
+                compare(old_v, new_v, path + [k])
+            elif isinstance(old_v, list) and isinstance(new_v, list):
+                for value in old_v:
+                    if value not in new_v:
+                        deletes.append({'op': 'delete', 'path': path + [k], 'value': value})
+                for value in new_v:
+                    if value not in old_v:
+                        sets.append({'op': 'set', 'path': path + [k], 'value': value})
+            elif isinstance(old_v, str) and isinstance(new_v, str):
+                # setting a single value leaf replaces the old value
+                sets.append({'op': 'set', 'path': path + [k], 'value': new_v})
+            else:
+                deletes.append({'op': 'delete', 'path': path + [k]})
+                set_all(new_v, path + [k])
+        for k, new_v in new.items():
+            if k not in old:
+                set_all(new_v, path + [k])
+
+    compare(old, new, path or [])
+    return deletes + sets
+
+def dict_merge_set(old: dict, new: dict) -> dict:
+    """
+    Return the config dictionary resulting from applying only the set
+    commands of dict_to_delta_commands(old, new) to old: nodes and values of
+    new are added, nothing of old is removed. Single values are replaced,
+    multi values are added to the existing ones.
+    """
+    from copy import deepcopy
+    merged = deepcopy(old)
+
+    for k, new_v in new.items():
+        old_v = merged.get(k)
+        if isinstance(old_v, dict) and isinstance(new_v, dict):
+            merged[k] = dict_merge_set(old_v, new_v)
+        elif isinstance(old_v, list) and isinstance(new_v, list):
+            merged[k] = old_v + [value for value in new_v if value not in old_v]
+        else:
+            merged[k] = deepcopy(new_v)
+    return merged
+
 def check_mutually_exclusive_options(d, keys, required=False):
     """ Checks if a dict has at most one or only one of
     mutually exclusive keys.
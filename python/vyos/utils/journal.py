@@ -0,0 +1,204 @@
+# Copyright 2025 VyOS maintainers and contributors <maintainers@vyos.io>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+from datetime import datetime
+from datetime import timedelta
+from uuid import UUID
+
+# syslog(3) facility names, the list index is the facility number
+SYSLOG_FACILITIES = ['kern', 'user', 'mail', 'daemon', 'auth', 'syslog', 'lpr',
+                     'news', 'uucp', 'cron', 'authpriv', 'ftp', 'ntp', 'security',
+                     'console', 'solaris-cron', 'local0', 'local1', 'local2',
+                     'local3', 'local4', 'local5', 'local6', 'local7']
+# syslog(3) priority names, the list index is the priority number
+SYSLOG_PRIORITIES = ['emerg', 'alert', 'crit', 'err', 'warning', 'notice',
+                     'info', 'debug']
+
+def _syslog_number(value, names: list, kind: str) -> int:
+    value = str(value)
+    if value.isdigit() and int(value) < len(names):
+        return int(value)
+    if value in names:
+        return names.index(value)
+    raise ValueError(f'Unknown syslog {kind} "{value}", use one of: {", ".join(names)}')
+
+def _parse_time(value) -> datetime:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid time "{value}", use "YYYY-MM-DD [HH:MM[:SS]]"')
+
+def _json_value(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    # __MONOTONIC_TIMESTAMP is a (timestamp, boot id) tuple
+    if isinstance(value, tuple):
+        return _json_value(value[0])
+    if isinstance(value, datetime):
+        return str(round(value.timestamp() * 1000000))
+    if isinstance(value, timedelta):
+        return str(value // timedelta(microseconds=1))
+    if isinstance(value, UUID):
+        return value.hex
+    if isinstance(value, bytes):
+        return value.decode(errors='replace')
+    return str(value)
+
+def journal_entry(entry: dict) -> dict:
+    """
+    Convert an entry of systemd.journal.Reader to the representation of
+    "journalctl --output=json": all values are strings and timestamps are
+    given in microseconds.
+    """
+    return {key: _json_value(value) for key, value in entry.items()}
+
+def _iterate(reader, step, count, since, until, reverse, first=None):
+    n = 0
+    entry = first or step()
+    while entry and (count is None or n < count):
+        timestamp = entry['__REALTIME_TIMESTAMP']
+        if reverse:
+            if since and timestamp < since:
+                return
+            if until and timestamp > until:
+                entry = step()
+                continue
+        else:
+            if until and timestamp > until:
+                return
+            if since and timestamp < since:
+                entry = step()
+                continue
+        yield journal_entry(entry)
+        n += 1
+        entry = step()
+
+def journalctl_args(boot: bool = False,
+                    unit: str = None,
+                    facility: str = None,
+                    priority: str = None,
+                    since: str = None,
+                    until: str = None,
+                    cursor: str = None,
+                    count: int = None,
+                    reverse: bool = False,
+                    utc: bool = False) -> list:
+    """
+    Return the journalctl arguments selecting the same entries as
+    read_journal(). Values are validated like there and every option is a
+    single argument, a ValueError is raised for invalid ones.
+    """
+    args = ['--no-hostname', '--quiet']
+    if boot:
+        args.append('--boot')
+    if count is not None:
+        if count < 1:
+            raise ValueError('Count must be a positive number')
+        args.append(f'--lines={int(count)}')
+    if reverse:
+        args.append('--reverse')
+    if since:
+        _parse_time(since)
+        args.append(f'--since={since}')
+    if until:
+        _parse_time(until)
+        args.append(f'--until={until}')
+    if cursor:
+        args.append(f'--after-cursor={cursor}')
+    if unit:
+        args.append(f'--unit={unit}')
+    if facility:
+        args.append(f'--facility={_syslog_number(facility, SYSLOG_FACILITIES, "facility")}')
+    if priority:
+        args.append(f'--priority={_syslog_number(priority, SYSLOG_PRIORITIES, "priority")}')
+    if utc:
+        args.append('--utc')
+    return args
+
+def read_journal(boot: bool = False,
+                 unit: str = None,
+                 facility: str = None,
+                 priority: str = None,
+                 since=None,
+                 until=None,
+                 cursor: str = None,
+                 count: int = None,
+                 reverse: bool = False):
+    """
+    Read the systemd journal through its API and return a generator of
+    entries in the form of journalctl JSON output. Unit, facility and
+    priority are applied as journal matches, so non matching entries are
+    never decoded.
+
+    Without since or cursor the last count entries are returned (like
+    "journalctl --lines"). For pagination pass the __CURSOR of the last
+    entry received as cursor, the next page starts after that entry.
+
+    Arguments are validated before the generator is returned, a ValueError
+    is raised for invalid ones.
+    """
+    from systemd import journal
+
+    facility = _syslog_number(facility, SYSLOG_FACILITIES, 'facility') if facility else None
+    priority = _syslog_number(priority, SYSLOG_PRIORITIES, 'priority') if priority else None
+    since = _parse_time(since)
+    until = _parse_time(until)
+    if count is not None and count < 1:
+        raise ValueError('Count must be a positive number')
+
+    reader = journal.Reader()
+    if boot:
+        reader.this_boot()
+    if unit:
+        if '.' not in unit:
+            unit = f'{unit}.service'
+        reader.add_match(_SYSTEMD_UNIT=unit)
+    if facility is not None:
+        reader.add_match(SYSLOG_FACILITY=str(facility))
+    if priority is not None:
+        reader.log_level(priority)
+
+    step = reader.get_previous if reverse else reader.get_next
+    first = None
+    if cursor:
+        reader.seek_cursor(cursor)
+        first = step()
+        # the entry at the cursor was the last one of the previous page
+        if first and reader.test_cursor(cursor):
+            first = None
+    elif reverse:
+        if until:
+            reader.seek_realtime(until)
+        else:
+            reader.seek_tail()
+    elif since:
+        reader.seek_realtime(since)
+    elif count:
+        # the last count entries in chronological order, this needs to look
+        # at count entries only, going backwards from the end of the journal
+        if until:
+            reader.seek_realtime(until)
+        else:
+            reader.seek_tail()
+        tail = list(_iterate(reader, reader.get_previous, count, since, until, True))
+        return (entry for entry in reversed(tail))
+    else:
+        reader.seek_head()
+
+    return _iterate(reader, step, count, since, until, reverse, first)
@@ -0,0 +1,140 @@
+# Copyright 2025 VyOS maintainers and contributors <maintainers@vyos.io>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+from json import JSONDecoder
+from json import JSONDecodeError
+
+JSON_STREAM_CHUNK_SIZE = 65536
+
+_decoder = JSONDecoder()
+_whitespace = ' \t\n\r'
+# end of a number or literal (true, false, null)
+_scalar_end = re.compile(r'[\s,\]}]')
+
+class JSONStreamReader:
+    """
+    Incremental reader for a JSON document from a text stream.
+
+    Only the part of the document that is currently being decoded is kept in
+    memory: the objects and arrays leading to the requested members are
+    walked token by token, and every member below them is decoded on its own.
+    """
+    def __init__(self, stream, chunk_size=JSON_STREAM_CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        data = self._stream.read(self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """ Skip whitespace and return the next character, '' at the end """
+        while True:
+            size = len(self._buf)
+            while self._pos < size and self._buf[self._pos] in _whitespace:
+                self._pos += 1
+            if self._pos < size:
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f'Invalid JSON: expected "{char}", found "{found}"')
+        self._pos += 1
+
+    def _value(self):
+        if self._peek() not in '{["':
+            # a number could continue in the next chunk
+            while not _scalar_end.search(self._buf, self._pos) and self._fill():
+                pass
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            self._pos = end
+            return value
+
+    def _rest(self) -> str:
+        while self._fill():
+            pass
+        return self._buf[self._pos:].strip()
+
+    def _walk(self, path, keys, meta):
+        close = {'{': '}', '[': ']'}.get(self._peek())
+        if not close:
+            raise ValueError(f'Invalid JSON: {self._rest()[:256]}')
+        self._pos += 1
+
+        index = 0
+        while self._peek() != close:
+            if index:
+                self._expect(',')
+            if close == '}':
+                key = self._value()
+                if not isinstance(key, str):
+                    raise ValueError(f'Invalid JSON: object key {key!r} is not a string')
+                self._expect(':')
+            else:
+                key = index
+            index += 1
+
+            if not path:
+                yield keys + (key,), self._value()
+            elif (path[0] is None or path[0] == key) and self._peek() in '{[':
+                yield from self._walk(path[1:], keys + (key,), meta)
+            else:
+                value = self._value()
+                if meta is not None:
+                    meta[key] = value
+        self._pos += 1
+
+    def members(self, path=(), meta=None):
+        """
+        Return a generator of (keys, value) tuples for the members of the
+        object or array found at path. A path element of None matches any
+        key, keys holds the actual keys that were followed (array elements
+        use their index). Members that are not on the path are decoded and
+        stored in meta, if given. An empty document yields nothing.
+        """
+        if self._peek() == '':
+            return
+        yield from self._walk(tuple(path), (), meta)
+
+def iter_json_members(stream, path=(), meta=None, chunk_size=JSON_STREAM_CHUNK_SIZE):
+    """
+    Iterate over the members at path of the JSON document read from stream,
+    see JSONStreamReader.members()
+
+    % list(iter_json_members(StringIO('{"a": {"x": 1, "y": [2]}, "b": 3}'), ['a']))
+    [(('a', 'x'), 1), (('a', 'y'), [2])]
+    """
+    return JSONStreamReader(stream, chunk_size).members(path, meta)
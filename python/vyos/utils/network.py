@@ -226,6 +226,16 @@ def interface_list() -> list:
     return Section.interfaces()
 
 
+def interface_index_map() -> dict:
+    """
+    Get dictionary mapping kernel interface index to interface name, all
+    interfaces are retrieved from the kernel with a single netlink dump
+    :rtype: dict
+    """
+    from socket import if_nameindex
+    return dict(if_nameindex())
+
+
 def vrf_list() -> list:
     """
     Get list of VRFs in system
@@ -14,11 +14,67 @@
 # License along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import re
+import sys
 
 from subprocess import Popen
 from subprocess import PIPE
 from subprocess import STDOUT
 from subprocess import DEVNULL
+from time import monotonic
+
+# Characters for which a command needs to be interpreted by /bin/sh; commands
+# without them are split like the shell would and executed directly
+_shell_syntax = re.compile(r'[|&;<>()$`\\"*?\[\]#~{}!\n]')
+
+# Commands run by this process, collected between command_stats_start() and
+# command_stats_stop(), None when disabled
+_command_stats = None
+
+def command_stats_start():
+    """
+    Start recording all commands run through this module (popen() and the
+    wrappers around it, cmd_json_stream()). Records already collected are
+    discarded.
+    """
+    global _command_stats
+    _command_stats = []
+
+def command_stats_stop() -> list:
+    """
+    Stop recording commands and return the list of records, each a dict
+    with command, caller (file:line function), duration (seconds), exit_code
+    (None if the command did not finish) and shell (True if /bin/sh was used)
+    """
+    global _command_stats
+    stats = _command_stats or []
+    _command_stats = None
+    return stats
+
+def command_stats() -> list:
+    """
+    Return the records collected so far without stopping the recording,
+    None if commands are not recorded
+    """
+    return None if _command_stats is None else list(_command_stats)
+
+def _record_command(command, start, exit_code, use_shell):
+    if _command_stats is None:
+        return
+    # the first frame outside of this module is the caller
+    frame = sys._getframe(1)
+    while frame and frame.f_globals.get('__name__') == __name__:
+        frame = frame.f_back
+    caller = ''
+    if frame:
+        caller = f'{frame.f_code.co_filename}:{frame.f_lineno} {frame.f_code.co_name}'
+    _command_stats.append({
+        'command': command if isinstance(command, str) else ' '.join(command),
+        'caller': caller,
+        'duration': round(monotonic() - start, 6),
+        'exit_code': exit_code,
+        'shell': bool(use_shell),
+    })
 
 
 def get_wrapper(vrf, netns, auth):
@@ -90,21 +146,44 @@ def popen(command, flag='', shell=None, input=None, timeout=None, env=None,
 
     use_shell = shell
     stdin = None
+    args = command
     if shell is None:
         use_shell = False
+        # commands without shell syntax are executed directly, sparing the
+        # /bin/sh process. Popen() uses vfork() then, so the cost of a call
+        # does not grow with the memory size of this interpreter.
         if ' ' in command:
-            use_shell = True
+            use_shell = bool(_shell_syntax.search(command))
+            if not use_shell:
+                from shlex import split
+                args = split(command)
         if env:
+            # /bin/sh provides the default PATH if env does not set one
             use_shell = True
+            args = command
 
     if input:
         stdin = PIPE
         input = input.encode() if type(input) is str else input
 
-    p = Popen(command, stdin=stdin, stdout=stdout, stderr=stderr,
-              env=env, shell=use_shell)
-
-    pipe = p.communicate(input, timeout)
+    start = monotonic()
+    exit_code = None
+    try:
+        try:
+            p = Popen(args, stdin=stdin, stdout=stdout, stderr=stderr,
+                      env=env, shell=use_shell)
+        except OSError:
+            if use_shell or args is command:
+                raise
+            # shell builtins, variable assignments or a missing program:
+            # let /bin/sh handle and report them as before
+            use_shell = True
+            p = Popen(command, stdin=stdin, stdout=stdout, stderr=stderr,
+                      env=env, shell=True)
+        pipe = p.communicate(input, timeout)
+        exit_code = p.returncode
+    finally:
+        _record_command(command, start, exit_code, use_shell)
 
     pipe_out = b''
     if stdout == PIPE:
@@ -233,6 +312,43 @@ def call(command, flag='', shell=None, input=None, timeout=None, env=None,
     return code
 
 
+def cmd_json_stream(command, path=(), meta=None, env=None):
+    """
+    A generator that runs a command producing a JSON document and yields
+    the (keys, value) tuples of the members at path while the command is
+    still writing its output, see vyos.utils.json_stream.iter_json_members().
+    The output is never held in memory as a whole.
+
+    The command is terminated when the generator is closed before the end
+    of the output was reached. A ValueError is raised for output that is
+    not JSON, its text is used as message (e.g. "% Unknown command"). An
+    OSError with the error output as message is raised if the command fails.
+    """
+    from shlex import join
+    from shlex import split
+    from tempfile import TemporaryFile
+    from vyos.utils.json_stream import iter_json_members
+
+    if isinstance(command, str):
+        command = split(command)
+
+    start = monotonic()
+    # a file, as a pipe not read while parsing could block the command
+    with TemporaryFile('w+') as stderr, \
+         Popen(command, stdout=PIPE, stderr=stderr, env=env, text=True) as p:
+        try:
+            yield from iter_json_members(p.stdout, path, meta)
+            code = p.wait()
+            if code:
+                stderr.seek(0)
+                raise OSError(code, stderr.read().strip() or
+                              f'"{join(command)}" failed with exit code {code}')
+        finally:
+            if p.poll() is None:
+                p.kill()
+            _record_command(command, start, p.poll(), False)
+
+
 def process_running(pid_file):
     """ Checks if a process with PID in pid_file is running """
     from psutil import pid_exists
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Offline benchmark of the conf_mode get_config/verify/generate phases with
+# synthetic configurations of increasing size. Runs from the source tree
+# after "make interface_definitions" (XML reference cache) and needs
+# libvyosconfig for ConfigSourceString:
+#
+#   PYTHONPATH=python/ scripts/conf-mode-benchmark.py --size 10 100 1000
+#
+# apply() is never called. External commands are not executed but counted,
+# files written by generate() end up in a temporary directory and system
+# state queries (interface or address existence) are answered by stubs.
+# Results are written as JSON for regression tracking.
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from base64 import b64encode
+from hashlib import sha256
+from ipaddress import IPv4Address
+from time import perf_counter
+
+conf_mode_dir = 'src/conf_mode'
+
+# Paths that are accessed as they are, everything else written by a script
+# is redirected to the sandbox directory
+passthrough_paths = ('/dev/', '/proc/', '/sys/')
+
+def host(base: str, index: int) -> str:
+    return str(IPv4Address(base) + index)
+
+def wireguard_key(seed: str) -> str:
+    return b64encode(sha256(seed.encode()).digest()).decode()
+
+def render_config(tree: dict, indent: int = 0) -> str:
+    """ Render a nested dict in config.boot syntax, None is a valueless node """
+    lines = []
+    pad = '    ' * indent
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            lines.append(f'{pad}{key} {{')
+            lines.append(render_config(value, indent + 1))
+            lines.append(f'{pad}}}')
+        elif isinstance(value, list):
+            lines.extend(f'{pad}{key} {item}' for item in value)
+        elif value is None:
+            lines.append(f'{pad}{key}')
+        else:
+            lines.append(f'{pad}{key} {value}')
+    return '\n'.join(lines)
+
+def firewall_config(size: int) -> dict:
+    rules = {f'rule {i}': {
+        'action': 'accept',
+        'protocol': 'tcp',
+        'destination': {'port': 1024 + i % 60000},
+        'source': {'address': host('10.0.0.0', i)},
+    } for i in range(1, size + 1)}
+    return {'firewall': {'ipv4': {'forward': {'filter': rules}}}}
+
+def vlan_config(size: int) -> dict:
+    if size > 4094:
+        raise ValueError('At most 4094 VLANs can be configured')
+    vifs = {f'vif {i}': {'address': f'{host("10.0.0.0", i * 256 + 1)}/24'}
+            for i in range(1, size + 1)}
+    return {'interfaces': {'bridge br0': vifs}}
+
+def bgp_config(size: int) -> dict:
+    neighbors = {f'neighbor {host("10.0.0.0", i)}': {
+        'remote-as': 65000 + i % 1000 + 1,
+        'description': f'peer-{i}',
+        'address-family': {'ipv4-unicast': {'soft-reconfiguration': {'inbound': None}}},
+    } for i in range(1, size + 1)}
+    return {'protocols': {'bgp': {'system-as': 65000, **neighbors}}}
+
+def wireguard_config(size: int) -> dict:
+    peers = {f'peer p{i}': {
+        'public-key': wireguard_key(f'peer-{i}'),
+        'allowed-ips': f'{host("10.0.0.0", i)}/32',
+    } for i in range(1, size + 1)}
+    return {'interfaces': {'wireguard wg0': {
+        'address': '10.255.255.1/32',
+        'port': 51820,
+        'private-key': wireguard_key('wg0'),
+        **peers,
+    }}}
+
+def dhcp_config(size: int) -> dict:
+    mappings = {f'static-mapping host{i}': {
+        'ip-address': host('10.0.0.0', i + 1),
+        'mac': ':'.join(f'{b:02x}' for b in (2, 0, 0, (i >> 16) & 255, (i >> 8) & 255, i & 255)),
+    } for i in range(1, size + 1)}
+    subnet = {'subnet-id': 1, 'default-router': '10.0.0.1',
+              'range 0': {'start': '10.255.0.1', 'stop': '10.255.0.254'},
+              **mappings}
+    return {'service': {'dhcp-server': {'shared-network-name LAN': {
+        'subnet 10.0.0.0/8': subnet}}}}
+
+# script, tag node value, config generator and system state stubs as
+# (module, function, return value) of every scenario
+scenarios = {
+    'firewall': ('firewall', None, firewall_config, []),
+    'vlan': ('interfaces_bridge', 'br0', vlan_config, []),
+    'bgp': ('protocols_bgp', None, bgp_config, [
+        ('vyos.utils.network', 'is_addr_assigned', False),
+    ]),
+    'wireguard': ('interfaces_wireguard', 'wg0', wireguard_config, [
+        ('vyos.utils.network', 'check_port_availability', True),
+    ]),
+    'dhcp': ('service_dhcp-server', None, dhcp_config, [
+        ('vyos.utils.network', 'is_subnet_connected', True),
+        ('vyos.utils.network', 'interface_exists', True),
+    ]),
+}
+
+def replace_everywhere(original, replacement):
+    """ Replace a function in all modules that imported it by name """
+    for module in list(sys.modules.values()):
+        for name, value in list(getattr(module, '__dict__', {}).items()):
+            if value is original:
+                setattr(module, name, replacement)
+
+class Sandbox:
+    """
+    Count and suppress external commands and redirect file system changes
+    to a temporary directory while the conf_mode phases run.
+    """
+    def __init__(self):
+        self.commands = 0
+        self.root = tempfile.mkdtemp(prefix='conf-mode-benchmark-')
+        self._restore = []
+        self._files = None
+
+    def path(self, path):
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            return path
+        path = os.path.abspath(os.fsdecode(path))
+        if path.startswith(self.root) or path.startswith(passthrough_paths):
+            return path
+        return os.path.join(self.root, path.lstrip('/'))
+
+    def _patch(self, obj, name, replacement):
+        self._restore.append((obj, name, getattr(obj, name)))
+        setattr(obj, name, replacement)
+
+    def _replace(self, module, name, replacement):
+        original = getattr(importlib.import_module(module), name)
+        replace_everywhere(original, replacement)
+        self._restore.append((replace_everywhere, replacement, original))
+
+    def __enter__(self):
+        from vyos.bootplan import patch_file_calls
+
+        sandbox = self
+        real_makedirs = os.makedirs
+
+        def read_path(path):
+            # files are read from the sandbox once they were written there
+            mapped = sandbox.path(path)
+            if isinstance(mapped, str) and os.path.lexists(mapped):
+                return mapped
+            return path
+
+        def write_path(path):
+            mapped = sandbox.path(path)
+            if mapped != path and isinstance(mapped, str):
+                real_makedirs(os.path.dirname(mapped), exist_ok=True)
+            return mapped
+
+        def sandbox_open(real_open):
+            def wrapper(file, mode='r', *args, **kwargs):
+                if any(m in mode for m in 'wax+'):
+                    return real_open(write_path(file), mode, *args, **kwargs)
+                return real_open(read_path(file), mode, *args, **kwargs)
+            return wrapper
+
+        def sandbox_os_open(real_open):
+            def wrapper(path, flags, *args, **kwargs):
+                if flags & (os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC):
+                    return real_open(write_path(path), flags, *args, **kwargs)
+                return real_open(read_path(path), flags, *args, **kwargs)
+            return wrapper
+
+        def sandbox_file_op(real):
+            # only files in the sandbox are changed, file descriptors were
+            # opened in the sandbox
+            def file_op(path, *args, **kwargs):
+                mapped = sandbox.path(path)
+                if not isinstance(mapped, str):
+                    return real(path, *args, **kwargs)
+                if os.path.lexists(mapped):
+                    return real(mapped, *args, **kwargs)
+            return file_op
+
+        def sandbox_link_op(real):
+            # the link target is content, the link is created in the sandbox
+            def link_op(src, dst, *args, **kwargs):
+                return real(src, write_path(dst), *args, **kwargs)
+            return link_op
+
+        def sandbox_move_op(real):
+            def move_op(src, dst, *args, **kwargs):
+                mapped = sandbox.path(src)
+                if isinstance(mapped, str) and os.path.lexists(mapped):
+                    return real(mapped, write_path(dst), *args, **kwargs)
+            return move_op
+
+        def wrap(module, name, original):
+            if name == 'open':
+                return sandbox_os_open(original) if module is os else sandbox_open(original)
+            if name == 'symlink':
+                return sandbox_link_op(original)
+            if name in ['link', 'rename', 'replace']:
+                return sandbox_move_op(original)
+            return sandbox_file_op(original)
+
+        def sandbox_popen(command, *args, **kwargs):
+            sandbox.commands += 1
+            return '', 0
+
+        class SandboxPopen(subprocess.Popen):
+            def __init__(self, args, *pargs, **kwargs):
+                sandbox.commands += 1
+                kwargs['shell'] = False
+                super().__init__(['true'], *pargs, **kwargs)
+
+        # the calls tracked by the boot plan cover every file system change
+        self._files = patch_file_calls(wrap)
+        self._files.__enter__()
+        self._patch(os, 'makedirs', lambda name, *args, **kwargs:
+                    real_makedirs(sandbox.path(name), *args, **kwargs))
+        self._patch(subprocess, 'Popen', SandboxPopen)
+        self._replace('vyos.utils.process', 'popen', sandbox_popen)
+        return self
+
+    def stub(self, module, name, value):
+        self._replace(module, name, lambda *args, **kwargs: value)
+
+    def __exit__(self, *args):
+        for obj, name, value in reversed(self._restore):
+            if obj is replace_everywhere:
+                replace_everywhere(name, value)
+            else:
+                setattr(obj, name, value)
+        self._restore.clear()
+        if self._files:
+            self._files.__exit__(*args)
+            self._files = None
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(conf_mode_dir, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def measure(sandbox, memory, func, *args):
+    gc.collect()
+    commands = sandbox.commands
+    if memory:
+        tracemalloc.start()
+    start = perf_counter()
+    try:
+        result = func(*args)
+    finally:
+        duration = perf_counter() - start
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, {'time': round(duration, 6), 'peak_memory': peak,
+                    'commands': sandbox.commands - commands}
+
+def run_phases(sandbox, script, config_text, memory):
+    from vyos.config import Config
+    from vyos.configsource import ConfigSourceString
+
+    phases = {}
+    config, phases['load'] = measure(sandbox, memory, lambda: Config(
+        config_source=ConfigSourceString(session_config_text=config_text)))
+    c, phases['get_config'] = measure(sandbox, memory, script.get_config, config)
+    _, phases['verify'] = measure(sandbox, memory, script.verify, c)
+    _, phases['generate'] = measure(sandbox, memory, script.generate, c)
+    return phases
+
+def benchmark(scenario, size, repeat, memory):
+    from vyos import ConfigError
+
+    script_name, tagnode, generator, stubs = scenarios[scenario]
+    result = {'scenario': scenario, 'size': size, 'script': script_name}
+    try:
+        config_text = render_config(generator(size))
+    except ValueError as e:
+        result['error'] = str(e)
+        return result
+    result['config_bytes'] = len(config_text)
+
+    os.environ['VYOS_TAGNODE_VALUE'] = tagnode or ''
+    with Sandbox() as sandbox:
+        for module, name, value in stubs:
+            sandbox.stub(module, name, value)
+        script = load_script(script_name)
+        try:
+            # the fastest of all runs, memory is measured in a separate
+            # run as tracing slows down the code considerably
+            runs = [run_phases(sandbox, script, config_text, False) for _ in range(repeat)]
+            phases = {phase: min((run[phase] for run in runs), key=lambda p: p['time'])
+                      for phase in runs[0]}
+            if memory:
+                traced = run_phases(sandbox, script, config_text, True)
+                for phase, stats in traced.items():
+                    phases[phase]['peak_memory'] = stats['peak_memory']
+            result['phases'] = phases
+        except ConfigError as e:
+            result['error'] = str(e)
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark conf_mode scripts with synthetic configurations')
+    parser.add_argument('--scenario', nargs='+', choices=list(scenarios), default=list(scenarios),
+                        help='Scenarios to run (default: all)')
+    parser.add_argument('--size', nargs='+', type=int, default=[10, 100, 1000],
+                        help='Number of rules, VLANs, neighbors, peers or static mappings')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per size, the fastest is reported')
+    parser.add_argument('--no-memory', action='store_true', help='Do not measure the peak memory usage')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    try:
+        from vyos.xml_ref import load_reference
+        load_reference()
+    except (ImportError, ValueError) as e:
+        print(f'XML reference cache is not available ({e}), run "make interface_definitions"',
+              file=sys.stderr)
+        sys.exit(1)
+
+    results = []
+    for scenario in args.scenario:
+        for size in args.size:
+            result = benchmark(scenario, size, max(args.repeat, 1), not args.no_memory)
+            results.append(result)
+            summary = ', '.join(f'{phase} {stats["time"]:.3f}s'
+                                for phase, stats in result.get('phases', {}).items())
+            print(f'{scenario} {size}: {summary or result.get("error")}', file=sys.stderr)
+
+    output = json.dumps({
+        'python': platform.python_version(),
+        'results': results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
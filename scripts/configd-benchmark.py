@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Load generator for the vyos-configd ZMQ protocol. A commit is replayed the
+# way vyshim sends it (init, config strings, one node message per script)
+# against a standalone vyos-configd instance that runs stub conf_mode scripts,
+# so no router is needed:
+#
+#   PYTHONPATH=python/ scripts/configd-benchmark.py --synthetic 1000
+#
+# A real commit is recorded on a router by enabling the "configd" debug flag
+# (touch /tmp/vyos.configd.debug) and committing, the recording is written to
+# /run/vyos-configd-commit.json. It holds the complete config including
+# secrets and is readable by root only:
+#
+#   sudo cp /run/vyos-configd-commit.json . && sudo chown $USER vyos-configd-commit.json
+#   PYTHONPATH=python/ scripts/configd-benchmark.py --commit vyos-configd-commit.json
+#
+# The round trip times seen by the client are combined with the phase timing
+# reported by vyos-configd. The standalone instance needs libvyosconfig and
+# the XML reference cache ("make interface_definitions").
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from contextlib import nullcontext
+from statistics import mean
+from time import perf_counter
+
+import zmq
+
+configd_script = 'src/services/vyos-configd'
+
+# Response codes of vyos-configd
+RESPONSE_SUCCESS = 1
+RESPONSE_PASS = 8
+
+stub_script = """\
+# stub conf_mode script generated by scripts/configd-benchmark.py
+def get_config(config=None):
+    return None
+
+def verify(c):
+    pass
+
+def generate(c):
+    pass
+
+def apply(c):
+    pass
+"""
+
+def script_name(data: str) -> str:
+    """ Name of the conf_mode script of a node message, as vyos-configd parses it """
+    res = re.match(r'^(VYOS_TAGNODE_VALUE=[^/]+)?.*\/([^/]+).py(.*)', data)
+    return res.group(2) if res else None
+
+def synthetic_commit(size: int) -> dict:
+    """ A commit adding size dummy interfaces, each one calls its script """
+    session = 'interfaces {\n'
+    for i in range(size):
+        session += f'    dummy dum{i} {{\n'
+        session += f'        address 10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/32\n'
+        session += f'        description "dummy {i}"\n'
+        session += '    }\n'
+    session += '}\n'
+    nodes = [{'data': f'VYOS_TAGNODE_VALUE=dum{i} /usr/libexec/vyos/conf_mode/interfaces_dummy.py',
+              'last': i == size - 1} for i in range(size)]
+    return {'active': '', 'session': session, 'sudo_user': 'vyos', 'nodes': nodes}
+
+def load_commit(file_name: str) -> dict:
+    with open(file_name) as f:
+        commit = json.load(f)
+    if not commit.get('nodes'):
+        raise ValueError(f'{file_name} holds no node messages')
+    # the last message triggers the FRR rendering and the commit statistics
+    for node in commit['nodes']:
+        node['last'] = False
+    commit['nodes'][-1]['last'] = True
+    return commit
+
+class Standalone:
+    """ vyos-configd in standalone mode with stub scripts in a temporary directory """
+    def __init__(self, scripts: set):
+        self.dir = tempfile.mkdtemp(prefix='configd-benchmark-')
+        conf_mode = os.path.join(self.dir, 'conf_mode')
+        os.mkdir(conf_mode)
+        for name in scripts:
+            with open(os.path.join(conf_mode, f'{name}.py'), 'w') as f:
+                f.write(stub_script)
+        with open(os.path.join(self.dir, 'configd-include.json'), 'w') as f:
+            json.dump(sorted(f'{name}.py' for name in scripts), f)
+
+        self.socket = f'ipc://{self.dir}/vyos-configd.sock'
+        self.stats_file = os.path.join(self.dir, 'commit-stats.json')
+        self.log_file = os.path.join(self.dir, 'vyos-configd.log')
+        self.process = None
+
+    def __enter__(self):
+        env = dict(os.environ, VYOS_CONFIGD_STANDALONE=self.dir)
+        with open(self.log_file, 'w') as log:
+            self.process = subprocess.Popen([sys.executable, configd_script],
+                                            env=env, stdout=log, stderr=log)
+        return self
+
+    def __exit__(self, *args):
+        if self.process:
+            self.process.kill()
+            self.process.wait()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def check(self):
+        if self.process and self.process.poll() is not None:
+            with open(self.log_file) as f:
+                log = f.read()[-2000:]
+            raise RuntimeError(f'vyos-configd exited with {self.process.returncode}:\n{log}')
+
+class Client:
+    """ Client side of the vyos-configd protocol, as implemented by vyshim """
+    def __init__(self, socket_path: str, timeout: float, check=None):
+        self.context = zmq.Context()
+        self.socket = self.context.socket(zmq.REQ)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.connect(socket_path)
+        self.poller = zmq.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
+        self.timeout = timeout
+        self.check = check
+
+    def close(self):
+        self.socket.close()
+        self.context.term()
+
+    def _wait(self):
+        waited = 0.0
+        while not self.poller.poll(100):
+            waited += 0.1
+            if self.check:
+                self.check()
+            if waited >= self.timeout:
+                raise TimeoutError('No reply from vyos-configd')
+
+    def request(self, msg: str) -> bytes:
+        self.socket.send(msg.encode())
+        self._wait()
+        return self.socket.recv()
+
+    def node(self, data: str, last: bool) -> tuple[int, str]:
+        self.socket.send(json.dumps({'type': 'node', 'data': data, 'last': last}).encode())
+        self._wait()
+        err, _, msg = self.socket.recv_multipart()
+        return err[0], msg.decode(errors='replace')
+
+    def commit(self, commit: dict, samples: dict):
+        """ Replay a commit, the client round trip times are added to samples """
+        start = perf_counter()
+        self.request(json.dumps({'type': 'init'}))
+        for msg in (commit['active'], commit['session'], str(os.getpid()),
+                    commit.get('sudo_user', ''), '', ''):
+            self.request(msg)
+        samples['init_transfer'].append(perf_counter() - start)
+
+        # vyos-configd parses the config after its last init reply, this
+        # delays the reply to the first node message
+        phase = 'first_node'
+        for node in commit['nodes']:
+            sent = perf_counter()
+            err, msg = self.node(node['data'], node['last'])
+            samples[phase].append(perf_counter() - sent)
+            phase = 'dispatch'
+            if err not in (RESPONSE_SUCCESS, RESPONSE_PASS):
+                raise RuntimeError(f'{node["data"]} failed ({err}): {msg.strip()}')
+        samples['commit'].append(perf_counter() - start)
+
+    def sync(self):
+        """
+        The FRR rendering and the commit statistics follow the reply to the
+        last node message, the reply to the next init proves them complete.
+        """
+        self.request(json.dumps({'type': 'init'}))
+
+def modified(file_name: str) -> int:
+    try:
+        return os.stat(file_name).st_mtime_ns
+    except OSError:
+        return None
+
+def add_server_samples(stats_file: str, previous: int, samples: dict):
+    """ Add the phase timing of vyos-configd, if it wrote new statistics """
+    if modified(stats_file) in (None, previous):
+        return
+    try:
+        with open(stats_file) as f:
+            timing = json.load(f).get('timing', {})
+    except (OSError, ValueError):
+        return
+    for phase in ('parse', 'commit_scripts', 'frr_render'):
+        if timing.get(phase) is not None:
+            samples[phase].append(timing[phase])
+    for script in timing.get('scripts', []):
+        samples['script'].append(script['duration'])
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def summary(values: list) -> dict:
+    return {
+        'count': len(values),
+        'min': min(values),
+        'mean': mean(values),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+def histogram(values: list) -> list:
+    """ Counts per power of two bucket, as (upper bound in seconds, count) """
+    buckets = {}
+    for value in values:
+        bound = 1e-6
+        while bound < value:
+            bound *= 2
+        buckets[bound] = buckets.get(bound, 0) + 1
+    return sorted(buckets.items())
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.0f}us'
+    if seconds < 1:
+        return f'{seconds * 1e3:.2f}ms'
+    return f'{seconds:.3f}s'
+
+def print_histogram(phase: str, values: list, width: int = 40):
+    stats = summary(values)
+    print(f'{phase}: n={stats["count"]} min {format_time(stats["min"])} '
+          f'p50 {format_time(stats["p50"])} p90 {format_time(stats["p90"])} '
+          f'p99 {format_time(stats["p99"])} max {format_time(stats["max"])}',
+          file=sys.stderr)
+    buckets = histogram(values)
+    largest = max(count for _, count in buckets)
+    for bound, count in buckets:
+        bar = '#' * max(1, round(count * width / largest))
+        print(f'  <= {format_time(bound):>8} {bar:<{width}} {count}', file=sys.stderr)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay commits against vyos-configd and report latencies')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--commit', help='Commit recorded by vyos-configd with the "configd" debug flag')
+    source.add_argument('--synthetic', type=int, metavar='SIZE',
+                        help='Commit adding SIZE dummy interfaces')
+    parser.add_argument('--iterations', type=int, default=10, help='Number of commits to replay')
+    parser.add_argument('--warmup', type=int, default=1, help='Commits to replay before measuring')
+    parser.add_argument('--socket', help='Use a running vyos-configd instead of a standalone one')
+    parser.add_argument('--stats-file', default='/run/vyos-commit-stats.json',
+                        help='Commit statistics of the running vyos-configd (with --socket)')
+    parser.add_argument('--timeout', type=float, default=60, help='Reply timeout in seconds')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    if args.commit:
+        commit = load_commit(args.commit)
+    else:
+        commit = synthetic_commit(max(args.synthetic, 1))
+
+    phases = ('init_transfer', 'parse', 'commit_scripts', 'first_node', 'dispatch',
+              'script', 'frr_render', 'commit')
+    samples = {phase: [] for phase in phases}
+    scripts = {script_name(node['data']) for node in commit['nodes']} - {None}
+
+    server = None if args.socket else Standalone(scripts)
+    try:
+        with server or nullcontext():
+            if server:
+                client = Client(server.socket, args.timeout, server.check)
+                stats_file = server.stats_file
+            else:
+                client = Client(args.socket, args.timeout)
+                stats_file = args.stats_file
+            try:
+                for _ in range(args.warmup):
+                    client.commit(commit, {phase: [] for phase in phases})
+                for _ in range(args.iterations):
+                    previous = modified(stats_file)
+                    client.commit(commit, samples)
+                    client.sync()
+                    add_server_samples(stats_file, previous, samples)
+            finally:
+                client.close()
+    except (RuntimeError, TimeoutError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    results = {}
+    for phase in phases:
+        if samples[phase]:
+            print_histogram(phase, samples[phase])
+            results[phase] = summary(samples[phase])
+            results[phase]['histogram'] = histogram(samples[phase])
+
+    output = json.dumps({
+        'python': platform.python_version(),
+        'commit': {
+            'active_bytes': len(commit['active']),
+            'session_bytes': len(commit['session']),
+            'nodes': len(commit['nodes']),
+            'scripts': len(scripts),
+        },
+        'iterations': args.iterations,
+        'phases': results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
@@ -95,8 +95,8 @@ def test_geoip(self):
         self.cli_commit()
 
         nftables_search = [
-            ['ip saddr @GEOIP_CC_name_smoketest_1', 'drop'],
-            ['ip saddr != @GEOIP_CC_name_smoketest_2', 'accept']
+            ['ip saddr @GEOIP_CC_gb_se', 'drop'],
+            ['ip saddr != @GEOIP_CC_de_fr', 'accept']
         ]
 
         # -t prevents 1000+ GeoIP elements being returned
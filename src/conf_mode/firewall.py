@@ -26,6 +26,10 @@
 from vyos.configverify import verify_interface_exists
 from vyos.ethtool import Ethtool
 from vyos.firewall import fqdn_config_parse
+from vyos.firewall import geoip_set_name
+from vyos.firewall import nested_group_types
+from vyos.firewall import resolve_firewall_groups
+from vyos.firewall import resolve_nested_groups
 from vyos.firewall import geoip_update
 from vyos.template import render
 from vyos.utils.dict import dict_search_args
@@ -60,11 +64,6 @@
     'ipv6_network_group'
 ]
 
-nested_group_types = [
-    'address_group', 'network_group', 'mac_group',
-    'port_group', 'ipv6_address_group', 'ipv6_network_group'
-]
-
 snmp_change_type = {
     'unknown': 0,
     'add': 1,
@@ -87,24 +86,27 @@ def geoip_updated(conf, firewall):
     }
     updated = False
 
+    # sets are shared by all rules matching the same countries
     for key, path in dict_search_recursive(firewall, 'geoip'):
-        set_name = f'GEOIP_CC_{path[1]}_{path[2]}_{path[4]}'
         if (path[0] == 'ipv4'):
-            out['name'].append(set_name)
+            set_name = geoip_set_name(key['country_code'])
+            if set_name not in out['name']:
+                out['name'].append(set_name)
         elif (path[0] == 'ipv6'):
-            set_name = f'GEOIP_CC6_{path[1]}_{path[2]}_{path[4]}'
-            out['ipv6_name'].append(set_name)
+            set_name = geoip_set_name(key['country_code'], ipv6=True)
+            if set_name not in out['ipv6_name']:
+                out['ipv6_name'].append(set_name)
 
         updated = True
 
     if 'delete' in node_diff:
         for key, path in dict_search_recursive(node_diff['delete'], 'geoip'):
-            set_name = f'GEOIP_CC_{path[1]}_{path[2]}_{path[4]}'
+            if 'country_code' not in key:
+                continue
             if (path[0] == 'ipv4'):
-                out['deleted_name'].append(set_name)
+                out['deleted_name'].append(geoip_set_name(key['country_code']))
             elif (path[0] == 'ipv6'):
-                set_name = f'GEOIP_CC_{path[1]}_{path[2]}_{path[4]}'
-                out['deleted_ipv6_name'].append(set_name)
+                out['deleted_ipv6_name'].append(geoip_set_name(key['country_code'], ipv6=True))
             updated = True
 
     if updated:
@@ -132,6 +134,8 @@ def get_config(config=None):
 
     firewall['geoip_updated'] = geoip_updated(conf, firewall)
 
+    resolve_firewall_groups(firewall.get('group'))
+
     fqdn_config_parse(firewall, 'firewall')
 
     if not os.path.exists(nftables_conf):
@@ -394,22 +398,6 @@ def verify_rule(firewall, family, hook, priority, rule_id, rule_conf):
                 if not group_obj:
                     Warning(f'interface-group "{group_name}" has no members!')
 
-def verify_nested_group(group_name, group, groups, seen):
-    if 'include' not in group:
-        return
-
-    seen.append(group_name)
-
-    for g in group['include']:
-        if g not in groups:
-            raise ConfigError(f'Nested group "{g}" does not exist')
-
-        if g in seen:
-            raise ConfigError(f'Group "{group_name}" has a circular reference')
-
-        if 'include' in groups[g]:
-            verify_nested_group(g, groups[g], groups, seen)
-
 def verify_hardware_offload(ifname):
     ethtool = Ethtool(ifname)
     enabled, fixed = ethtool.get_hw_tc_offload()
@@ -436,11 +424,12 @@ def verify(firewall):
                     verify_hardware_offload(ifname)
 
     if 'group' in firewall:
-        for group_type in nested_group_types:
+        for group_type, (key, _) in nested_group_types.items():
             if group_type in firewall['group']:
-                groups = firewall['group'][group_type]
-                for group_name, group in groups.items():
-                    verify_nested_group(group_name, group, groups, [])
+                try:
+                    resolve_nested_groups(firewall['group'][group_type], key)
+                except ValueError as e:
+                    raise ConfigError(e)
 
     for family in ['ipv4', 'ipv6', 'bridge']:
         if family in firewall:
@@ -34,6 +34,7 @@
 from vyos.utils.network import is_addr_assigned
 from vyos.utils.network import interface_exists
 from vyos.firewall import fqdn_config_parse
+from vyos.firewall import resolve_firewall_groups
 from vyos import ConfigError
 
 from vyos import airbag
@@ -76,6 +77,8 @@ def get_config(config=None):
     if 'dynamic_group' in nat['firewall_group']:
         del nat['firewall_group']['dynamic_group']
 
+    resolve_firewall_groups(nat['firewall_group'])
+
     fqdn_config_parse(nat, 'nat')
 
     return nat
@@ -20,6 +20,7 @@
 
 from vyos.base import Warning
 from vyos.config import Config
+from vyos.firewall import resolve_firewall_groups
 from vyos.configdep import set_dependents, call_dependents
 from vyos.template import render
 from vyos.utils.dict import dict_search
@@ -58,6 +59,8 @@ def get_config(config=None):
     if 'dynamic_group' in nat['firewall_group']:
         del nat['firewall_group']['dynamic_group']
 
+    resolve_firewall_groups(nat['firewall_group'])
+
     return nat
 
 def verify(nat):
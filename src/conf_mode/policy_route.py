@@ -21,6 +21,7 @@
 
 from vyos.base import Warning
 from vyos.config import Config
+from vyos.firewall import resolve_firewall_groups
 from vyos.template import render
 from vyos.utils.dict import dict_search_args
 from vyos.utils.process import cmd
@@ -60,6 +61,8 @@ def get_config(config=None):
     if 'dynamic_group' in policy['firewall_group']:
         del policy['firewall_group']['dynamic_group']
 
+    resolve_firewall_groups(policy['firewall_group'])
+
     return policy
 
 def verify_rule(policy, name, rule_conf, ipv6, rule_id):
@@ -20,6 +20,7 @@
 
 from vyos.base import Warning
 from vyos.config import Config
+from vyos.firewall import resolve_firewall_groups
 from vyos.configdep import set_dependents, call_dependents
 from vyos.utils.dict import dict_search
 from vyos.utils.dict import dict_search_args
@@ -98,6 +99,7 @@ def get_config(config=None):
     conntrack['firewall'] = conf.get_config_dict(['firewall'], key_mangling=('-', '_'),
                                                  get_first_key=True,
                                                  no_tag_node_value_mangle=True)
+    resolve_firewall_groups(conntrack['firewall'].get('group'))
 
     conntrack['ipv4_nat_action'] = 'accept' if conf.exists(['nat']) else 'return'
     conntrack['ipv6_nat_action'] = 'accept' if conf.exists(['nat66']) else 'return'
@@ -40,5 +40,6 @@ def get_config(config=None):
 
     firewall = get_config()
 
-    if not geoip_update(firewall, force=args.force):
+    # the sets hold the elements of the last update, only apply changes
+    if not geoip_update(firewall, force=args.force, incremental=True):
         sys.exit(1)
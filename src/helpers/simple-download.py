@@ -7,12 +7,13 @@
 parser = ArgumentParser()
 parser.add_argument('--local-file', help='local file', required=True)
 parser.add_argument('--remote-path', help='remote path', required=True)
+parser.add_argument('--sha256', help='expected SHA-256 digest of the file')
 
 args = parser.parse_args()
 
 try:
     download(args.local_file, args.remote_path,
-             check_space=True, raise_error=True)
+             check_space=True, raise_error=True, sha256=args.sha256)
 except Exception as e:
     print(e)
     sys.exit(1)
@@ -23,9 +23,11 @@
 import traceback
 from datetime import datetime
 
+from vyos.bootplan import boot_timeline_file
 from vyos.defaults import directories, config_status
 from vyos.configsession import ConfigSession, ConfigSessionError
 from vyos.configtree import ConfigTree
+from vyos.utils.file import read_json
 from vyos.utils.process import cmd
 
 STATUS_FILE = config_status
@@ -175,5 +177,10 @@ def failsafe(config_file_name):
                     ''.format(time_end_commit))
             f.write('Elapsed time for config commit: {0}\n'
                     ''.format(time_elapsed_commit))
+            timeline = read_json(boot_timeline_file, {})
+            if timeline:
+                f.write('Generate phases skipped: {0} of {1}, timeline: {2}\n'
+                        ''.format(timeline.get('generate_skipped', 0),
+                                  timeline.get('scripts', 0), boot_timeline_file))
     except Exception as e:
         print('{0}'.format(e))
@@ -22,10 +22,11 @@
 
 from vyos.config import Config
 from vyos.configtree import ConfigTree
+from vyos.configtree import DiffTree
+from vyos.load_config import LoadConfigError
+from vyos.load_config import set_commands
 from vyos.migrate import ConfigMigrate
 from vyos.migrate import ConfigMigrateError
-from vyos.utils.process import cmd
-from vyos.utils.process import DEVNULL
 
 if (len(sys.argv) < 2):
     print("Need config file name to merge.")
@@ -73,15 +74,6 @@
 effective_config = Config()
 effective_config_tree = effective_config._running_config
 
-effective_cmds = effective_config_tree.to_commands()
-merge_cmds = merge_config_tree.to_commands()
-
-effective_cmd_list = effective_cmds.splitlines()
-merge_cmd_list =  merge_cmds.splitlines()
-
-effective_cmd_set = set(effective_cmd_list)
-add_cmds = [ cmd for cmd in merge_cmd_list if cmd not in effective_cmd_set ]
-
 path = None
 if (len(sys.argv) > 2):
     path = sys.argv[2:]
@@ -93,14 +85,19 @@
     else:
         path = " ".join(path)
 
-if path:
-    add_cmds = [ cmd for cmd in add_cmds if path in cmd ]
-
-for add in add_cmds:
-    try:
-        cmd(f'/opt/vyatta/sbin/my_{add}', shell=True, stderr=DEVNULL)
-    except OSError as err:
-        print(err)
+def add_commands():
+    """ Set commands of the merge config not present in the effective config """
+    diff = DiffTree(effective_config_tree, merge_config_tree)
+    for chunk in diff.add.iter_commands():
+        for add in chunk:
+            if not path or path in add:
+                yield add
+
+# all commands are applied to the session config at once
+try:
+    set_commands(add_commands(), effective_config)
+except LoadConfigError as err:
+    print(err)
 
 if effective_config.session_changed():
     print("Merge complete. Use 'commit' to make changes effective.")
@@ -17,19 +17,31 @@
 #
 
 import os
+import gzip
 import json
 import requests
 import urllib3
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import monotonic
 from typing import Optional, List, Tuple, Dict, Any
 
 from vyos.config import Config
 from vyos.configtree import ConfigTree
 from vyos.configtree import mask_inclusive
 from vyos.template import bracketize_ipv6
+from vyos.utils.dict import dict_digest
+from vyos.utils.dict import dict_search_args
+from vyos.utils.dict import dict_merge_set
+from vyos.utils.dict import dict_to_delta_commands
 
 
 CONFIG_FILE = '/run/config_sync_conf.conf'
+# Last configuration successfully synchronized to each secondary, used as
+# the base for delta updates. Lost on reboot, which only means that the
+# first synchronization afterwards transfers the complete sections.
+STATE_DIR = '/run/config_sync'
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -38,29 +50,67 @@
 
 # API
 API_HEADERS = {'Content-Type': 'application/json'}
+# Request bodies larger than this are sent gzip compressed
+COMPRESS_MIN_SIZE = 1024
 
 
-def post_request(url: str,
-                 data: str,
-                 headers: Dict[str, str]) -> requests.Response:
-    """Sends a POST request to the specified URL
+class SecondarySession:
+    """HTTP API client for one secondary router
 
-    Args:
-        url (str): The URL to send the POST request to.
-        data (Dict[str, Any]): The data to send with the POST request.
-        headers (Dict[str, str]): The headers to include with the POST request.
-
-    Returns:
-        requests.Response: The response object representing the server's response to the request
+    All requests share one keep-alive connection. Large request bodies are
+    gzip compressed, unless the secondary turned out to be an older release
+    without support for it.
     """
+    def __init__(self, address: str, port: int, key: str, timeout: int):
+        self.address = address
+        self.key = key
+        self.timeout = timeout
+        self.base_url = f'https://{address}:{port}'
+        # cleared if the secondary does not know the digest operation
+        self.compress = True
+        self.bytes_sent = 0
+        self.session = requests.Session()
+        self.session.headers.update(API_HEADERS)
+        self.session.verify = False
+
+    def close(self):
+        self.session.close()
+
+    def post(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Sends a POST request to the API endpoint of the secondary
+
+        Args:
+            endpoint (str): The API endpoint, e.g. '/retrieve'.
+            data (Dict[str, Any]): The request data, the API key is added.
+
+        Returns:
+            Dict[str, Any]: The decoded response of the secondary.
+
+        Raises:
+            requests.exceptions.RequestException: if the request failed.
+        """
+        body = json.dumps({**data, 'key': self.key}).encode()
+        url = f'{self.base_url}{endpoint}'
+        if self.compress and len(body) >= COMPRESS_MIN_SIZE:
+            body = gzip.compress(body, compresslevel=6)
+            response = self.session.post(url,
+                                         data=body,
+                                         headers={'Content-Encoding': 'gzip'},
+                                         timeout=self.timeout)
+        else:
+            response = self.session.post(url, data=body, timeout=self.timeout)
+        self.bytes_sent += len(body)
+        return response.json()
 
-    response = requests.post(url,
-                             data=data,
-                             headers=headers,
-                             verify=False,
-                             timeout=timeout)
-    return response
-
+    def get_digest(self, section: List[str]) -> Optional[str]:
+        """Returns the digest of a config section on the secondary, or
+        False if the secondary can not provide it."""
+        response = self.post('/retrieve', {'op': 'digest', 'path': section})
+        if not response.get('success'):
+            # releases without digest support can not decompress either
+            self.compress = False
+            return False
+        return response.get('data')
 
 
 def retrieve_config(sections: List[list[str]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
@@ -88,83 +138,164 @@ def retrieve_config(sections: List[list[str]]) -> Tuple[Dict[str, Any], Dict[str
 
     return mask_dict, config_dict
 
-def set_remote_config(
-        address: str,
-        key: str,
-        op: str,
-        mask: Dict[str, Any],
-        config: Dict[str, Any],
-        port: int) -> Optional[Dict[str, Any]]:
-    """Loads the VyOS configuration in JSON format to a remote host.
+def section_mask(sections: List[list[str]]) -> Dict[str, Any]:
+    """Returns the mask dictionary for a list of sections"""
+    mask = {}
+    for section in sections:
+        node = mask
+        for item in section:
+            node = node.setdefault(item, {})
+    return mask
 
-    Args:
-        address (str): The address of the remote host.
-        key (str): The key to use for loading the configuration.
-        op (str): The operation to perform (set or load).
-        mask (dict): The dict of paths in sections.
-        config (dict): The dict of masked config data.
-        port (int): The remote API port
+def load_state(address: str) -> Dict[str, Any]:
+    state_file = Path(STATE_DIR) / f'{address}.json'
+    try:
+        return json.loads(state_file.read_text())
+    except (OSError, ValueError):
+        return {}
 
-    Returns:
-        Optional[Dict[str, Any]]: The response from the remote host as a
-        dictionary, or None if a RequestException occurred.
-    """
+def save_state(address: str, state: Dict[str, Any]):
+    state_dir = Path(STATE_DIR)
+    state_dir.mkdir(mode=0o700, exist_ok=True)
+    (state_dir / f'{address}.json').write_text(json.dumps(state))
 
-    headers = {'Content-Type': 'application/json'}
 
-    # Disable the InsecureRequestWarning
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+def is_section_revised(section: List[str]) -> bool:
+    from vyos.config_mgmt import is_node_revised
+    return is_node_revised(section)
+
+
+def sync_secondary(secondary: SecondarySession,
+                   sections: List[list[str]],
+                   mode: str,
+                   config_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Synchronizes the sections to one secondary router
 
-    url = f'https://{address}:{port}/configure-section'
-    data = json.dumps({
-        'op': op,
-        'mask': mask,
-        'config': config,
-        'key': key
-    })
+    The digest of every section on the secondary is compared with the local
+    one first and sections already in sync are skipped. If the secondary
+    still has the configuration of the last synchronization, only the set
+    and delete commands for the changes since then are sent. Otherwise the
+    changed sections are transferred completely.
 
+    Mode "set" never removes anything from the secondary. The base saved for
+    the next synchronization is the configuration the secondary holds
+    afterwards, sections with unknown content on the secondary get none.
+
+    Returns:
+        Optional[Dict[str, Any]]: The response of the secondary, or None if
+        nothing had to be changed or a RequestException occurred.
+    """
+    start = monotonic()
+    state = load_state(secondary.address)
+    full = []
+    delta_sections = []
+    commands = []
+    # configuration of every section on the secondary after the update
+    synced = {}
     try:
-        config = post_request(url, data, headers)
-        return config.json()
+        for section in sections:
+            key = ' '.join(section)
+            local = dict_search_args(config_dict, *section)
+            remote_digest = secondary.get_digest(section)
+            if remote_digest == dict_digest(local):
+                logger.debug(f'Section "{key}" is in sync on {secondary.address}')
+                synced[key] = local
+                continue
+
+            base = state.get(key)
+            remote_is_base = (base is not None and remote_digest is not False
+                              and remote_digest == dict_digest(base))
+            if mode != 'set':
+                synced[key] = local
+            elif remote_is_base:
+                synced[key] = dict_merge_set(base, local or {})
+
+            if local is None or not remote_is_base:
+                full.append(section)
+                continue
+
+            delta = dict_to_delta_commands(base, local, section)
+            if mode == 'set':
+                # mode "set" merges into the secondary config and never
+                # removes anything
+                delta = [c for c in delta if c['op'] == 'set']
+            commands.extend(delta)
+            delta_sections.append(section)
+
+        response = None
+        if full:
+            # Transfer everything that changed with the complete sections
+            # in a single commit on the secondary
+            full.extend(delta_sections)
+            masked = {}
+            for section in full:
+                value = dict_search_args(config_dict, *section)
+                if value is not None:
+                    node = masked
+                    for item in section[:-1]:
+                        node = node.setdefault(item, {})
+                    node[section[-1]] = value
+            logger.info(f'Secondary {secondary.address}: transferring sections '
+                        f'{[" ".join(s) for s in full]}')
+            response = secondary.post('/configure-section', {
+                'op': mode,
+                'mask': section_mask(full),
+                'config': masked,
+            })
+        elif commands:
+            logger.info(f'Secondary {secondary.address}: sending {len(commands)} changes')
+            response = secondary.post('/configure', {'commands': commands})
     except requests.exceptions.RequestException as e:
         print(f"An error occurred: {e}")
         logger.error(f"An error occurred: {e}")
         return None
 
+    if response is None or response.get('success'):
+        save_state(secondary.address, synced)
+    else:
+        logger.error(f'Secondary {secondary.address}: {response.get("error")}')
 
-def is_section_revised(section: List[str]) -> bool:
-    from vyos.config_mgmt import is_node_revised
-    return is_node_revised(section)
+    logger.info(f'Secondary {secondary.address}: synchronized in '
+                f'{monotonic() - start:.2f}s, {secondary.bytes_sent} bytes sent')
+    return response
 
 
-def config_sync(secondary_address: str,
+def config_sync(secondary_addresses: List[str],
                 secondary_key: str,
                 sections: List[list[str]],
                 mode: str,
-                secondary_port: int):
+                secondary_port: int,
+                timeout: int):
     """Retrieve a config section from primary router in JSON format and send it to
-       secondary router
+       secondary routers
     """
     if not any(map(is_section_revised, sections)):
         return
 
     logger.info(
-        f"Config synchronization: Mode={mode}, Secondary={secondary_address}"
+        f"Config synchronization: Mode={mode}, Secondary={', '.join(secondary_addresses)}"
     )
 
     # Sync sections ("nat", "firewall", etc)
-    mask_dict, config_dict = retrieve_config(sections)
+    _, config_dict = retrieve_config(sections)
     logger.debug(
         f"Retrieved config for sections '{sections}': {config_dict}")
 
-    set_config = set_remote_config(address=secondary_address,
-                                   key=secondary_key,
-                                   op=mode,
-                                   mask=mask_dict,
-                                   config=config_dict,
-                                   port=secondary_port)
+    # Disable the InsecureRequestWarning
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-    logger.debug(f"Set config for sections '{sections}': {set_config}")
+    secondaries = [SecondarySession(address, secondary_port, secondary_key, timeout)
+                   for address in secondary_addresses]
+    try:
+        with ThreadPoolExecutor(max_workers=len(secondaries)) as executor:
+            results = executor.map(
+                lambda secondary: sync_secondary(secondary, sections, mode, config_dict),
+                secondaries)
+            for secondary, set_config in zip(secondaries, results):
+                logger.debug(f"Set config for sections '{sections}' on {secondary.address}: {set_config}")
+    finally:
+        for secondary in secondaries:
+            secondary.close()
 
 
 if __name__ == '__main__':
@@ -179,14 +310,16 @@ def config_sync(secondary_address: str,
     config = json.loads(config_data)
 
     mode = config.get('mode')
-    secondary_address = config.get('secondary', {}).get('address')
-    secondary_address = bracketize_ipv6(secondary_address)
+    secondary_addresses = config.get('secondary', {}).get('address')
+    if isinstance(secondary_addresses, str):
+        secondary_addresses = [secondary_addresses]
+    secondary_addresses = [bracketize_ipv6(address) for address in secondary_addresses or []]
     secondary_key = config.get('secondary', {}).get('key')
     secondary_port = int(config.get('secondary', {}).get('port', 443))
     sections = config.get('section')
     timeout = int(config.get('secondary', {}).get('timeout'))
 
-    if not all([mode, secondary_address, secondary_key, sections]):
+    if not all([mode, secondary_addresses, secondary_key, sections]):
         logger.error("Missing required configuration data for config synchronization.")
         exit(0)
 
@@ -202,4 +335,4 @@ def config_sync(secondary_address: str,
         else:
             list_sections.append([section])
 
-    config_sync(secondary_address, secondary_key, list_sections, mode, secondary_port)
+    config_sync(secondary_addresses, secondary_key, list_sections, mode, secondary_port, timeout)
@@ -16,12 +16,12 @@
 #
 
 import sys
+import typing
 
 import vyos.accel_ppp
 import vyos.opmode
 
 from vyos.configquery import ConfigTreeQuery
-from vyos.utils.process import rc_cmd
 
 
 accel_dict = {
@@ -74,14 +74,18 @@ def _get_raw_statistics(accel_output, pattern, protocol):
     }
 
 
-def _get_raw_sessions(port):
-    cmd_options = 'show sessions ifname,username,ip,ip6,ip6-dp,type,rate-limit,' \
-                  'state,uptime-raw,calling-sid,called-sid,sid,comp,rx-bytes-raw,' \
-                  'tx-bytes-raw,rx-pkts,tx-pkts'
-    output = vyos.accel_ppp.accel_cmd(port, cmd_options)
-    parsed_data: list[dict[str, str]] = vyos.accel_ppp.accel_out_parse(
-        output.splitlines())
-    return parsed_data
+def _get_raw_sessions(port, username=None, limit=None):
+    columns = ['ifname', 'username', 'ip', 'ip6', 'ip6-dp', 'type', 'rate-limit',
+               'state', 'uptime-raw', 'calling-sid', 'called-sid', 'sid', 'comp',
+               'rx-bytes-raw', 'tx-bytes-raw', 'rx-pkts', 'tx-pkts']
+    match = ('username', username) if username else None
+    client = vyos.accel_ppp.get_client(port)
+    try:
+        return list(client.sessions(columns, match=match, limit=limit))
+    except ValueError as e:
+        raise vyos.opmode.IncorrectValue(str(e))
+    except OSError as e:
+        raise vyos.opmode.InternalError(f'Unable to query accel-ppp: {e}')
 
 
 def _verify(func):
@@ -122,7 +126,7 @@ def show_statistics(raw: bool, protocol: str):
     """
     pattern = f'{protocol}:'
     port = accel_dict[protocol]['port']
-    rc, output = rc_cmd(f'/usr/bin/accel-cmd -p {port} show stat')
+    output = vyos.accel_ppp.accel_cmd(port, 'show stat')
 
     if raw:
         return _get_raw_statistics(output, pattern, protocol)
@@ -131,18 +135,25 @@ def show_statistics(raw: bool, protocol: str):
 
 
 @_verify
-def show_sessions(raw: bool, protocol: str):
+def show_sessions(raw: bool, protocol: str, username: typing.Optional[str],
+                  limit: typing.Optional[int]):
     """show accel-cmd sessions
 
     protocol: ipoe/pppoe/ppptp/l2tp/sstp
+    username: only sessions with a username matching this regular expression
+    limit: maximum number of sessions (raw output only)
     """
     port = accel_dict[protocol]['port']
     if raw:
-        return _get_raw_sessions(port)
-
-    return vyos.accel_ppp.accel_cmd(port,
-                                    'show sessions ifname,username,ip,ip6,ip6-dp,'
-                                    'calling-sid,rate-limit,state,uptime,rx-bytes,tx-bytes')
+        return _get_raw_sessions(port, username=username, limit=limit)
+
+    command = 'show sessions ifname,username,ip,ip6,ip6-dp,' \
+              'calling-sid,rate-limit,state,uptime,rx-bytes,tx-bytes'
+    if username:
+        if not vyos.accel_ppp.session_match_re.match(username):
+            raise vyos.opmode.IncorrectValue(f'Invalid username match "{username}"')
+        command += f' match username {username}'
+    return vyos.accel_ppp.accel_cmd(port, command)
 
 
 if __name__ == '__main__':
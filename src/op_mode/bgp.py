@@ -80,6 +80,52 @@
 ArgFamily = typing.Literal['inet', 'inet6', 'l2vpn']
 ArgFamilyModifier = typing.Literal['unicast', 'labeled_unicast', 'multicast', 'vpn', 'flowspec']
 
+# Fields of a path and its nexthops returned by show --summary
+path_summary_fields = ['route_key', 'valid', 'bestpath', 'multipath', 'pathFrom',
+                       'network', 'metric', 'locPrf', 'weight', 'path', 'origin']
+nexthop_summary_fields = ['ip', 'afi', 'used']
+
+def _path_summary(path):
+    summary = {k: path[k] for k in path_summary_fields if k in path}
+    summary['nexthops'] = [{k: nh[k] for k in nexthop_summary_fields if k in nh}
+                           for nh in path.get('nexthops', [])]
+    return summary
+
+def _stream_paths(frr_command, vrf, prefix, longer_prefixes, limit, offset, summary):
+    """
+    Generator of the paths of a vtysh JSON BGP table, decoded one prefix at
+    a time while vtysh is still writing its output. limit and offset count
+    prefixes, all paths of a prefix are returned together.
+    """
+    from itertools import islice
+    from vyos.utils.process import cmd_json_stream
+
+    meta = {}
+    if prefix and not longer_prefixes:
+        # a single prefix is returned as {"prefix": ..., "paths": [...]}
+        def single_prefix():
+            members = cmd_json_stream(['vtysh', '-c', frr_command], ['paths'], meta)
+            paths = [path for _, path in members]
+            if paths:
+                yield meta.get('prefix', prefix), paths
+        prefixes = single_prefix()
+    else:
+        # "vrf all" nests the tables in one object per VRF
+        path = [None, 'routes'] if vrf == 'all' else ['routes']
+        members = cmd_json_stream(['vtysh', '-c', frr_command], path, meta)
+        prefixes = ((keys[-1], paths) for keys, paths in members)
+
+    found = False
+    stop = offset + limit if limit else None
+    for route_key, paths in islice(prefixes, offset, stop):
+        found = True
+        for path in paths:
+            path['route_key'] = route_key
+            yield _path_summary(path) if summary else path
+
+    if not found and not meta:
+        raise vyos.opmode.InternalError("FRR returned a BGP table with no routes field")
+
 def show_summary(raw: bool):
     from vyos.utils.process import cmd
 
@@ -116,32 +162,30 @@ def show(raw: bool,
          longer_prefixes: typing.Optional[bool],
          best_path: typing.Optional[bool],
          regex: typing.Optional[str],
-         vrf: typing.Optional[str]):
-    from vyos.utils.dict import dict_to_list
-
+         vrf: typing.Optional[str],
+         limit: typing.Optional[int],
+         offset: typing.Optional[int],
+         summary: typing.Optional[bool]):
     if (longer_prefixes or best_path) and (prefix is None):
         raise ValueError("longer_prefixes and best_path can only be used when prefix is given")
+    elif (limit is not None and limit < 1) or (offset is not None and offset < 0):
+        raise ValueError("limit must be positive and offset must not be negative")
+    elif (limit or offset or summary) and not raw:
+        raise ValueError("limit, offset and summary are only supported for raw output")
     elif (family == "l2vpn") and (family_modifier is not None):
         raise ValueError("l2vpn family does not accept any modifiers")
     else:
         kwargs = dict(locals())
 
         frr_command = frr_command_template.render(kwargs)
-        frr_command = re.sub(r'\s+', ' ', frr_command)
-
-        from vyos.utils.process import cmd
-        output = cmd(f"vtysh -c '{frr_command}'")
+        frr_command = re.sub(r'\s+', ' ', frr_command).strip()
 
         if raw:
-            from json import loads
-            d = loads(output)
-            if not ("routes" in d):
-                raise vyos.opmode.InternalError("FRR returned a BGP table with no routes field")
-            d = d["routes"]
-            routes = dict_to_list(d, save_key_to="route_key")
-            return routes
-        else:
-            return output
+            return _stream_paths(frr_command, vrf, prefix, longer_prefixes,
+                                 limit, offset or 0, summary)
+
+        from vyos.utils.process import cmd
+        return cmd(f"vtysh -c '{frr_command}'")
 
 if __name__ == '__main__':
     try:
@@ -14,59 +14,105 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import heapq
 import sys
 import typing
-import xmltodict
 
+from itertools import islice
 from tabulate import tabulate
-from vyos.utils.process import cmd
 
 import vyos.opmode
 
+from vyos.conntrack import ConntrackFilter
+from vyos.conntrack import get_statistics
+from vyos.conntrack import iter_flows
+from vyos.conntrack import raw_flow
+
 ArgFamily = typing.Literal['inet', 'inet6']
+ArgSortBy = typing.Literal['packets', 'bytes']
+
+def _get_counter(entry, counter):
+    """ Sum of a counter over both directions of a flow """
+    return entry['original'].get(counter, 0) + entry['reply'].get(counter, 0)
 
-def _get_xml_data(family):
+
+def _get_raw_data(conntrack_filter, sort_by=None, limit=None, offset=0):
     """
-    Get conntrack XML output
+    Stream the conntrack table and yield at most limit entries after
+    skipping the first offset ones. Unsorted entries are yielded during the
+    kernel dump, when sorting by a counter only the top offset + limit
+    entries are kept in memory.
+    Return: generator of dictionaries
     """
-    return cmd(f'sudo conntrack --dump --family {family} --output xml')
+    flows = iter_flows(conntrack_filter)
+    stop = offset + limit if limit is not None else None
+    if sort_by:
+        key = lambda entry: _get_counter(entry, sort_by)
+        if stop is not None:
+            entries = heapq.nlargest(stop, flows, key=key)
+        else:
+            entries = sorted(flows, key=key, reverse=True)
+        yield from entries[offset:stop]
+        return
+    try:
+        yield from islice(flows, offset, stop)
+    finally:
+        # stop the kernel dump early
+        flows.close()
 
 
-def _xml_to_dict(xml):
+def _get_raw_statistics():
     """
-    Convert XML to dictionary
-    Return: dictionary
+    Per CPU statistics in the layout of the split `conntrack --stats`
+    output, e.g. ['cpu=0', 'found=0', ...]
+    Return: list of lists
     """
-    parse = xmltodict.parse(xml, attr_prefix='')
-    # If only one conntrack entry we must change dict
-    if 'meta' in parse['conntrack']['flow']:
-        return dict(conntrack={'flow': [parse['conntrack']['flow']]})
-    return parse
+    return [[f'{key}={value}' for key, value in entry.items()]
+            for entry in get_statistics()]
+
 
+def _format_address(flow, address, port):
+    if address not in flow:
+        return ''
+    if port in flow:
+        return f'{flow[address]}:{flow[port]}'
+    return flow[address]
 
-def _get_raw_data(family):
+
+def get_formatted_output(entries, sort_by=None):
     """
-    Return: dictionary
+    :param entries: iterable of conntrack entries
+    :return: formatted output
     """
-    xml = _get_xml_data(family)
-    if len(xml) == 0:
-        output = {'conntrack':
-            {
-                'error': True,
-                'reason': 'entries not found'
-            }
-        }
-        return output
-    return _xml_to_dict(xml)
-
+    data_entries = []
+    for entry in entries:
+        original = entry['original']
+        reply = entry['reply']
+        # T6138 flowtable offload conntrack entries without 'timeout'
+        timeout = entry['timeout'] if entry['timeout'] is not None else 'n/a'
+        row = [entry['id'],
+               _format_address(original, 'src', 'sport'),
+               _format_address(original, 'dst', 'dport'),
+               _format_address(reply, 'src', 'sport'),
+               _format_address(reply, 'dst', 'dport'),
+               entry['protocol'],
+               entry['state'] or '',
+               timeout,
+               entry['mark'] if entry['mark'] is not None else '',
+               entry['zone'] if entry['zone'] is not None else '']
+        if sort_by:
+            row += [_get_counter(entry, 'packets'), _get_counter(entry, 'bytes')]
+        data_entries.append(row)
+
+    if not data_entries:
+        return 'Entries not found'
 
-def _get_raw_statistics():
-    entries = []
-    data = cmd('sudo conntrack --stats')
-    data = data.replace('  \t', '').split('\n')
-    for entry in data:
-        entries.append(entry.split())
-    return entries
+    headers = ["Id", "Original src", "Original dst", "Reply src", "Reply dst", "Protocol", "State", "Timeout", "Mark",
+               "Zone"]
+    if sort_by:
+        headers += ["Packets", "Bytes"]
+    output = tabulate(data_entries, headers, numalign="left")
+    return output
 
 
 def get_formatted_statistics(entries):
@@ -80,78 +126,45 @@ def get_formatted_statistics(entries):
         "Early drop",
         "Errors",
         "Search restart",
-        "",
-        "",
-    ]
-    # Process each entry to extract and format the values after '='
-    processed_entries = [
-        [value.split('=')[-1] for value in entry]
-        for entry in entries
+        "Clash resolve",
+        "Chain too long",
     ]
+    processed_entries = [[value.split('=')[-1] for value in entry]
+                         for entry in entries]
     output = tabulate(processed_entries, headers, numalign="left")
     return output
 
 
-def get_formatted_output(dict_data):
-    """
-    :param xml:
-    :return: formatted output
-    """
-    data_entries = []
-    if 'error' in dict_data['conntrack']:
-        return 'Entries not found'
-    for entry in dict_data['conntrack']['flow']:
-        orig_src, orig_dst, orig_sport, orig_dport = {}, {}, {}, {}
-        reply_src, reply_dst, reply_sport, reply_dport = {}, {}, {}, {}
-        proto = {}
-        for meta in entry['meta']:
-            direction = meta['direction']
-            if direction in ['original']:
-                if 'layer3' in meta:
-                    orig_src = meta['layer3']['src']
-                    orig_dst = meta['layer3']['dst']
-                if 'layer4' in meta:
-                    if meta.get('layer4').get('sport'):
-                        orig_sport = meta['layer4']['sport']
-                    if meta.get('layer4').get('dport'):
-                        orig_dport = meta['layer4']['dport']
-                    proto = meta['layer4']['protoname']
-            if direction in ['reply']:
-                if 'layer3' in meta:
-                    reply_src = meta['layer3']['src']
-                    reply_dst = meta['layer3']['dst']
-                if 'layer4' in meta:
-                    if meta.get('layer4').get('sport'):
-                        reply_sport = meta['layer4']['sport']
-                    if meta.get('layer4').get('dport'):
-                        reply_dport = meta['layer4']['dport']
-                    proto = meta['layer4']['protoname']
-            if direction == 'independent':
-                conn_id = meta['id']
-                # T6138 flowtable offload conntrack entries without 'timeout'
-                timeout = meta.get('timeout', 'n/a')
-                orig_src = f'{orig_src}:{orig_sport}' if orig_sport else orig_src
-                orig_dst = f'{orig_dst}:{orig_dport}' if orig_dport else orig_dst
-                reply_src = f'{reply_src}:{reply_sport}' if reply_sport else reply_src
-                reply_dst = f'{reply_dst}:{reply_dport}' if reply_dport else reply_dst
-                state = meta['state'] if 'state' in meta else ''
-                mark = meta['mark'] if 'mark' in meta else ''
-                zone = meta['zone'] if 'zone' in meta else ''
-                data_entries.append(
-                    [conn_id, orig_src, orig_dst, reply_src, reply_dst, proto, state, timeout, mark, zone])
-    headers = ["Id", "Original src", "Original dst", "Reply src", "Reply dst", "Protocol", "State", "Timeout", "Mark",
-               "Zone"]
-    output = tabulate(data_entries, headers, numalign="left")
-    return output
-
-
-def show(raw: bool, family: ArgFamily):
-    family = 'ipv6' if family == 'inet6' else 'ipv4'
-    conntrack_data = _get_raw_data(family)
+def show(raw: bool,
+         family: ArgFamily,
+         protocol: typing.Optional[str],
+         source: typing.Optional[str],
+         destination: typing.Optional[str],
+         source_port: typing.Optional[int],
+         destination_port: typing.Optional[int],
+         state: typing.Optional[str],
+         zone: typing.Optional[int],
+         mark: typing.Optional[int],
+         sort_by: typing.Optional[ArgSortBy],
+         limit: typing.Optional[int],
+         offset: typing.Optional[int]):
+    if (limit is not None and limit < 1) or (offset is not None and offset < 0):
+        raise vyos.opmode.IncorrectValue('Limit must be positive and offset must not be negative')
+    try:
+        conntrack_filter = ConntrackFilter(family=family, protocol=protocol,
+                                           source=source, destination=destination,
+                                           source_port=source_port,
+                                           destination_port=destination_port,
+                                           state=state, zone=zone, mark=mark)
+    except ValueError as e:
+        raise vyos.opmode.IncorrectValue(str(e))
+
+    conntrack_data = _get_raw_data(conntrack_filter, sort_by=sort_by,
+                                   limit=limit, offset=offset or 0)
     if raw:
-        return conntrack_data
+        return (raw_flow(entry) for entry in conntrack_data)
     else:
-        return get_formatted_output(conntrack_data)
+        return get_formatted_output(conntrack_data, sort_by=sort_by)
 
 
 def show_statistics(raw: bool):
@@ -31,8 +31,10 @@
 
 from vyos.kea import kea_get_active_config
 from vyos.kea import kea_get_dhcp_pools
-from vyos.kea import kea_get_leases
+from vyos.kea import kea_get_lease
+from vyos.kea import kea_get_server_lease_index
 from vyos.kea import kea_get_server_leases
+from vyos.kea import kea_get_subnet_pool_map
 from vyos.kea import kea_get_static_mappings
 from vyos.kea import kea_delete_lease
 from vyos.utils.process import call
@@ -84,13 +86,15 @@
 
 def _get_raw_server_leases(
     config, family='inet', pool=None, sorted=None, state=[], origin=None
-) -> list:
+):
     inet_suffix = '6' if family == 'inet6' else '4'
     pools = [pool] if pool else kea_get_dhcp_pools(config, inet_suffix)
 
+    # unsorted leases are streamed as they are retrieved from Kea
     mappings = kea_get_server_leases(config, inet_suffix, pools, state, origin)
 
     if sorted:
+        mappings = list(mappings)
         if sorted == 'ip':
             mappings.sort(key=lambda x: ip_address(x['ip']))
         else:
@@ -189,10 +193,18 @@ def _get_raw_server_pool_statistics(config, family='inet', pool=None):
     inet_suffix = '6' if family == 'inet6' else '4'
     pools = [pool] if pool else kea_get_dhcp_pools(config, inet_suffix)
 
+    # all leases are retrieved once and indexed by subnet id
+    lease_index = kea_get_server_lease_index(config, inet_suffix)
+    subnet_pools = kea_get_subnet_pool_map(config, inet_suffix)
+
     stats = []
     for p in pools:
         size = _get_pool_size(family=family, pool=p)
-        leases = len(_get_raw_server_leases(config, family=family, pool=p))
+        leases = sum(
+            len(addresses)
+            for subnet_id, addresses in lease_index.items()
+            if subnet_pools.get(subnet_id) == p
+        )
         use_percentage = round(leases / size * 100) if size != 0 else 0
         pool_stats = {
             'pool': p,
@@ -412,8 +424,7 @@ def show_server_static_mappings(
 
 
 def _lease_valid(inet, address):
-    leases = kea_get_leases(inet)
-    return any(lease['ip-address'] == address for lease in leases)
+    return kea_get_lease(inet, address) is not None
 
 
 @_verify_server
@@ -16,13 +16,18 @@
 
 import sys
 import argparse
+import heapq
 import re
 import ipaddress
 import os.path
 
+from subprocess import Popen
+from subprocess import PIPE
+from subprocess import DEVNULL
 from tabulate import tabulate
 from json import loads
 from vyos.utils.commit import commit_in_progress
+from vyos.utils.network import interface_index_map
 from vyos.utils.process import cmd
 from vyos.utils.process import run
 from vyos.logger import syslog
@@ -31,6 +36,22 @@
 uacctd_pidfile = '/var/run/uacctd.pid'
 uacctd_pipefile = '/tmp/uacctd.pipe'
 
+# counters flows can be sorted by
+sort_keys = ['bytes', 'packets', 'flows']
+# flow attributes flows can be aggregated by
+aggregate_keys = {
+    'interface': 'iface_in_name',
+    'source-address': 'ip_src',
+    'destination-address': 'ip_dst',
+    'source-port': 'port_src',
+    'destination-port': 'port_dst',
+    'protocol': 'ip_proto',
+}
+# distinct keys aggregated separately, the counters of flows with further
+# keys are added to a single "other" entry to bound the memory used
+aggregate_max_keys = 100000
+aggregate_other_key = 'other'
+
 def parse_port(port):
     try:
         port_num = int(port)
@@ -74,88 +95,120 @@ def _uacctd_running():
     return run(command) == 0
 
 
-# get list of interfaces
-def _get_ifaces_dict():
-    # run command to get ifaces list
-    out = cmd('/bin/ip link show')
-
-    # read output
-    ifaces_out = out.splitlines()
-
-    # make a dictionary with interfaces and indexes
-    ifaces_dict = {}
-    regex_filter = re.compile(r'^(?P<iface_index>\d+):\ (?P<iface_name>[\w\d\.]+)[:@].*$')
-    for iface_line in ifaces_out:
-        if regex_filter.search(iface_line):
-            ifaces_dict[int(regex_filter.search(iface_line).group('iface_index'))] = regex_filter.search(iface_line).group('iface_name')
-
-    # return dictioanry
-    return ifaces_dict
+# get flows one by one while pmacct is still producing its output
+def _get_flows(ifaces, sort_by='flows', limit=None):
+    # let pmacct sort the in-memory table and - if no filters are applied in
+    # here - also only return the requested number of flows
+    sort_spec = f'{sort_by},{limit}' if limit else sort_by
+    command = ['/usr/bin/pmacct', '-s', '-O', 'json', '-T', sort_spec, '-p', uacctd_pipefile]
 
-
-# get list of flows
-def _get_flows_list():
-    # run command to get flows list
-    out = cmd(f'/usr/bin/pmacct -s -O json -T flows -p {uacctd_pipefile}',
-              message='Failed to get flows list')
-
-    # read output
-    flows_out = out.splitlines()
-
-    # make a list with flows
-    flows_list = []
-    for flow_line in flows_out:
+    with Popen(command, stdout=PIPE, stderr=DEVNULL, text=True) as proc:
         try:
-            flows_list.append(loads(flow_line))
-        except Exception as err:
-            syslog.error('Unable to read flow info: {}'.format(err))
-
-    # return list of flows
-    return flows_list
+            for flow_line in proc.stdout:
+                try:
+                    flow = loads(flow_line)
+                except Exception as err:
+                    syslog.error('Unable to read flow info: {}'.format(err))
+                    continue
+                # add interface names to flows
+                flow['iface_in_name'] = ifaces.get(flow.get('iface_in'), 'unknown')
+                yield flow
+        finally:
+            # consumer may stop early, no need to read the rest of the table
+            if proc.poll() is None:
+                proc.kill()
+
+    if proc.returncode not in [0, -9]:
+        raise OSError('Failed to get flows list')
+
+
+def _port_match(port, ports):
+    # flows of protocols without ports, like ICMP
+    if port is None:
+        return False
+    if ports['type'] == 'single':
+        return port == ports['value']
+    if ports['type'] == 'range':
+        return ports['value'][0] <= port <= ports['value'][1]
+    return port in ports['value']
+
+
+# check if flow matches the filters given on the command line
+def _flow_match(flow):
+    # filter by interface
+    if cmd_args.interface:
+        if flow['iface_in_name'] != cmd_args.interface:
+            return False
+    # filter by host
+    if cmd_args.host:
+        if flow.get('ip_src') != cmd_args.host and flow.get('ip_dst') != cmd_args.host:
+            return False
+    # filter by ports
+    if cmd_args.ports:
+        if not _port_match(flow.get('port_src'), cmd_args.ports) and \
+           not _port_match(flow.get('port_dst'), cmd_args.ports):
+            return False
+    return True
 
 
 # filter and format flows
-def _flows_filter(flows, ifaces):
-    # predefine filtered flows list
-    flows_filtered = []
+def _flows_filter(flows):
+    filtered = (flow for flow in flows if _flow_match(flow))
 
-    # add interface names to flows
-    for flow in flows:
-        if flow['iface_in'] in ifaces:
-            flow['iface_in_name'] = ifaces[flow['iface_in']]
-        else:
-            flow['iface_in_name'] = 'unknown'
+    # sorted top N flows, only N flows are kept at any time in a heap
+    if cmd_args.sort_by and cmd_args.top:
+        sort_by = cmd_args.sort_by
+        return heapq.nlargest(cmd_args.top, filtered, key=lambda f: f.get(sort_by, 0))
 
-    # iterate through flows list
-    for flow in flows:
-        # filter by interface
-        if cmd_args.interface:
-            if flow['iface_in_name'] != cmd_args.interface:
-                continue
-        # filter by host
-        if cmd_args.host:
-            if flow['ip_src'] != cmd_args.host and flow['ip_dst'] != cmd_args.host:
-                continue
-        # filter by ports
-        if cmd_args.ports:
-            if cmd_args.ports['type'] == 'single':
-                if flow['port_src'] != cmd_args.ports['value'] and flow['port_dst'] != cmd_args.ports['value']:
-                    continue
-            else:
-                if flow['port_src'] not in cmd_args.ports['value'] and flow['port_dst'] not in cmd_args.ports['value']:
-                    continue
-        # add filtered flows to new list
+    # stop adding if we already reached top count
+    flows_filtered = []
+    for flow in filtered:
         flows_filtered.append(flow)
-
-        # stop adding if we already reached top count
-        if cmd_args.top:
-            if len(flows_filtered) == cmd_args.top:
-                break
+        if cmd_args.top and len(flows_filtered) == cmd_args.top:
+            break
 
     # return filtered flows
     return flows_filtered
 
 
+# aggregate counters of all flows sharing the same key, return top N keys
+def _flows_aggregate(flows, aggregate_by, sort_by):
+    key_name = aggregate_keys[aggregate_by]
+    aggregates = {}
+    for flow in flows:
+        if not _flow_match(flow):
+            continue
+        key = flow.get(key_name)
+        if key not in aggregates and len(aggregates) >= aggregate_max_keys:
+            key = aggregate_other_key
+        counters = aggregates.get(key)
+        if counters is None:
+            counters = aggregates[key] = {'key': key, 'packets': 0, 'flows': 0, 'bytes': 0}
+        for counter in sort_keys:
+            counters[counter] += flow.get(counter, 0)
+
+    if cmd_args.top:
+        return heapq.nlargest(cmd_args.top, aggregates.values(), key=lambda a: a[sort_by])
+    return sorted(aggregates.values(), key=lambda a: a[sort_by], reverse=True)
+
+
+# print aggregated counters table
+def _aggregates_table_print(aggregates, aggregate_by):
+    table_headers = [aggregate_by.upper(), 'PACKETS', 'FLOWS', 'BYTES']
+    table_body = [[a['key'], a['packets'], a['flows'], a['bytes']] for a in aggregates]
+    table = tabulate(table_body, table_headers, tablefmt="simple")
+    if any(a['key'] == aggregate_other_key for a in aggregates):
+        table += (f'\nOnly the first {aggregate_max_keys} keys are aggregated separately, '
+                  f'"{aggregate_other_key}" holds the counters of all further keys')
+
+    try:
+        print(table)
+    except IOError:
+        sys.exit(0)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
 # print flow table
 def _flows_table_print(flows):
     # define headers and body
@@ -205,6 +258,8 @@ def _check_imt():
 cmd_args_parser.add_argument('--host', type=str, required=False, help='host address for output filtering')
 cmd_args_parser.add_argument('--ports', type=str, required=False, help='port number, range or list for output filtering')
 cmd_args_parser.add_argument('--top', type=int, required=False, help='top records for output filtering')
+cmd_args_parser.add_argument('--sort-by', choices=sort_keys, required=False, help='sort flows by counter, highest first')
+cmd_args_parser.add_argument('--aggregate', choices=list(aggregate_keys), required=False, help='aggregate flow counters by key')
 # parse arguments
 cmd_args = cmd_args_parser.parse_args()
 
@@ -244,14 +299,23 @@ def _check_imt():
 if cmd_args.action == 'show':
     _check_imt()
     # get interfaces index and names
-    ifaces_dict = _get_ifaces_dict()
+    ifaces_dict = interface_index_map()
+
+    sort_by = cmd_args.sort_by or ('bytes' if cmd_args.aggregate else 'flows')
+    no_filter = not (cmd_args.interface or cmd_args.host or cmd_args.ports)
+    limit = cmd_args.top if no_filter and not cmd_args.aggregate else None
     # get flows
-    flows_list = _get_flows_list()
+    flows = _get_flows(ifaces_dict, sort_by=sort_by, limit=limit)
 
-    # filter and format flows
-    tabledata = _flows_filter(flows_list, ifaces_dict)
+    if cmd_args.aggregate:
+        # aggregate and print counters
+        aggregates = _flows_aggregate(flows, cmd_args.aggregate, sort_by)
+        _aggregates_table_print(aggregates, cmd_args.aggregate)
+    else:
+        # filter and format flows
+        tabledata = _flows_filter(flows)
 
-    # print flows
-    _flows_table_print(tabledata)
+        # print flows
+        _flows_table_print(tabledata)
 
 sys.exit(0)
@@ -16,6 +16,7 @@
 import os
 import argparse
 import glob
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from shutil import rmtree
@@ -23,6 +24,7 @@
 from socket import gethostname
 from sys import exit
 from tarfile import open as tar_open
+from time import monotonic
 from vyos.utils.process import rc_cmd
 from vyos.remote import upload
 
@@ -48,9 +50,9 @@ def __rotate_logs(path: str, log_pattern:str):
         os.remove(oldest_file)
 
 
-def __generate_archived_files(location_path: str) -> None:
+def __generate_archived_files(location_path: str):
     """
-    Generate arhives of main directories
+    Return the archives of main directories and a function generating one
     :param location_path: path to temporary directory
     :type location_path: str
     """
@@ -71,13 +73,28 @@ def __generate_archived_files(location_path: str) -> None:
         # New locations of arhives
         'tmp': 'tech-support-archive'
     }
-    for archive_name, path in archive_dict.items():
+    # Archives are generated in parallel, never include the files being
+    # written in the temporary directory
+    tmp_dir_name = os.path.basename(location_path)
+
+    def generate_archive(archive_name: str, path: str) -> None:
         archive_file: str = f'{location_path}/{archive_name}.tar.gz'
         with tar_open(name=archive_file, mode='x:gz') as tar_file:
             if archive_name in archive_excludes:
-                tar_file.add(path, filter=lambda x: None if str(archive_excludes[archive_name]) in str(x.name) else x)
+                tar_file.add(path, filter=lambda x: None if str(archive_excludes[archive_name]) in str(x.name) or tmp_dir_name in str(x.name) else x)
             else:
-                tar_file.add(path)
+                tar_file.add(path, filter=lambda x: None if tmp_dir_name in str(x.name) else x)
+
+    return archive_dict, generate_archive
+
+
+def __timed(name: str, timings: dict, func, *args) -> None:
+    """Run func and record its run time in timings"""
+    start = monotonic()
+    try:
+        func(*args)
+    finally:
+        timings[name] = monotonic() - start
 
 
 def __generate_main_archive_file(archive_file: str, tmp_dir_path: str) -> None:
@@ -126,9 +143,20 @@ def __generate_main_archive_file(archive_file: str, tmp_dir_path: str) -> None:
     report_file.touch()
     try:
 
-        save_stdout(op('show tech-support report'), report_file)
-        # Generate included archives
-        __generate_archived_files(tmp_dir_path)
+        # The report and the included archives are independent of each
+        # other, generate them in parallel
+        timings = {}
+        archive_dict, generate_archive = __generate_archived_files(tmp_dir_path)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(__timed, 'report', timings, save_stdout,
+                                       op('show tech-support report'), report_file)]
+            for archive_name, path in archive_dict.items():
+                futures.append(executor.submit(__timed, archive_name, timings,
+                                               generate_archive, archive_name, path))
+            for future in futures:
+                future.result()
+        Path(f'{tmp_dir_path}/timings.txt').write_text(
+            ''.join(f'{name}: {duration:.2f}s\n' for name, duration in timings.items()))
 
         # Generate main archive
         __generate_main_archive_file(f'{tmp_path}/{archive_file_name}', tmp_dir_path)
@@ -100,6 +100,8 @@
 DIR_KERNEL_SRC: str = '/boot/'
 FILE_ROOTFS_SRC: str = '/usr/lib/live/mount/medium/live/filesystem.squashfs'
 ISO_DOWNLOAD_PATH: str = ''
+# the downloaded image matched the published SHA-256 checksum
+ISO_VERIFIED: bool = False
 
 external_download_script = '/usr/libexec/vyos/simple-download.py'
 external_latest_image_url_script = '/usr/libexec/vyos/latest-image-url.py'
@@ -529,18 +531,44 @@ def validate_signature(file_path: str, sign_type: str) -> None:
 
 def download_file(local_file: str, remote_path: str, vrf: str,
                   username: str, password: str,
-                  progressbar: bool = False, check_space: bool = False):
+                  progressbar: bool = False, check_space: bool = False,
+                  sha256: str = None):
     environ['REMOTE_USERNAME'] = username
     environ['REMOTE_PASSWORD'] = password
     if vrf is None:
         download(local_file, remote_path, progressbar=progressbar,
-                 check_space=check_space, raise_error=True)
+                 check_space=check_space, raise_error=True, sha256=sha256)
     else:
         remote_auth = f'REMOTE_USERNAME={username} REMOTE_PASSWORD={password}'
         vrf_cmd = f'ip vrf exec {vrf} {external_download_script} \
                     --local-file {local_file} --remote-path {remote_path}'
+        if sha256:
+            vrf_cmd += f' --sha256 {sha256}'
         cmd(vrf_cmd, auth=remote_auth)
 
+def fetch_checksum(local_file: str, remote_path: str, vrf: str,
+                   username: str, password: str) -> Union[str, None]:
+    """Fetch the published SHA-256 checksum of a remote file
+
+    The checksum is expected in "<remote_path>.sha256", either alone or in
+    the format of sha256sum(1).
+
+    Returns:
+        Union[str, None]: the digest, None if there is none
+    """
+    checksum_file = Path(f'{local_file}.sha256')
+    try:
+        download_file(str(checksum_file), f'{remote_path}.sha256', vrf,
+                      username, password)
+        digest = checksum_file.read_text().split(maxsplit=1)[0].lower()
+    except Exception:
+        return None
+    finally:
+        checksum_file.unlink(missing_ok=True)
+    if len(digest) != 64 or any(c not in '0123456789abcdef' for c in digest):
+        return None
+    return digest
+
 def image_fetch(image_path: str, vrf: str = None,
                 username: str = '', password: str = '',
                 no_prompt: bool = False) -> Path:
@@ -553,9 +581,10 @@ def image_fetch(image_path: str, vrf: str = None,
         Path: a path to a local file
     """
     import os.path
-    from uuid import uuid4
+    from hashlib import sha256
 
     global ISO_DOWNLOAD_PATH
+    global ISO_VERIFIED
 
     # Latest version gets url from configured "system update-check url"
     if image_path == 'latest':
@@ -572,11 +601,20 @@ def image_fetch(image_path: str, vrf: str = None,
     try:
         # check a type of path
         if urlparse(image_path).scheme:
-            # download an image
-            ISO_DOWNLOAD_PATH = os.path.join(os.path.expanduser("~"), '{0}.iso'.format(uuid4()))
+            # download an image, the file name depends on the URL only so
+            # an interrupted download is resumed by the next attempt
+            url_hash = sha256(image_path.encode()).hexdigest()[:16]
+            ISO_DOWNLOAD_PATH = os.path.join(os.path.expanduser("~"), f'vyos-{url_hash}.iso')
+            # the image is checked against the published checksum while
+            # it is downloaded, a corrupted image is rejected before mounting
+            checksum = fetch_checksum(ISO_DOWNLOAD_PATH, image_path, vrf,
+                                      username, password)
             download_file(ISO_DOWNLOAD_PATH, image_path, vrf,
                           username, password,
-                          progressbar=True, check_space=True)
+                          progressbar=True, check_space=True, sha256=checksum)
+            if checksum:
+                ISO_VERIFIED = True
+                print('Image checksum is valid')
 
             # download a signature
             sign_file = (False, '')
@@ -945,7 +983,8 @@ def add_image(image_path: str, vrf: str = None, username: str = '',
         if not Path(DIR_ISO_MOUNT).joinpath('sha256sum.txt').exists():
             cleanup()
             exit(MSG_ERR_IMPROPER_IMAGE)
-        if run(f'cd {DIR_ISO_MOUNT} && sha256sum --status -c sha256sum.txt'):
+        # the content of an image verified while downloading is intact
+        if not ISO_VERIFIED and run(f'cd {DIR_ISO_MOUNT} && sha256sum --status -c sha256sum.txt'):
             cleanup()
             exit('Image checksum verification failed.')
 
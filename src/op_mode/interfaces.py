@@ -28,6 +28,7 @@
 from vyos.ifconfig import Section
 from vyos.ifconfig import Interface
 from vyos.ifconfig import VRRP
+from vyos.ifconfig import Operational
 from vyos.utils.process import cmd
 from vyos.utils.process import rc_cmd
 from vyos.utils.process import call
@@ -47,42 +48,59 @@ def wrapped(*args, **kwargs):
 # re-typed from argparse args.
 # We include the function in a general form, however op-mode standard
 # functions will restrict to the CLI-allowed arg types, wrapped in Optional.
-def filtered_interfaces(ifnames: typing.Union[str, list],
-                        iftypes: typing.Union[str, list],
-                        vif: bool, vrrp: bool) -> Interface:
+def _filtered_ifnames(ifnames: typing.Union[str, list],
+                      iftypes: typing.Union[str, list],
+                      vif: bool, vrrp: bool) -> str:
     """
-    get all interfaces from the OS and return them; ifnames can be used to
-    filter which interfaces should be considered
-
-    ifnames: a list of interface names to consider, empty do not filter
-
-    return an instance of the Interface class
+    get the names of all interfaces from the OS and return them; same
+    filter semantics as filtered_interfaces() but no Interface instance
+    is created for any interface
     """
     if isinstance(ifnames, str):
         ifnames = [ifnames] if ifnames else []
     if isinstance(iftypes, list):
         for iftype in iftypes:
-            yield from filtered_interfaces(ifnames, iftype, vif, vrrp)
+            yield from _filtered_ifnames(ifnames, iftype, vif, vrrp)
+        return
+
+    # VRRP state is only retrieved once and not per interface
+    vrrp_interfaces = VRRP.active_interfaces() if vrrp else []
 
     for ifname in Section.interfaces(iftypes):
         # Bail out early if interface name not part of our search list
         if ifnames and ifname not in ifnames:
             continue
 
-        # As we are only "reading" from the interface - we must use the
-        # generic base class which exposes all the data via a common API
-        interface = Interface(ifname, create=False, debug=False)
-
         # VLAN interfaces have a '.' in their name by convention
         if vif and not '.' in ifname:
             continue
 
-        if vrrp:
-            vrrp_interfaces = VRRP.active_interfaces()
-            if ifname not in vrrp_interfaces:
-                continue
+        if vrrp and ifname not in vrrp_interfaces:
+            continue
+
+        yield ifname
+
+# The original implementation of filtered_interfaces has signature:
+# (ifnames: list, iftypes: typing.Union[str, list], vif: bool, vrrp: bool) -> intf: Interface:
+# Arg types allowed in CLI (ifnames: str, iftypes: str) were manually
+# re-typed from argparse args.
+# We include the function in a general form, however op-mode standard
+# functions will restrict to the CLI-allowed arg types, wrapped in Optional.
+def filtered_interfaces(ifnames: typing.Union[str, list],
+                        iftypes: typing.Union[str, list],
+                        vif: bool, vrrp: bool) -> Interface:
+    """
+    get all interfaces from the OS and return them; ifnames can be used to
+    filter which interfaces should be considered
+
+    ifnames: a list of interface names to consider, empty do not filter
 
-        yield interface
+    return an instance of the Interface class
+    """
+    for ifname in _filtered_ifnames(ifnames, iftypes, vif, vrrp):
+        # As we are only "reading" from the interface - we must use the
+        # generic base class which exposes all the data via a common API
+        yield Interface(ifname, create=False, debug=False)
 
 def _split_text(text, used=0):
     """
@@ -178,53 +196,118 @@ def _format_stats(stats, indent=4):
     p = ' '*indent
     return f'{p}' + s.replace('\n', f'\n{p}')
 
-def _get_raw_data(ifname: typing.Optional[str],
-                  iftype: typing.Optional[str],
-                  vif: bool, vrrp: bool) -> list:
-    if ifname is None:
-        ifname = ''
-    if iftype is None:
-        iftype = ''
-    ret =[]
-    for interface in filtered_interfaces(ifname, iftype, vif, vrrp):
-        res_intf = {}
-        cache = interface.operational.load_counters()
+# map iproute2 stats64 JSON keys to the sysfs counter names used by the
+# counter cache of vyos.ifconfig.operational
+_stats64_map = {
+    'rx_bytes': ('rx', 'bytes'),
+    'rx_packets': ('rx', 'packets'),
+    'rx_errors': ('rx', 'errors'),
+    'rx_dropped': ('rx', 'dropped'),
+    'rx_over_errors': ('rx', 'over_errors'),
+    'multicast': ('rx', 'multicast'),
+    'tx_bytes': ('tx', 'bytes'),
+    'tx_packets': ('tx', 'packets'),
+    'tx_errors': ('tx', 'errors'),
+    'tx_dropped': ('tx', 'dropped'),
+    'tx_carrier_errors': ('tx', 'carrier_errors'),
+    'collisions': ('tx', 'collisions'),
+}
+
+def _get_interfaces_data(ifname: typing.Optional[str],
+                         iftype: typing.Optional[str],
+                         vif: bool, vrrp: bool) -> list:
+    """
+    Bulk collector for all interface related op-mode commands
 
-        out = cmd(f'ip -json addr show {interface.ifname}')
-        res_intf_l = json.loads(out)
-        res_intf = res_intf_l[0]
+    Links, addresses and 64 bit statistics of all interfaces are retrieved
+    in a single netlink dump, tunnel6 parameters in a single tunnel dump.
+    Counters are joined with the cached baselines of the last "clear
+    interfaces counters" call.
 
-        if res_intf['link_type'] == 'tunnel6':
-            # Note that 'ip -6 tun show {interface.ifname}' is not json
-            # aware, so find in list
-            out = cmd('ip -json -6 tun show')
-            tunnel = json.loads(out)
-            res_intf['tunnel6'] = _find_intf_by_ifname(tunnel,
-                                                       interface.ifname)
-            if 'ip6_tnl_f_use_orig_tclass' in res_intf['tunnel6']:
-                res_intf['tunnel6']['tclass'] = 'inherit'
-                del res_intf['tunnel6']['ip6_tnl_f_use_orig_tclass']
+    Returns a list of (ifname, link, counters_last_clear, stats) tuples
+    in the order of filtered_interfaces()
+    """
+    ifnames = list(_filtered_ifnames(ifname, iftype, vif, vrrp))
+    if not ifnames:
+        return []
 
-        res_intf['counters_last_clear'] = int(cache.get('timestamp', 0))
+    dump_cmd = 'ip -json -stats -detail addr show'
+    if len(ifnames) == 1:
+        dump_cmd += f' dev {ifnames[0]}'
+    rc, out = rc_cmd(dump_cmd)
+    links = {link['ifname']: link for link in json.loads(out)} if rc == 0 else {}
 
-        res_intf['description'] = interface.get_alias()
+    tunnel6 = None
+    counters = Operational.load_all_counters()
 
-        stats = interface.operational.get_stats()
-        for k in list(stats):
-            stats[k] = _get_counter_val(cache[k], stats[k])
+    ret = []
+    for name in ifnames:
+        # interface vanished in between
+        if name not in links:
+            continue
 
-        res_intf['stats'] = stats
+        link = links[name]
+        if link.get('link_type') == 'tunnel6':
+            # Note that 'ip -6 tun show' is not json aware for a single
+            # interface, so retrieve all of them only once and find in list
+            if tunnel6 is None:
+                tunnel6 = json.loads(cmd('ip -json -6 tun show'))
+            link['tunnel6'] = _find_intf_by_ifname(tunnel6, name)
+            if 'ip6_tnl_f_use_orig_tclass' in link['tunnel6']:
+                link['tunnel6']['tclass'] = 'inherit'
+                del link['tunnel6']['ip6_tnl_f_use_orig_tclass']
+
+        cache = counters.get(name) or dict.fromkeys(_stats64_map, 0)
+        stats64 = link.pop('stats64', {})
+        stats = {}
+        for counter, (rtx, key) in _stats64_map.items():
+            value = stats64.get(rtx, {}).get(key, 0)
+            stats[counter] = _get_counter_val(cache[counter], value)
+
+        ret.append((name, link, int(cache.get('timestamp', 0)), stats))
 
-        ret.append(res_intf)
+    return ret
 
+def _get_link_addr(link: dict) -> list:
+    """ return IPv4 followed by IPv6 addresses in CIDR notation """
+    addr = []
+    for family in ['inet', 'inet6']:
+        for addr_info in link.get('addr_info', []):
+            if addr_info.get('family') == family:
+                addr.append(f'{addr_info["local"]}/{addr_info["prefixlen"]}')
+    return addr
+
+def _get_link_vrf(link: dict) -> str:
+    if link.get('linkinfo', {}).get('info_slave_kind') == 'vrf':
+        return link.get('master')
+    return None
+
+def _get_unhandled_pppoe(ifname: str, data: list) -> list:
     # find pppoe interfaces that are in a transitional/dead state
-    if ifname.startswith('pppoe') and not _find_intf_by_ifname(ret, ifname):
+    if ifname.startswith('pppoe') and not _find_intf_by_ifname(data, ifname):
         pppoe_intf = {}
         pppoe_intf['unhandled'] = None
         pppoe_intf['ifname'] = ifname
         pppoe_intf['state'] = _pppoe(ifname)
-        ret.append(pppoe_intf)
+        return [pppoe_intf]
+    return []
+
+def _get_raw_data(ifname: typing.Optional[str],
+                  iftype: typing.Optional[str],
+                  vif: bool, vrrp: bool) -> list:
+    if ifname is None:
+        ifname = ''
+    if iftype is None:
+        iftype = ''
+    ret =[]
+    for _, link, last_clear, stats in _get_interfaces_data(ifname, iftype, vif, vrrp):
+        res_intf = link
+        res_intf['counters_last_clear'] = last_clear
+        res_intf['description'] = link.get('ifalias', '')
+        res_intf['stats'] = stats
+        ret.append(res_intf)
 
+    ret.extend(_get_unhandled_pppoe(ifname, ret))
     return ret
 
 def _get_summary_data(ifname: typing.Optional[str],
@@ -240,28 +323,21 @@ def is_interface_has_mac(interface_name):
         interface_no_mac = ('tun', 'wg')
         return not any(interface_name.startswith(prefix) for prefix in interface_no_mac)
 
-    for interface in filtered_interfaces(ifname, iftype, vif, vrrp):
+    for name, link, _, _ in _get_interfaces_data(ifname, iftype, vif, vrrp):
         res_intf = {}
 
-        res_intf['ifname'] = interface.ifname
-        res_intf['oper_state'] = interface.operational.get_state()
-        res_intf['admin_state'] = interface.get_admin_state()
-        res_intf['addr'] = [_ for _ in interface.get_addr() if not _.startswith('fe80::')]
-        res_intf['description'] = interface.get_alias()
-        res_intf['mtu'] = interface.get_mtu()
-        res_intf['mac'] = interface.get_mac() if is_interface_has_mac(interface.ifname) else 'n/a'
-        res_intf['vrf'] = interface.get_vrf()
+        res_intf['ifname'] = name
+        res_intf['oper_state'] = link.get('operstate', 'unknown').lower()
+        res_intf['admin_state'] = 'up' if 'UP' in link.get('flags', []) else 'down'
+        res_intf['addr'] = [_ for _ in _get_link_addr(link) if not _.startswith('fe80::')]
+        res_intf['description'] = link.get('ifalias', '')
+        res_intf['mtu'] = link.get('mtu')
+        res_intf['mac'] = link.get('address') if is_interface_has_mac(name) else 'n/a'
+        res_intf['vrf'] = _get_link_vrf(link)
 
         ret.append(res_intf)
 
-    # find pppoe interfaces that are in a transitional/dead state
-    if ifname.startswith('pppoe') and not _find_intf_by_ifname(ret, ifname):
-        pppoe_intf = {}
-        pppoe_intf['unhandled'] = None
-        pppoe_intf['ifname'] = ifname
-        pppoe_intf['state'] = _pppoe(ifname)
-        ret.append(pppoe_intf)
-
+    ret.extend(_get_unhandled_pppoe(ifname, ret))
     return ret
 
 def _get_counter_data(ifname: typing.Optional[str],
@@ -272,42 +348,57 @@ def _get_counter_data(ifname: typing.Optional[str],
     if iftype is None:
         iftype = ''
     ret = []
-    for interface in filtered_interfaces(ifname, iftype, vif, vrrp):
+    for name, link, _, stats in _get_interfaces_data(ifname, iftype, vif, vrrp):
         res_intf = {}
 
-        oper = interface.operational.get_state()
+        oper = link.get('operstate', 'unknown').lower()
 
         if oper not in ('up','unknown'):
             continue
 
-        stats = interface.operational.get_stats()
-        cache = interface.operational.load_counters()
-        res_intf['ifname'] = interface.ifname
-        res_intf['rx_packets'] = _get_counter_val(cache['rx_packets'], stats['rx_packets'])
-        res_intf['rx_bytes'] = _get_counter_val(cache['rx_bytes'], stats['rx_bytes'])
-        res_intf['tx_packets'] = _get_counter_val(cache['tx_packets'], stats['tx_packets'])
-        res_intf['tx_bytes'] = _get_counter_val(cache['tx_bytes'], stats['tx_bytes'])
-        res_intf['rx_dropped'] = _get_counter_val(cache['rx_dropped'], stats['rx_dropped'])
-        res_intf['tx_dropped'] = _get_counter_val(cache['tx_dropped'], stats['tx_dropped'])
-        res_intf['rx_over_errors'] = _get_counter_val(cache['rx_over_errors'], stats['rx_over_errors'])
-        res_intf['tx_carrier_errors'] = _get_counter_val(cache['tx_carrier_errors'], stats['tx_carrier_errors'])
+        res_intf['ifname'] = name
+        for counter in ['rx_packets', 'rx_bytes', 'tx_packets', 'tx_bytes',
+                        'rx_dropped', 'tx_dropped', 'rx_over_errors',
+                        'tx_carrier_errors']:
+            res_intf[counter] = stats[counter]
 
         ret.append(res_intf)
 
     return ret
 
+def _get_text_data(ifname: typing.Optional[str]) -> dict:
+    """
+    return the "ip addr show" text output of all interfaces from a single
+    call, keyed by interface name
+    """
+    tmp = 'ip addr show'
+    if ifname:
+        tmp += f' dev {ifname}'
+    rc, out = rc_cmd(tmp)
+    if rc != 0:
+        return {}
+
+    ret = {}
+    for block in re.split(r'^\d+:\s+', out, flags=re.MULTILINE):
+        if not block:
+            continue
+        name = re.split(r'[@:]', block, maxsplit=1)[0]
+        ret[name] = block.rstrip('\n')
+    return ret
+
 @catch_broken_pipe
 def _format_show_data(data: list):
     unhandled = []
+    # instead of reformatting data, use non-json output from a single call
+    handled = [intf['ifname'] for intf in data if 'unhandled' not in intf]
+    text = _get_text_data(handled[0] if len(handled) == 1 else None)
     for intf in data:
         if 'unhandled' in intf:
             unhandled.append(intf)
             continue
-        # instead of reformatting data, call non-json output:
-        rc, out = rc_cmd(f"ip addr show {intf['ifname']}")
-        if rc != 0:
+        out = text.get(intf['ifname'])
+        if out is None:
             continue
-        out = re.sub('^\d+:\s+','',out)
         # add additional data already collected
         if 'tunnel6' in intf:
             t6_d = intf['tunnel6']
@@ -21,9 +21,7 @@
 from re import split as re_split
 from tabulate import tabulate
 
-from vyos.utils.convert import convert_data
 from vyos.utils.convert import seconds_to_human
-from vyos.utils.process import cmd
 from vyos.configquery import ConfigTreeQuery
 from vyos.base import Warning
 
@@ -39,15 +37,120 @@ def _alphanum_key(key):
     return [_convert(c) for c in re_split('([0-9]+)', str(key))]
 
 
-def _get_raw_data_sas():
+def _get_vici_snapshot(
+    ike: typing.Optional[str] = None, sas: bool = True, connections: bool = True
+) -> vyos.ipsec.ViciSnapshot:
     try:
-        get_sas = vyos.ipsec.get_vici_sas()
-        sas = convert_data(get_sas)
-        return sas
+        return vyos.ipsec.ViciSnapshot(ike=ike, sas=sas, connections=connections)
     except vyos.ipsec.ViciInitiateError as err:
         raise vyos.opmode.UnconfiguredSubsystem(err)
 
 
+def _get_raw_data_sas():
+    return _get_vici_snapshot(connections=False).sas
+
+
+def _get_swanctl_sa_output(name: str, sa: dict) -> str:
+    """
+    Format an IKE SA and its CHILD SAs the same way 'swanctl --list-sas'
+    does, but from the data already retrieved via VICI
+    :param name: IKE SA name
+    :type name: str
+    :param sa: IKE SA
+    :type sa: dict
+    :return: formatted string
+    :rtype: str
+    """
+
+    def _join(value):
+        return ' '.join(value) if isinstance(value, list) else value
+
+    initiator = 'initiator' in sa
+    lines = [
+        f'{name}: #{sa.get("uniqueid")}, {sa.get("state")}, IKEv{sa.get("version")}, '
+        f'{sa.get("initiator-spi")}_i{"*" if initiator else ""} '
+        f'{sa.get("responder-spi")}_r{"" if initiator else "*"}'
+    ]
+
+    local = f"  local  '{sa.get('local-id')}' @ {sa.get('local-host')}[{sa.get('local-port')}]"
+    if 'local-vips' in sa:
+        local += f' [{_join(sa["local-vips"])}]'
+    lines.append(local)
+
+    remote = f"  remote '{sa.get('remote-id')}' @ {sa.get('remote-host')}[{sa.get('remote-port')}]"
+    if 'remote-eap-id' in sa:
+        remote += f" EAP: '{sa['remote-eap-id']}'"
+    if 'remote-xauth-id' in sa:
+        remote += f" XAuth: '{sa['remote-xauth-id']}'"
+    if 'remote-vips' in sa:
+        remote += f' [{_join(sa["remote-vips"])}]'
+    lines.append(remote)
+
+    if 'encr-alg' in sa:
+        proposal = f'  {sa["encr-alg"]}'
+        proposal += f'-{sa["encr-keysize"]}' if 'encr-keysize' in sa else ''
+        proposal += f'/{sa["integ-alg"]}' if 'integ-alg' in sa else ''
+        proposal += f'-{sa["integ-keysize"]}' if 'integ-keysize' in sa else ''
+        proposal += f'/{sa.get("prf-alg")}/{sa.get("dh-group")}'
+        lines.append(proposal)
+
+    if 'established' in sa:
+        established = f'  established {sa["established"]}s ago'
+        if 'rekey-time' in sa:
+            established += f', rekeying in {sa["rekey-time"]}s'
+        if 'reauth-time' in sa:
+            established += f', reauth in {sa["reauth-time"]}s'
+        lines.append(established)
+
+    for child_sa in sa.get('child-sas', {}).values():
+        child = (
+            f'  {child_sa.get("name")}: #{child_sa.get("uniqueid")}, '
+            f'reqid {child_sa.get("reqid")}, {child_sa.get("state")}, '
+            f'{child_sa.get("mode")}{"-in-UDP" if "encap" in child_sa else ""}, '
+            f'{child_sa.get("protocol")}:'
+        )
+        algs = []
+        if 'encr-alg' in child_sa:
+            algs.append(child_sa['encr-alg'])
+            if 'encr-keysize' in child_sa:
+                algs[-1] += f'-{child_sa["encr-keysize"]}'
+        if 'integ-alg' in child_sa:
+            algs.append(child_sa['integ-alg'])
+            if 'integ-keysize' in child_sa:
+                algs[-1] += f'-{child_sa["integ-keysize"]}'
+        if 'prf-alg' in child_sa:
+            algs.append(child_sa['prf-alg'])
+        if 'dh-group' in child_sa:
+            algs.append(child_sa['dh-group'])
+        if child_sa.get('esn') == '1':
+            algs.append('ESN')
+        lines.append(child + '/'.join(algs))
+
+        installed = f'    installed {child_sa.get("install-time")}s ago'
+        if 'rekey-time' in child_sa:
+            installed += f', rekeying in {child_sa["rekey-time"]}s'
+        if 'life-time' in child_sa:
+            installed += f', expires in {child_sa["life-time"]}s'
+        lines.append(installed)
+
+        for direction, label in [('in', 'in '), ('out', 'out')]:
+            traffic = f'    {label} {child_sa.get(f"spi-{direction}")}'
+            if f'cpi-{direction}' in child_sa:
+                traffic += f'_{child_sa[f"cpi-{direction}"]}'
+            traffic += (
+                f', {child_sa.get(f"bytes-{direction}", 0):>6} bytes, '
+                f'{child_sa.get(f"packets-{direction}", 0):>5} packets'
+            )
+            if f'use-{direction}' in child_sa:
+                traffic += f', {child_sa[f"use-{direction}"]:>5}s ago'
+            lines.append(traffic)
+
+        lines.append(f'    local  {_join(child_sa.get("local-ts", ""))}')
+        lines.append(f'    remote {_join(child_sa.get("remote-ts", ""))}')
+
+    return '\n'.join(lines)
+
+
 def _get_output_swanctl_sas_from_list(ra_output_list: list) -> str:
     """
     Template for output for VICI
@@ -59,8 +162,8 @@ def _get_output_swanctl_sas_from_list(ra_output_list: list) -> str:
     """
     output = ''
     for sa_val in ra_output_list:
-        for sa in sa_val.values():
-            swanctl_output: str = cmd(f'sudo swanctl -l --ike-id {sa["uniqueid"]}')
+        for name, sa in sa_val.items():
+            swanctl_output = _get_swanctl_sa_output(name, sa)
         output = f'{output}{swanctl_output}\n\n'
     return output
 
@@ -161,41 +264,29 @@ def _get_formatted_output_sas(sas):
 # Connections block
 
 
-def _get_convert_data_connections():
-    try:
-        get_connections = vyos.ipsec.get_vici_connections()
-        connections = convert_data(get_connections)
-        return connections
-    except vyos.ipsec.ViciInitiateError as err:
-        raise vyos.opmode.UnconfiguredSubsystem(err)
-
-
-def _get_parent_sa_proposal(connection_name: str, data: list) -> dict:
+def _get_parent_sa_proposal(
+    connection_name: str, snapshot: vyos.ipsec.ViciSnapshot
+) -> dict:
     """Get parent SA proposals by connection name
     if connections not in the 'down' state
 
     Args:
         connection_name (str): Connection name
-        data (list): List of current SAs from vici
+        snapshot (ViciSnapshot): current SAs from vici
 
     Returns:
         str: Parent SA connection proposal
              AES_CBC/256/HMAC_SHA2_256_128/MODP_1024
     """
-    if not data:
-        return {}
-    for sa in data:
-        # check if parent SA exist
-        if connection_name not in sa.keys():
-            continue
-        if 'encr-alg' in sa[connection_name]:
-            encr_alg = sa.get(connection_name, '').get('encr-alg')
+    for sa in snapshot.get_sas(connection_name):
+        if 'encr-alg' in sa:
+            encr_alg = sa.get('encr-alg')
             cipher = encr_alg.split('_')[0]
             mode = encr_alg.split('_')[1]
-            encr_keysize = sa.get(connection_name, '').get('encr-keysize')
-            integ_alg = sa.get(connection_name, '').get('integ-alg')
-            # prf_alg = sa.get(connection_name, '').get('prf-alg')
-            dh_group = sa.get(connection_name, '').get('dh-group')
+            encr_keysize = sa.get('encr-keysize')
+            integ_alg = sa.get('integ-alg')
+            # prf_alg = sa.get('prf-alg')
+            dh_group = sa.get('dh-group')
             proposal = {
                 'cipher': cipher,
                 'mode': mode,
@@ -205,84 +296,68 @@ def _get_parent_sa_proposal(connection_name: str, data: list) -> dict:
             }
             return proposal
         return {}
+    return {}
 
 
-def _get_parent_sa_state(connection_name: str, data: list) -> str:
+def _get_parent_sa_state(
+    connection_name: str, snapshot: vyos.ipsec.ViciSnapshot
+) -> str:
     """Get parent SA state by connection name
 
     Args:
         connection_name (str): Connection name
-        data (list): List of current SAs from vici
+        snapshot (ViciSnapshot): current SAs from vici
 
     Returns:
         Parent SA connection state
     """
-    ike_state = 'down'
-    if not data:
-        return ike_state
-    for sa in data:
-        # check if parent SA exist
-        for connection, connection_conf in sa.items():
-            if connection_name != connection:
-                continue
-            if connection_conf['state'].lower() == 'established':
-                ike_state = 'up'
-    return ike_state
-
-
-def _get_child_sa_state(connection_name: str, tunnel_name: str, data: list) -> str:
+    for sa in snapshot.get_sas(connection_name):
+        if sa['state'].lower() == 'established':
+            return 'up'
+    return 'down'
+
+
+def _get_child_sa_state(
+    connection_name: str, tunnel_name: str, snapshot: vyos.ipsec.ViciSnapshot
+) -> str:
     """Get child SA state by connection and tunnel name
 
     Args:
         connection_name (str): Connection name
         tunnel_name (str): Tunnel name
-        data (list): List of current SAs from vici
+        snapshot (ViciSnapshot): current SAs from vici
 
     Returns:
         str: `up` if child SA state is 'installed' otherwise `down`
     """
-    child_sa = 'down'
-    if not data:
-        return child_sa
-    for sa in data:
-        # check if parent SA exist
-        if connection_name not in sa.keys():
-            continue
-        child_sas = sa[connection_name]['child-sas']
-        # Get all child SA states
-        # there can be multiple SAs per tunnel
-        child_sa_states = [
-            v['state'] for k, v in child_sas.items() if v['name'] == tunnel_name
-        ]
-        return 'up' if 'INSTALLED' in child_sa_states else child_sa
-
-
-def _get_child_sa_info(connection_name: str, tunnel_name: str, data: list) -> dict:
+    # there can be multiple SAs per tunnel
+    for child_sa in snapshot.get_child_sas(connection_name, tunnel_name):
+        if child_sa['state'] == 'INSTALLED':
+            return 'up'
+    return 'down'
+
+
+def _get_child_sa_info(
+    connection_name: str, tunnel_name: str, snapshot: vyos.ipsec.ViciSnapshot
+) -> dict:
     """Get child SA installed info by connection and tunnel name
 
     Args:
         connection_name (str): Connection name
         tunnel_name (str): Tunnel name
-        data (list): List of current SAs from vici
+        snapshot (ViciSnapshot): current SAs from vici
 
     Returns:
         dict: Info of the child SA in the dictionary format
     """
-    for sa in data:
-        # check if parent SA exist
-        if connection_name not in sa.keys():
-            continue
-        child_sas = sa[connection_name]['child-sas']
-        # Get all child SA data
-        # Skip temp SA name (first key), get only SA values as dict
-        # {'OFFICE-B-tunnel-0-46': {'name': 'OFFICE-B-tunnel-0'}...}
-        # i.e get all data after 'OFFICE-B-tunnel-0-46'
-        child_sa_info = [
-            v
-            for k, v in child_sas.items()
-            if 'name' in v and v['name'] == tunnel_name and v['state'] == 'INSTALLED'
-        ]
-        return child_sa_info[-1] if child_sa_info else {}
+    # Get the last installed child SA data
+    # {'OFFICE-B-tunnel-0-46': {'name': 'OFFICE-B-tunnel-0'}...}
+    child_sa_info = [
+        child_sa
+        for child_sa in snapshot.get_child_sas(connection_name, tunnel_name)
+        if child_sa['state'] == 'INSTALLED'
+    ]
+    return child_sa_info[-1] if child_sa_info else {}
 
 
 def _get_child_sa_proposal(child_sa_data: dict) -> dict:
@@ -304,38 +379,38 @@ def _get_child_sa_proposal(child_sa_data: dict) -> dict:
     return {}
 
 
-def _get_raw_data_connections(list_connections: list, list_sas: list) -> list:
+def _get_raw_data_connections(snapshot: vyos.ipsec.ViciSnapshot) -> list:
     """Get configured VPN IKE connections and IPsec states
 
     Args:
-        list_connections (list): List of configured connections from vici
-        list_sas (list): List of current SAs from vici
+        snapshot (ViciSnapshot): configured connections and current SAs
+                                 from vici
 
     Returns:
         list: List and status of IKE/IPsec connections/tunnels
     """
     base_dict = []
-    for connections in list_connections:
+    for connections in snapshot.connections:
         base_list = {}
         for connection, conn_conf in connections.items():
             base_list['ike_connection_name'] = connection
             base_list['ike_connection_state'] = _get_parent_sa_state(
-                connection, list_sas
+                connection, snapshot
             )
             base_list['ike_remote_address'] = conn_conf['remote_addrs']
-            base_list['ike_proposal'] = _get_parent_sa_proposal(connection, list_sas)
+            base_list['ike_proposal'] = _get_parent_sa_proposal(connection, snapshot)
             base_list['local_id'] = conn_conf.get('local-1', '').get('id')
             base_list['remote_id'] = conn_conf.get('remote-1', '').get('id')
             base_list['version'] = conn_conf.get('version', 'IKE')
             base_list['children'] = []
             children = conn_conf['children']
             for tunnel, tun_options in children.items():
-                state = _get_child_sa_state(connection, tunnel, list_sas)
+                state = _get_child_sa_state(connection, tunnel, snapshot)
                 local_ts = tun_options.get('local-ts')
                 remote_ts = tun_options.get('remote-ts')
                 dpd_action = tun_options.get('dpd_action')
                 close_action = tun_options.get('close_action')
-                sa_info = _get_child_sa_info(connection, tunnel, list_sas)
+                sa_info = _get_child_sa_info(connection, tunnel, snapshot)
                 esp_proposal = _get_child_sa_proposal(sa_info)
                 base_list['children'].append(
                     {
@@ -353,10 +428,10 @@ def _get_raw_data_connections(list_connections: list, list_sas: list) -> list:
     return base_dict
 
 
-def _get_raw_connections_summary(list_conn, list_sas):
+def _get_raw_connections_summary(snapshot):
     import jmespath
 
-    data = _get_raw_data_connections(list_conn, list_sas)
+    data = _get_raw_data_connections(snapshot)
     match = '[*].children[]'
     child = jmespath.search(match, data)
     tunnels_down = len([k for k in child if k['state'] == 'down'])
@@ -463,7 +538,7 @@ def _get_childsa_id_list(ike_sas: list) -> list:
     for ike in ike_sas:
         for ike_sa in ike.values():
             for child_sa in ike_sa['child-sas'].values():
-                list_childsa_id.append(child_sa['uniqueid'].decode('ascii'))
+                list_childsa_id.append(child_sa['uniqueid'])
     return list_childsa_id
 
 
@@ -492,11 +567,11 @@ def _get_con_childsa_name_list(
     return list_childsa_name
 
 
-def _get_all_sitetosite_peers_name_list() -> list:
+def _get_all_sitetosite_peers_config() -> dict:
     """
     Return site-to-site peers configuration
     :return: site-to-site peers configuration
-    :rtype: list
+    :rtype: dict
     """
     conf: ConfigTreeQuery = ConfigTreeQuery()
     config_path = ['vpn', 'ipsec', 'site-to-site', 'peer']
@@ -506,10 +581,7 @@ def _get_all_sitetosite_peers_name_list() -> list:
         get_first_key=True,
         no_tag_node_value_mangle=True,
     )
-    peers_list: list = []
-    for name in peers_config:
-        peers_list.append(name)
-    return peers_list
+    return peers_config
 
 
 def _get_tunnel_sw_format(peer: str, tunnel: str) -> str:
@@ -532,7 +604,9 @@ def _get_tunnel_sw_format(peer: str, tunnel: str) -> str:
 
 
 def _initiate_peer_with_childsas(
-    peer: str, tunnel: typing.Optional[str] = None
+    peer: str,
+    tunnel: typing.Optional[str] = None,
+    snapshot: typing.Optional[vyos.ipsec.ViciSnapshot] = None,
 ) -> None:
     """
     Initiate IPSEC peer SAs by vici.
@@ -541,10 +615,16 @@ def _initiate_peer_with_childsas(
     :type peer: str
     :param tunnel: tunnel number (CHILD_SA)
     :type tunnel: str
+    :param snapshot: VICI snapshot to use, retrieved if not given
+    :type snapshot: ViciSnapshot
     """
     tunnel_sw = _get_tunnel_sw_format(peer, tunnel)
     try:
-        con_list: list = vyos.ipsec.get_vici_connection_by_name(peer)
+        if snapshot is None:
+            snapshot = vyos.ipsec.ViciSnapshot(ike=peer, sas=False)
+        con_list: list = [
+            {peer: snapshot.connections_by_name[peer]}
+        ] if peer in snapshot.connections_by_name else []
         if not con_list:
             raise vyos.opmode.IncorrectValue(
                 f"Peer's {peer} SA(s) not loaded. Initiation was failed"
@@ -569,7 +649,11 @@ def _initiate_peer_with_childsas(
         raise vyos.opmode.IncorrectValue(err)
 
 
-def _terminate_peer(peer: str, tunnel: typing.Optional[str] = None) -> None:
+def _terminate_peer(
+    peer: str,
+    tunnel: typing.Optional[str] = None,
+    snapshot: typing.Optional[vyos.ipsec.ViciSnapshot] = None,
+) -> None:
     """
     Terminate IPSEC peer SAs by vici.
     If tunnel is None it terminates all peers tunnels
@@ -577,11 +661,25 @@ def _terminate_peer(peer: str, tunnel: typing.Optional[str] = None) -> None:
     :type peer: str
     :param tunnel: tunnel number (CHILD_SA)
     :type tunnel: str
+    :param snapshot: VICI snapshot to use, retrieved if not given
+    :type snapshot: ViciSnapshot
     """
     # Convert tunnel to Strongwan format of CHILD_SA
     tunnel_sw = _get_tunnel_sw_format(peer, tunnel)
     try:
-        sa_list: list = vyos.ipsec.get_vici_sas_by_name(peer, tunnel_sw)
+        if snapshot is None:
+            snapshot = vyos.ipsec.ViciSnapshot(ike=peer, connections=False)
+        sa_list: list = []
+        for sa in snapshot.get_sas(peer):
+            if tunnel_sw:
+                # only keep CHILD SAs of the requested tunnel
+                sa = dict(sa)
+                sa['child-sas'] = {
+                    k: v
+                    for k, v in sa.get('child-sas', {}).items()
+                    if v.get('name') == tunnel_sw
+                }
+            sa_list.append({peer: sa})
         if sa_list:
             if tunnel:
                 childsa_id_list: list = _get_childsa_id_list(sa_list)
@@ -604,6 +702,21 @@ def _terminate_peer(peer: str, tunnel: typing.Optional[str] = None) -> None:
         raise vyos.opmode.IncorrectValue(err)
 
 
+def _reset_peer(
+    peer: str,
+    tunnel: typing.Optional[str],
+    snapshot: vyos.ipsec.ViciSnapshot,
+    peer_config: dict,
+) -> None:
+    _terminate_peer(peer, tunnel, snapshot)
+    # initiate SAs only if 'connection-type=initiate'
+    if (
+        'connection_type' in peer_config
+        and peer_config['connection_type'] == 'initiate'
+    ):
+        _initiate_peer_with_childsas(peer, tunnel, snapshot)
+
+
 def reset_peer(peer: str, tunnel: typing.Optional[str] = None) -> None:
     """
     Reset IPSEC peer SAs.
@@ -613,22 +726,18 @@ def reset_peer(peer: str, tunnel: typing.Optional[str] = None) -> None:
     :param tunnel: tunnel number (CHILD_SA)
     :type tunnel: str
     """
-    _terminate_peer(peer, tunnel)
-    peer_config = _get_sitetosite_peer_config(peer)
-    # initiate SAs only if 'connection-type=initiate'
-    if (
-        'connection_type' in peer_config
-        and peer_config['connection_type'] == 'initiate'
-    ):
-        _initiate_peer_with_childsas(peer, tunnel)
+    snapshot = _get_vici_snapshot(ike=peer)
+    _reset_peer(peer, tunnel, snapshot, _get_sitetosite_peer_config(peer))
 
 
 def reset_all_peers() -> None:
-    sitetosite_list = _get_all_sitetosite_peers_name_list()
-    if sitetosite_list:
-        for peer_name in sitetosite_list:
+    sitetosite_config = _get_all_sitetosite_peers_config()
+    if sitetosite_config:
+        # a single snapshot of all SAs and connections is shared by all peers
+        snapshot = _get_vici_snapshot()
+        for peer_name, peer_config in sitetosite_config.items():
             try:
-                reset_peer(peer_name)
+                _reset_peer(peer_name, None, snapshot, peer_config)
             except vyos.opmode.IncorrectValue as err:
                 print(err)
         print('Peers reset result: success')
@@ -647,7 +756,7 @@ def _get_ra_session_list_by_username(username: typing.Optional[str] = None):
     :rtype:
     """
     list_sa_id = []
-    sa_list = _get_raw_data_sas()
+    sa_list = _get_vici_snapshot(connections=False).sas
     for sa_val in sa_list:
         for sa in sa_val.values():
             if 'remote-eap-id' in sa:
@@ -674,31 +783,21 @@ def reset_profile_dst(profile: str, tunnel: str, nbma_dst: str):
         ike_sa_name = f'dmvpn-{profile}-{tunnel}'
         try:
             # Get IKE SAs
-            sa_list = convert_data(vyos.ipsec.get_vici_sas_by_name(ike_sa_name, None))
+            sa_list = _get_vici_snapshot(ike=ike_sa_name, connections=False).get_sas(
+                ike_sa_name
+            )
             if not sa_list:
                 raise vyos.opmode.IncorrectValue(
                     f'SA(s) for profile {profile} tunnel {tunnel} not found, aborting'
                 )
-            sa_nbma_list = list(
-                [
-                    x
-                    for x in sa_list
-                    if ike_sa_name in x and x[ike_sa_name]['remote-host'] == nbma_dst
-                ]
-            )
+            sa_nbma_list = [x for x in sa_list if x['remote-host'] == nbma_dst]
             if not sa_nbma_list:
                 raise vyos.opmode.IncorrectValue(
                     f'SA(s) for profile {profile} tunnel {tunnel} remote-host {nbma_dst} not found, aborting'
                 )
             # terminate IKE SAs
             vyos.ipsec.terminate_vici_ikeid_list(
-                list(
-                    [
-                        x[ike_sa_name]['uniqueid']
-                        for x in sa_nbma_list
-                        if ike_sa_name in x
-                    ]
-                )
+                [x['uniqueid'] for x in sa_nbma_list]
             )
             print(
                 f'Profile {profile} tunnel {tunnel} remote-host {nbma_dst} reset result: success'
@@ -714,9 +813,9 @@ def reset_profile_all(profile: str, tunnel: str):
         ike_sa_name = f'dmvpn-{profile}-{tunnel}'
         try:
             # Get IKE SAs
-            sa_list: list = convert_data(
-                vyos.ipsec.get_vici_sas_by_name(ike_sa_name, None)
-            )
+            sa_list: list = _get_vici_snapshot(
+                ike=ike_sa_name, connections=False
+            ).get_sas(ike_sa_name)
             if not sa_list:
                 raise vyos.opmode.IncorrectValue(
                     f'SA(s) for profile {profile} tunnel {tunnel} not found, aborting'
@@ -756,20 +855,18 @@ def show_sa_detail(raw: bool):
 
 
 def show_connections(raw: bool):
-    list_conns = _get_convert_data_connections()
-    list_sas = _get_raw_data_sas()
+    snapshot = _get_vici_snapshot()
+    connections = _get_raw_data_connections(snapshot)
     if raw:
-        return _get_raw_data_connections(list_conns, list_sas)
+        return connections
 
-    connections = _get_raw_data_connections(list_conns, list_sas)
     return _get_formatted_output_conections(connections)
 
 
 def show_connections_summary(raw: bool):
-    list_conns = _get_convert_data_connections()
-    list_sas = _get_raw_data_sas()
+    snapshot = _get_vici_snapshot()
     if raw:
-        return _get_raw_connections_summary(list_conns, list_sas)
+        return _get_raw_connections_summary(snapshot)
 
 
 def _get_ra_sessions(username: typing.Optional[str] = None) -> list:
@@ -14,73 +14,59 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import json
-import re
 import sys
 import typing
 
-from jinja2 import Template
+from shlex import join
 
+from vyos.utils.journal import journalctl_args
+from vyos.utils.journal import read_journal
 from vyos.utils.process import rc_cmd
 
 import vyos.opmode
 
-journalctl_command_template = Template("""
---no-hostname
---quiet
-
-{% if boot %}
-  --boot
-{% endif %}
-
-{% if count %}
-  --lines={{ count }}
-{% endif %}
-
-{% if reverse %}
-  --reverse
-{% endif %}
-
-{% if since %}
-  --since={{ since }}
-{% endif %}
-
-{% if unit %}
-  --unit={{ unit }}
-{% endif %}
-
-{% if utc %}
-  --utc
-{% endif %}
-
-{% if raw %}
-{# By default show 100 only lines for raw option if count does not set #}
-{# Protection from parsing the full log by default #}
-{%    if not boot %}
-  --lines={{ '' ~ count if count else '100' }}
-{%    endif %}
-  --no-pager
-  --output=json
-{% endif %}
-""")
-
 
 def show(raw: bool,
          boot: typing.Optional[bool],
          count: typing.Optional[int],
          facility: typing.Optional[str],
+         priority: typing.Optional[str],
          reverse: typing.Optional[bool],
+         since: typing.Optional[str],
+         until: typing.Optional[str],
+         cursor: typing.Optional[str],
          utc: typing.Optional[bool],
          unit: typing.Optional[str]):
-    kwargs = dict(locals())
+    """Show journal entries
 
-    journalctl_options = journalctl_command_template.render(kwargs)
-    journalctl_options = re.sub(r'\s+', ' ', journalctl_options)
-    rc, output = rc_cmd(f'journalctl {journalctl_options}')
+    facility/priority: syslog name or number, priority includes all more
+    important levels
+    since/until: time range as "YYYY-MM-DD [HH:MM[:SS]]"
+    cursor: continue after the entry with this cursor (raw output "cursor")
+    """
     if raw:
-        # Each 'journalctl --output json' line is a separate JSON object
-        # So we should return list of dict
-        return [json.loads(line) for line in output.split('\n')]
+        # By default show 100 only lines for raw option if count does not set
+        # Protection from an unlimited response by default
+        if not count and not boot:
+            count = 100
+        try:
+            # Entries are read from the journal one by one while the output
+            # is produced, the journal matches filter entries server side
+            return read_journal(boot=boot, unit=unit, facility=facility,
+                                priority=priority, since=since, until=until,
+                                cursor=cursor, count=count, reverse=reverse)
+        except ValueError as e:
+            raise vyos.opmode.IncorrectValue(str(e))
+
+    try:
+        args = journalctl_args(boot=boot, unit=unit, facility=facility,
+                               priority=priority, since=since, until=until,
+                               cursor=cursor, count=count, reverse=reverse,
+                               utc=utc)
+    except ValueError as e:
+        raise vyos.opmode.IncorrectValue(str(e))
+    # every option is quoted as a single argument
+    rc, output = rc_cmd(join(['journalctl'] + args))
     return output
 
 
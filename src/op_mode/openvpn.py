@@ -23,6 +23,10 @@
 from tabulate import tabulate
 
 import vyos.opmode
+from vyos.openvpn import STATUS_HEADER_CLIENT
+from vyos.openvpn import STATUS_HEADER_SERVER
+from vyos.openvpn import get_status
+from vyos.openvpn import get_tunnel_address
 from vyos.utils.convert import bytes_to_human
 from vyos.utils.commit import commit_in_progress
 from vyos.utils.process import call
@@ -31,33 +35,7 @@
 
 ArgMode = typing.Literal['client', 'server', 'site_to_site']
 
-def _get_tunnel_address(peer_host, peer_port, status_file):
-    peer = peer_host + ':' + peer_port
-    lst = []
-
-    with open(status_file, 'r') as f:
-        lines = f.readlines()
-        for line in lines:
-            if peer in line:
-                lst.append(line)
-
-        # filter out subnet entries if iroute:
-        # in the case that one sets, say:
-        # [ ..., 'vtun10', 'server', 'client', 'client1', 'subnet','10.10.2.0/25']
-        # the status file will have an entry:
-        # 10.10.2.0/25,client1,...
-        lst = [l for l in lst[1:] if '/' not in l.split(',')[0]]
-
-        if lst:
-            tunnel_ip = lst[0].split(',')[0]
-
-            return tunnel_ip
-
-        return 'n/a'
-
 def _get_interface_status(mode: str, interface: str) -> dict:
-    status_file = f'/run/openvpn/{interface}.status'
-
     data: dict = {
         'mode': mode,
         'intf': interface,
@@ -67,103 +45,60 @@ def _get_interface_status(mode: str, interface: str) -> dict:
         'clients': [],
     }
 
-    if not os.path.exists(status_file):
+    status = get_status(interface)
+    if status is None:
         return data
 
-    with open(status_file, 'r') as f:
-        lines = f.readlines()
-        for line_no, line in enumerate(lines):
-            # remove trailing newline character first
-            line = line.rstrip('\n')
-
-            # check first line header
-            if line_no == 0:
-                if mode == 'server':
-                    if not line == 'OpenVPN CLIENT LIST':
-                        raise vyos.opmode.InternalError('Expected "OpenVPN CLIENT LIST"')
-                else:
-                    if not line == 'OpenVPN STATISTICS':
-                        raise vyos.opmode.InternalError('Expected "OpenVPN STATISTICS"')
-
-                continue
-
-            # second line informs us when the status file has been last updated
-            if line_no == 1:
-                data['date'] = line.lstrip('Updated,').rstrip('\n')
-                continue
-
-            if mode == 'server':
-                # for line_no > 1, lines appear as follows:
-                #
-                # Common Name,Real Address,Bytes Received,Bytes Sent,Connected Since
-                # client1,172.18.202.10:55904,2880587,2882653,Fri Aug 23 16:25:48 2019
-                # client3,172.18.204.10:41328,2850832,2869729,Fri Aug 23 16:25:43 2019
-                # client2,172.18.203.10:48987,2856153,2871022,Fri Aug 23 16:25:45 2019
-                # ...
-                # ROUTING TABLE
-                # ...
-                if line_no >= 3:
-                    # indicator that there are no more clients
-                    if line == 'ROUTING TABLE':
-                        break
-                    # otherwise, get client data
-                    remote = (line.split(',')[1]).rsplit(':', maxsplit=1)
-
-                    client = {
-                        'name': line.split(',')[0],
-                        'remote_host': remote[0],
-                        'remote_port': remote[1],
-                        'tunnel': 'N/A',
-                        'rx_bytes': bytes_to_human(int(line.split(',')[2]),
-                                                   precision=1),
-                        'tx_bytes': bytes_to_human(int(line.split(',')[3]),
-                                                   precision=1),
-                        'online_since': line.split(',')[4]
-                    }
-                    client['tunnel'] = _get_tunnel_address(client['remote_host'],
-                                                           client['remote_port'],
-                                                           status_file)
-                    data['clients'].append(client)
-                    continue
-            else: # mode == 'client' or mode == 'site-to-site'
-                if line_no == 2:
-                    client = {
-                        'name': 'N/A',
-                        'remote_host': 'N/A',
-                        'remote_port': 'N/A',
-                        'tunnel': 'N/A',
-                        'rx_bytes': bytes_to_human(int(line.split(',')[1]),
-                                                   precision=1),
-                        'tx_bytes': '',
-                        'online_since': 'N/A'
-                    }
-                    continue
-
-                if line_no == 3:
-                    client['tx_bytes'] = bytes_to_human(int(line.split(',')[1]),
-                                                        precision=1)
-                    data['clients'].append(client)
-                    break
+    # check header
+    if mode == 'server':
+        if status['header'] != STATUS_HEADER_SERVER:
+            raise vyos.opmode.InternalError(f'Expected "{STATUS_HEADER_SERVER}"')
+    else:
+        if status['header'] != STATUS_HEADER_CLIENT:
+            raise vyos.opmode.InternalError(f'Expected "{STATUS_HEADER_CLIENT}"')
+
+    # informs us when the status file has been last updated
+    data['date'] = status['updated']
+
+    if mode == 'server':
+        for entry in status['clients']:
+            remote = entry['real_address'].rsplit(':', maxsplit=1)
+            client = {
+                'name': entry['name'],
+                'remote_host': remote[0],
+                'remote_port': remote[1],
+                'tunnel': get_tunnel_address(status, entry['real_address']),
+                'rx_bytes': bytes_to_human(entry['bytes_received'], precision=1),
+                'tx_bytes': bytes_to_human(entry['bytes_sent'], precision=1),
+                'online_since': entry['connected_since']
+            }
+            data['clients'].append(client)
+    else: # mode == 'client' or mode == 'site-to-site'
+        # the first two counters are 'TUN/TAP read bytes' and
+        # 'TUN/TAP write bytes'
+        counters = list(status['statistics'].values())
+        if len(counters) >= 2:
+            client = {
+                'name': 'N/A',
+                'remote_host': 'N/A',
+                'remote_port': 'N/A',
+                'tunnel': 'N/A',
+                'rx_bytes': bytes_to_human(int(counters[0]), precision=1),
+                'tx_bytes': bytes_to_human(int(counters[1]), precision=1),
+                'online_since': 'N/A'
+            }
+            data['clients'].append(client)
 
     return data
 
 
-def _get_interface_state(iface):
-    rc, out = rc_cmd(f'ip --json link show dev {iface}')
-    try:
-        data = json.loads(out)
-    except:
-        return 'DOWN'
-    return data[0].get('operstate', 'DOWN')
-
-
-def _get_interface_description(iface):
-    rc, out = rc_cmd(f'ip --json link show dev {iface}')
+def _get_links() -> dict:
+    """ retrieve state and description of all interfaces with one call """
+    rc, out = rc_cmd('ip --json link show')
     try:
-        data = json.loads(out)
+        return {link['ifname']: link for link in json.loads(out)}
     except:
-        return ''
-    return data[0].get('ifalias', '')
+        return {}
 
 
 def _get_raw_data(mode: str) -> list:
@@ -176,10 +111,11 @@ def _get_raw_data(mode: str) -> list:
 
     interfaces = [x for x in list(conf_dict) if
                   conf_dict[x]['mode'].replace('-', '_') == mode]
+    links = _get_links() if interfaces else {}
     for intf in interfaces:
         d = _get_interface_status(mode, intf)
-        d['state'] = _get_interface_state(intf)
-        d['description'] = _get_interface_description(intf)
+        d['state'] = links.get(intf, {}).get('operstate', 'DOWN')
+        d['description'] = links.get(intf, {}).get('ifalias', '')
         d['local_host'] = conf_dict[intf].get('local-host', '')
         d['local_port'] = conf_dict[intf].get('local-port', '')
         if conf.exists(f'interfaces openvpn {intf} server client'):
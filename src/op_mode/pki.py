@@ -38,13 +38,13 @@
 from vyos.pki import create_certificate_revocation_list
 from vyos.pki import create_private_key
 from vyos.pki import create_dh_parameters
+from vyos.pki import CertificateIndex
 from vyos.pki import load_certificate
 from vyos.pki import load_certificate_request
 from vyos.pki import load_private_key
 from vyos.pki import load_crl
 from vyos.pki import load_dh_parameters
 from vyos.pki import load_public_key
-from vyos.pki import verify_certificate
 from vyos.utils.io import ask_input
 from vyos.utils.io import ask_yes_no
 from vyos.utils.misc import install_into_config
@@ -138,23 +138,14 @@ def get_config_certificate(name=None):
     return pki
 
 
-def get_certificate_ca(cert, ca_certs):
-    # Find CA certificate for given certificate
-    if not ca_certs:
+def get_certificate_ca(cert, ca_index):
+    # Find CA certificate for given certificate, ca_index is a
+    # CertificateIndex of the CA certificates
+    if not ca_index:
         return None
 
-    for ca_name, ca_dict in ca_certs.items():
-        if 'certificate' not in ca_dict:
-            continue
-
-        ca_cert = load_certificate(ca_dict['certificate'])
-
-        if not ca_cert:
-            continue
-
-        if verify_certificate(cert, ca_cert):
-            return ca_name
-    return None
+    issuer = ca_index.find_issuer(cert)
+    return issuer[0] if issuer else None
 
 
 def get_config_revoked_certificates():
@@ -185,27 +176,32 @@ def get_config_revoked_certificates():
     return [cert_dict for cert_dict in certs if 'revoke' in cert_dict]
 
 
-def get_revoked_by_serial_numbers(serial_numbers=[]):
-    # Return serial numbers of revoked certificates
-    certs_out = []
-    certs = get_config_certificate()
-    ca_certs = get_config_ca_certificate()
-    if certs:
+def get_certificate_serial_numbers():
+    # Return a dictionary: serial number -> names of certificates and CA
+    # certificates with this serial number
+    serials = {}
+    for certs in [get_config_certificate(), get_config_ca_certificate()]:
+        if not certs:
+            continue
         for cert_name, cert_dict in certs.items():
             if 'certificate' not in cert_dict:
                 continue
 
             cert = load_certificate(cert_dict['certificate'])
-            if cert.serial_number in serial_numbers:
-                certs_out.append(cert_name)
-    if ca_certs:
-        for cert_name, cert_dict in ca_certs.items():
-            if 'certificate' not in cert_dict:
-                continue
+            if cert:
+                serials.setdefault(cert.serial_number, []).append(cert_name)
+    return serials
 
-            cert = load_certificate(cert_dict['certificate'])
-            if cert.serial_number in serial_numbers:
-                certs_out.append(cert_name)
+
+def get_revoked_by_serial_numbers(serial_numbers=[], serial_index=None):
+    # Return names of revoked certificates, serial_index is the result of
+    # get_certificate_serial_numbers() to be reused for several lookups
+    if serial_index is None:
+        serial_index = get_certificate_serial_numbers()
+
+    certs_out = []
+    for serial_number in serial_numbers:
+        certs_out.extend(serial_index.get(serial_number, []))
     return certs_out
 
 
@@ -1205,6 +1201,7 @@ def show_certificate_authority(
     data = []
     certs = get_config_ca_certificate()
     if certs:
+        ca_index = CertificateIndex.from_config(certs)
         for cert_name, cert_dict in certs.items():
             if name and name != cert_name:
                 continue
@@ -1217,7 +1214,7 @@ def show_certificate_authority(
                 print(encode_certificate(cert))
                 return
 
-            parent_ca_name = get_certificate_ca(cert, certs)
+            parent_ca_name = get_certificate_ca(cert, ca_index)
             cert_issuer_cn = cert.issuer.rfc4514_string().split(',')[0]
 
             if not parent_ca_name or parent_ca_name == cert_name:
@@ -1269,6 +1266,7 @@ def show_certificate(
     certs = get_config_certificate()
     if certs:
         ca_certs = get_config_ca_certificate()
+        ca_index = CertificateIndex.from_config(ca_certs) if ca_certs else None
 
         for cert_name, cert_dict in certs.items():
             if name and name != cert_name:
@@ -1288,7 +1286,7 @@ def show_certificate(
                 print(get_certificate_fingerprint(cert, fingerprint))
                 return
 
-            ca_name = get_certificate_ca(cert, ca_certs)
+            ca_name = get_certificate_ca(cert, ca_index)
             cert_subject_cn = cert.subject.rfc4514_string().split(',')[0]
             cert_issuer_cn = cert.issuer.rfc4514_string().split(',')[0]
             cert_type = 'Unknown'
@@ -1334,6 +1332,7 @@ def show_crl(
     data = []
     certs = get_config_ca_certificate()
     if certs:
+        serial_index = None
         for cert_name, cert_dict in certs.items():
             if name and name != cert_name:
                 continue
@@ -1344,7 +1343,7 @@ def show_crl(
             if isinstance(crls, str):
                 crls = [crls]
 
-            for crl_data in cert_dict['crl']:
+            for crl_data in crls:
                 crl = load_crl(crl_data)
 
                 if not crl:
@@ -1354,10 +1353,12 @@ def show_crl(
                     print(encode_certificate(crl))
                     continue
 
-                certs = get_revoked_by_serial_numbers(
-                    [revoked.serial_number for revoked in crl]
+                if serial_index is None:
+                    serial_index = get_certificate_serial_numbers()
+                revoked_names = get_revoked_by_serial_numbers(
+                    [revoked.serial_number for revoked in crl], serial_index
                 )
-                data.append([cert_name, crl.last_update, ', '.join(certs)])
+                data.append([cert_name, crl.last_update, ', '.join(revoked_names)])
 
     if name and pem:
         return
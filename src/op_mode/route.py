@@ -38,13 +38,16 @@
 {% endif %}
 
 {% if vrf %}
-    vrf {{table}}
+    vrf {{vrf}}
 {% endif %}
 
 {% if tag %}
     tag {{tag}}
 {% elif net %}
     {{net}}
+    {% if longer_prefixes %}
+      longer-prefixes
+    {% endif %}
 {% elif protocol %}
     {{protocol}}
 {% endif %}
@@ -56,6 +59,38 @@
 
 ArgFamily = typing.Literal['inet', 'inet6']
 
+# Fields of a route and its nexthops returned by show --summary
+route_summary_fields = ['prefix', 'protocol', 'vrfName', 'selected', 'installed',
+                        'distance', 'metric', 'uptime']
+nexthop_summary_fields = ['ip', 'afi', 'interfaceName', 'active', 'fib']
+
+def _route_summary(route):
+    summary = {k: route[k] for k in route_summary_fields if k in route}
+    summary['nexthops'] = [{k: nh[k] for k in nexthop_summary_fields if k in nh}
+                           for nh in route.get('nexthops', [])]
+    return summary
+
+def _stream_routes(frr_command, vrf, protocol, limit, offset, summary):
+    """
+    Generator of the routes of a vtysh JSON route table, decoded one prefix
+    at a time while vtysh is still writing its output. limit and offset
+    count prefixes, all routes of a prefix are returned together.
+    """
+    from itertools import islice
+    from vyos.utils.process import cmd_json_stream
+
+    # "vrf all" nests the prefixes in one object per VRF
+    path = [None] if vrf == 'all' else []
+    prefixes = (routes for _, routes in cmd_json_stream(['vtysh', '-c', frr_command], path))
+    if protocol:
+        prefixes = ([r for r in routes if r.get('protocol') == protocol] for routes in prefixes)
+        prefixes = (routes for routes in prefixes if routes)
+
+    stop = offset + limit if limit else None
+    for routes in islice(prefixes, offset, stop):
+        for route in routes:
+            yield _route_summary(route) if summary else route
+
 def show_summary(raw: bool, family: ArgFamily, table: typing.Optional[int], vrf: typing.Optional[str]):
     from vyos.utils.process import cmd
 
@@ -98,12 +133,22 @@ def show_summary(raw: bool, family: ArgFamily, table: typing.Optional[int], vrf:
 def show(raw: bool,
          family: ArgFamily,
          net: typing.Optional[str],
+         longer_prefixes: typing.Optional[bool],
          table: typing.Optional[int],
          protocol: typing.Optional[str],
          vrf: typing.Optional[str],
-         tag: typing.Optional[str]):
-    if net and protocol:
+         tag: typing.Optional[str],
+         limit: typing.Optional[int],
+         offset: typing.Optional[int],
+         summary: typing.Optional[bool]):
+    if net and protocol and not raw:
         raise ValueError("net and protocol are mutually exclusive")
+    elif longer_prefixes and not net:
+        raise ValueError("longer_prefixes can only be used when net is given")
+    elif (limit is not None and limit < 1) or (offset is not None and offset < 0):
+        raise ValueError("limit must be positive and offset must not be negative")
+    elif (limit or offset or summary) and not raw:
+        raise ValueError("limit, offset and summary are only supported for raw output")
     elif table and vrf:
         raise ValueError("table and vrf are mutually exclusive")
     elif (family == 'inet6') and (protocol == 'rip'):
@@ -117,21 +162,16 @@ def show(raw: bool,
         kwargs = dict(locals())
 
         frr_command = frr_command_template.render(kwargs)
-        frr_command = re.sub(r'\s+', ' ', frr_command)
-
-        from vyos.utils.process import cmd
-        output = cmd(f"vtysh -c '{frr_command}'")
+        frr_command = re.sub(r'\s+', ' ', frr_command).strip()
 
         if raw:
-            from json import loads
-            d = loads(output)
-            collect = []
-            for k,_ in d.items():
-                for l in d[k]:
-                    collect.append(l)
-            return collect
-        else:
-            return output
+            # FRR filters by either net or protocol, the protocol of
+            # routes looked up by net is matched while they stream in
+            return _stream_routes(frr_command, vrf, protocol if net else None,
+                                  limit, offset or 0, summary)
+
+        from vyos.utils.process import cmd
+        return cmd(f"vtysh -c '{frr_command}'")
 
 if __name__ == '__main__':
     try:
@@ -14,12 +14,52 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 import sys
 import json
+import typing
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Timer
+from time import monotonic
 
 import vyos.opmode
 
-from vyos.utils.process import cmd
+# Probes are independent of each other and run in parallel
+PROBE_WORKERS = 8
+# Commands of a probe are killed when they did not finish in time
+PROBE_TIMEOUT = 60
+# Complete routing tables can take minutes to dump on full table routers
+TABLE_TIMEOUT = 900
+
+def cmd(command, timeout=PROBE_TIMEOUT):
+    """Run a command and return its output, like vyos.utils.process.cmd()
+    but the command is killed after timeout seconds"""
+    p = subprocess.run(command, shell=True, stdout=subprocess.PIPE,
+                       stderr=subprocess.PIPE, timeout=timeout)
+    if p.returncode != 0:
+        raise OSError(p.returncode, f'"{command}" failed: {p.stderr.decode(errors="replace").strip()}')
+    return p.stdout.decode(errors='replace').replace('\r\n', '\n').strip()
+
+def _stream_command(command, file, timeout=TABLE_TIMEOUT):
+    """Copy the output of a command into a file object as it is produced,
+    without holding it in memory"""
+    import shutil
+
+    p = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE,
+                         stderr=subprocess.DEVNULL)
+    watchdog = Timer(timeout, p.kill)
+    watchdog.start()
+    try:
+        shutil.copyfileobj(p.stdout, file, 1024 * 1024)
+        rc = p.wait()
+    finally:
+        watchdog.cancel()
+    if rc < 0:
+        raise subprocess.TimeoutExpired(command, timeout)
+    if rc != 0:
+        raise OSError(rc, f'"{command}" failed')
 
 def _get_version_data():
     from vyos.version import get_version_data
@@ -68,10 +108,12 @@ def _get_processes():
 def _get_interrupts():
     from vyos.utils.file import read_file
 
-    interrupts = read_file("/proc/interrupts")
-    softirqs = read_file("/proc/softirqs")
+    return read_file("/proc/interrupts")
 
-    return (interrupts, softirqs)
+def _get_softirqs():
+    from vyos.utils.file import read_file
+
+    return read_file("/proc/softirqs")
 
 def _get_partitions():
     # XXX: as of parted 3.5, --json is completely broken
@@ -116,12 +158,15 @@ def _get_config_scripts():
 
     return scripts
 
-def _get_nic_data():
+def _get_nic_links():
+    from vyos.utils.process import ip_cmd
+
+    return ip_cmd("link show")
+
+def _get_nic_addresses():
     from vyos.utils.process import ip_cmd
-    link_data = ip_cmd("link show")
-    addr_data = ip_cmd("address show")
 
-    return link_data, addr_data
+    return ip_cmd("address show")
 
 def _get_routes(proto):
     from json import loads
@@ -184,7 +229,6 @@ def _get_isis():
 
 def _get_arp_table():
     from json import loads
-    from vyos.utils.process import cmd
 
     arp_table = cmd("ip --json -4 neighbor show")
     return loads(arp_table)
@@ -200,13 +244,10 @@ def _get_nftables_rules():
     return nft_rules
 
 def _get_connections():
-    from vyos.utils.process import cmd
-
     return cmd("ss -apO")
 
 def _get_system_packages():
     from re import split
-    from vyos.utils.process import cmd
 
     dpkg_out = cmd(''' dpkg-query -W -f='${Package} ${Version} ${Architecture} ${db:Status-Abbrev}\n' ''')
     pkg_lines = split(r'\n+', dpkg_out)
@@ -277,103 +318,165 @@ def _get_last_logs(max):
     return entries
 
 
-def _get_raw_data():
-    data = {}
-
-    # VyOS-specific information
-    data["vyos"] = {}
-
-    ## The equivalent of "show version"
-    from vyos.version import get_version_data
-    data["vyos"]["version"] = _get_version_data()
-
-    ## Installed images
-    data["vyos"]["images"] = _get_image_info()
-
-    # System information
-    data["system"] = {}
-
-    ## Uptime and load averages
-    data["system"]["uptime"] = _get_uptime()
-    data["system"]["load_average"] = _get_load_average()
-    data["system"]["process_stats"] = _get_process_stats()
-
-    ## Debian packages
-    data["system"]["packages"] = _get_system_packages()
-
-    ## Kernel modules
-    data["system"]["kernel"] = {}
-    data["system"]["kernel"]["modules"] = _get_kernel_modules()
-
-    ## Processes
-    data["system"]["processes"] = _get_processes()
-
-    ## Interrupts
-    interrupts, softirqs = _get_interrupts()
-    data["system"]["interrupts"] = interrupts
-    data["system"]["softirqs"] = softirqs
-
-    # Hardware
-    data["hardware"] = {}
-    data["hardware"]["cpu"] = _get_cpus()
-    data["hardware"]["storage"] = _get_storage()
-    data["hardware"]["partitions"] = _get_partitions()
-    data["hardware"]["devices"] = _get_devices()
-    data["hardware"]["memory"] = _get_memory()
-
-    # Configuration data
-    data["vyos"]["config"] = {}
-
-    ## Running config text
-    ## We do not encode it so that it's possible to
-    ## see exactly what the user sees and detect any syntax/rendering anomalies —
-    ## exporting the config to JSON could obscure them
-    data["vyos"]["config"]["running"] = _get_running_config()
-
-    ## Default boot config, exactly as in /config/config.boot
-    ## It may be different from the running config
-    ## _and_ may have its own syntax quirks that may point at bugs
-    data["vyos"]["config"]["boot"] = _get_boot_config()
-
-    ## Config scripts
-    data["vyos"]["config"]["scripts"] = _get_config_scripts()
-
-    # Network interfaces
-    data["network_interfaces"] = {}
-
-    # Interface data from iproute2
-    link_data, addr_data = _get_nic_data()
-    data["network_interfaces"]["links"] = link_data
-    data["network_interfaces"]["addresses"] = addr_data
-
-    # Routing table data
-    data["routing"] = {}
-    data["routing"]["ip"] = _get_ip_routes()
-    data["routing"]["ipv6"] = _get_ipv6_routes()
-
-    # Routing protocols
-    data["routing"]["ip"]["ospf"] = _get_ospfv2()
-    data["routing"]["ipv6"]["ospfv3"] = _get_ospfv3()
-
-    data["routing"]["bgp"] = {}
-    data["routing"]["bgp"]["summary"] = _get_bgp_summary()
-
-    data["routing"]["isis"] = _get_isis()
-
-    # ARP and NDP neighbor tables
-    data["neighbor_tables"] = {}
-    data["neighbor_tables"]["arp"] = _get_arp_table()
-    data["neighbor_tables"]["ndp"] = _get_ndp_table()
-
-    # nftables config
-    data["nftables_rules"] = _get_nftables_rules()
+def _get_bgp_table(afi):
+    def func(file):
+        _stream_command(f"vtysh -c 'show bgp {afi} unicast json'", file)
+    return func
+
+def _get_rib(proto):
+    def func(file):
+        _stream_command(f"vtysh -c 'show {proto} route json'", file)
+    return func
+
+def _get_fib(family):
+    def func(file):
+        _stream_command(f"ip {family} route show table all", file)
+    return func
+
+
+# Probes in report order: (path in the report, function)
+def _get_probes():
+    return [
+        # VyOS-specific information
+        ## The equivalent of "show version"
+        (('vyos', 'version'), _get_version_data),
+        ## Installed images
+        (('vyos', 'images'), _get_image_info),
+
+        # System information
+        ## Uptime and load averages
+        (('system', 'uptime'), _get_uptime),
+        (('system', 'load_average'), _get_load_average),
+        (('system', 'process_stats'), _get_process_stats),
+        ## Debian packages
+        (('system', 'packages'), _get_system_packages),
+        ## Kernel modules
+        (('system', 'kernel', 'modules'), _get_kernel_modules),
+        ## Processes
+        (('system', 'processes'), _get_processes),
+        ## Interrupts
+        (('system', 'interrupts'), _get_interrupts),
+        (('system', 'softirqs'), _get_softirqs),
+
+        # Hardware
+        (('hardware', 'cpu'), _get_cpus),
+        (('hardware', 'storage'), _get_storage),
+        (('hardware', 'partitions'), _get_partitions),
+        (('hardware', 'devices'), _get_devices),
+        (('hardware', 'memory'), _get_memory),
+
+        # Configuration data
+        ## Running config text
+        ## We do not encode it so that it's possible to
+        ## see exactly what the user sees and detect any syntax/rendering anomalies —
+        ## exporting the config to JSON could obscure them
+        (('vyos', 'config', 'running'), _get_running_config),
+        ## Default boot config, exactly as in /config/config.boot
+        ## It may be different from the running config
+        ## _and_ may have its own syntax quirks that may point at bugs
+        (('vyos', 'config', 'boot'), _get_boot_config),
+        ## Config scripts
+        (('vyos', 'config', 'scripts'), _get_config_scripts),
+
+        # Network interfaces, interface data from iproute2
+        (('network_interfaces', 'links'), _get_nic_links),
+        (('network_interfaces', 'addresses'), _get_nic_addresses),
+
+        # Routing table data
+        (('routing', 'ip'), _get_ip_routes),
+        (('routing', 'ipv6'), _get_ipv6_routes),
+
+        # Routing protocols
+        (('routing', 'ip', 'ospf'), _get_ospfv2),
+        (('routing', 'ipv6', 'ospfv3'), _get_ospfv3),
+        (('routing', 'bgp', 'summary'), _get_bgp_summary),
+        (('routing', 'isis'), _get_isis),
+
+        # ARP and NDP neighbor tables
+        (('neighbor_tables', 'arp'), _get_arp_table),
+        (('neighbor_tables', 'ndp'), _get_ndp_table),
+
+        # nftables config
+        (('nftables_rules',), _get_nftables_rules),
+
+        # All connections
+        (('connections',), _get_connections),
+
+        # Logs
+        (('last_logs',), lambda: _get_last_logs(1000)),
+    ]
+
+# Complete tables for the archive, written to their own compressed members:
+# (member name, function writing the data to a file object)
+def _get_table_probes():
+    return [
+        ('routing/ip-route.json', _get_rib('ip')),
+        ('routing/ipv6-route.json', _get_rib('ipv6')),
+        ('routing/ip-fib.txt', _get_fib('-4')),
+        ('routing/ipv6-fib.txt', _get_fib('-6')),
+        ('routing/bgp-ipv4-unicast.json', _get_bgp_table('ipv4')),
+        ('routing/bgp-ipv6-unicast.json', _get_bgp_table('ipv6')),
+    ]
+
+def _run_probe(name, func, *args):
+    start = monotonic()
+    timing = {'name': name, 'status': 'ok'}
+    result = None
+    try:
+        result = func(*args)
+    except subprocess.TimeoutExpired as e:
+        timing['status'] = 'timeout'
+        timing['error'] = str(e)
+    except Exception as e:
+        timing['status'] = 'error'
+        timing['error'] = str(e)
+    timing['duration'] = round(monotonic() - start, 3)
+    return result, timing
+
+def _set_path(data, path, value):
+    for key in path[:-1]:
+        if not isinstance(data.get(key), dict):
+            data[key] = {}
+        data = data[key]
+    if isinstance(data.get(path[-1]), dict) and isinstance(value, dict):
+        data[path[-1]].update(value)
+    else:
+        data[path[-1]] = value
+
+def _collect(executor, table_dir=None):
+    """Run all probes in parallel and return the report and the probe
+    timings. If table_dir is given, the complete tables are streamed into
+    gzip compressed files in that directory as well."""
+    import gzip
+
+    def run_table(name, func):
+        with gzip.open(os.path.join(table_dir, f'{name}.gz'), 'wb') as f:
+            func(f)
+
+    probes = _get_probes()
+    futures = [executor.submit(_run_probe, '.'.join(path), func) for path, func in probes]
+    table_futures = []
+    if table_dir:
+        for name, func in _get_table_probes():
+            os.makedirs(os.path.dirname(os.path.join(table_dir, name)), exist_ok=True)
+            table_futures.append(executor.submit(_run_probe, name, run_table, name, func))
 
-    # All connections
-    data["connections"] = _get_connections()
+    data = {}
+    timings = []
+    # assemble the report in probe order, not in order of completion
+    for (path, _), future in zip(probes, futures):
+        result, timing = future.result()
+        _set_path(data, path, result)
+        timings.append(timing)
+    for future in table_futures:
+        timings.append(future.result()[1])
 
-    # Logs
-    data["last_logs"] = _get_last_logs(1000)
+    return data, timings
 
+def _get_raw_data():
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        data, timings = _collect(executor)
+    data['probe_timings'] = timings
     return data
 
 def show(raw: bool):
@@ -383,6 +486,62 @@ def show(raw: bool):
     else:
         raise vyos.opmode.UnsupportedOperation("Formatted output is not implemented yet")
 
+def generate_archive(raw: bool, path: typing.Optional[str]):
+    """Generate a tech-support archive
+
+    The archive contains the report as in "show tech-support report json"
+    and the complete routing and BGP tables. All members are gzip
+    compressed, tables are compressed while they are dumped.
+    """
+    import tarfile
+    from datetime import datetime
+    from socket import gethostname
+    from tempfile import TemporaryDirectory
+
+    if not path:
+        time_now = datetime.now().isoformat(timespec='seconds').replace(':', '-')
+        path = f'/tmp/{gethostname()}_tech-support_{time_now}.tar'
+    elif not path.endswith('.tar'):
+        path = f'{path}.tar'
+    path = os.path.abspath(path)
+    if os.path.exists(path):
+        raise vyos.opmode.IncorrectValue(f'File "{path}" already exists')
+
+    start = monotonic()
+    with TemporaryDirectory(dir=os.path.dirname(path)) as tmp_dir:
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+            data, timings = _collect(executor, table_dir=tmp_dir)
+        data['probe_timings'] = timings
+
+        import gzip
+        with gzip.open(os.path.join(tmp_dir, 'report.json.gz'), 'wt') as f:
+            json.dump(data, f, indent=4)
+
+        with tarfile.open(path, 'x') as tar:
+            tar.add(os.path.join(tmp_dir, 'report.json.gz'), arcname='tech-support/report.json.gz')
+            status = {t['name']: t['status'] for t in timings}
+            for name, _ in _get_table_probes():
+                # output of a timed out command is kept, it is still useful
+                if status.get(name) == 'error':
+                    continue
+                tar.add(os.path.join(tmp_dir, f'{name}.gz'), arcname=f'tech-support/{name}.gz')
+
+    result = {
+        'path': path,
+        'duration': round(monotonic() - start, 3),
+        'probe_timings': timings,
+    }
+    if raw:
+        return result
+
+    failed = [t['name'] for t in timings if t['status'] != 'ok']
+    out = f'Tech-support archive generated in {result["duration"]} seconds: {path}'
+    if failed:
+        out += f'\nIncomplete data, failed probes: {", ".join(failed)}'
+    slowest = sorted(timings, key=lambda t: t['duration'], reverse=True)[:5]
+    out += '\nSlowest probes: ' + ', '.join(f'{t["name"]} ({t["duration"]}s)' for t in slowest)
+    return out
+
 if __name__ == '__main__':
     try:
         res = vyos.opmode.run(sys.modules[__name__])
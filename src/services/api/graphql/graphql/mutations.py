@@ -26,6 +26,7 @@
 
 from ...session import SessionState
 from ..libs import key_auth
+from ..libs.op_mode import run_op_mode
 from ..session.session import Session
 from ..session.errors.op_mode_errors import op_mode_err_msg, op_mode_err_code
 
@@ -97,7 +98,10 @@ async def func_impl(*args, **kwargs):
                 klass = type(class_name, (Session,), {})
             k = klass(session, data)
             method = getattr(k, session_func)
-            result = method()
+            if session_func == 'gen_op_mutation':
+                result = await run_op_mode(method)
+            else:
+                result = method()
             data['result'] = result
 
             return {'success': True, 'data': data}
@@ -26,6 +26,7 @@
 
 from ...session import SessionState
 from ..libs import key_auth
+from ..libs.op_mode import run_op_mode_query
 from ..session.session import Session
 from ..session.errors.op_mode_errors import op_mode_err_msg, op_mode_err_code
 
@@ -97,7 +98,11 @@ async def func_impl(*args, **kwargs):
                 klass = type(class_name, (Session,), {})
             k = klass(session, data)
             method = getattr(k, session_func)
-            result = method()
+            if session_func == 'gen_op_query':
+                ttl = state.cache_ttl.get(query_name, 0)
+                result = await run_op_mode_query(query_name, data, method, ttl)
+            else:
+                result = method()
             data['result'] = result
 
             return {'success': True, 'data': data}
@@ -13,10 +13,16 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import json
 import os
 import re
+import threading
+import time
 import typing
 
+from concurrent.futures import ThreadPoolExecutor
+from types import GeneratorType
 from typing import Union
 from typing import Optional
 from humps import decamelize
@@ -26,10 +32,67 @@
 from vyos.opmode import _normalize_field_names
 from vyos.opmode import _is_literal_type, _get_literal_values
 
+# Op-mode functions run in a thread pool, so that a slow one does not block
+# the event loop serving all other API requests
+OP_MODE_WORKERS = 8
+_executor = ThreadPoolExecutor(max_workers=OP_MODE_WORKERS,
+                               thread_name_prefix='op-mode')
+
+# loaded op-mode scripts, name -> (mtime, module)
+_modules = {}
+_modules_lock = threading.Lock()
+
+# op-mode query results: key -> (expiry time, result)
+_results = {}
+# op-mode queries in progress: key -> future
+_inflight = {}
+
 def load_op_mode_as_module(name: str):
+    """
+    Load an op-mode script as module. Modules are cached and only loaded
+    again when the script was modified.
+    """
     path = os.path.join(directories['op_mode'], name)
-    name = os.path.splitext(name)[0].replace('-', '_')
-    return load_as_module(name, path)
+    mtime = os.stat(path).st_mtime_ns
+    with _modules_lock:
+        cached = _modules.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        mod = load_as_module(os.path.splitext(name)[0].replace('-', '_'), path)
+        _modules[name] = (mtime, mod)
+        return mod
+
+async def run_op_mode(func):
+    """ Run an op-mode function in the thread pool """
+    return await asyncio.get_running_loop().run_in_executor(_executor, func)
+
+def _query_done(key, ttl: int, future):
+    del _inflight[key]
+    if not ttl or future.cancelled() or future.exception() is not None:
+        return
+    now = time.monotonic()
+    for expired in [k for k, (expiry, _) in _results.items() if expiry <= now]:
+        del _results[expired]
+    _results[key] = (now + ttl, future.result())
+
+async def run_op_mode_query(name: str, data: dict, func, ttl: int = 0):
+    """
+    Run an op-mode query function in the thread pool. Concurrent identical
+    queries (same name and arguments) share a single execution. With a ttl
+    the result is reused for identical queries during ttl seconds.
+    """
+    key = (name, json.dumps(data, sort_keys=True, default=str))
+    cached = _results.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(_executor, func)
+        _inflight[key] = future
+        future.add_done_callback(lambda f: _query_done(key, ttl, f))
+    # a cancelled request must not cancel the execution other ones wait for
+    return await asyncio.shield(future)
 
 def is_show_function_name(name):
     if re.match(r"^show", name):
@@ -100,4 +163,6 @@ def map_type_name(type_name: type, enums: Optional[dict] = None, optional: bool
     return 'Generic'
 
 def normalize_output(result: Union[dict, list]) -> Union[dict, list]:
+    if isinstance(result, GeneratorType):
+        return [_normalize_field_names(decamelize(item)) for item in result]
     return _normalize_field_names(decamelize(result))
@@ -29,6 +29,23 @@
 op_mode_include_file = os.path.join(directories['data'], 'op-mode-standardized.json')
 
 
+_op_mode_list = None
+
+def get_op_mode_list():
+    """
+    Return the list of standardized op-mode scripts, None if it is not
+    available. The list is read once per process.
+    """
+    global _op_mode_list
+    if _op_mode_list is None:
+        try:
+            with open(op_mode_include_file) as f:
+                _op_mode_list = json.loads(f.read())
+        except Exception:
+            return None
+    return _op_mode_list
+
+
 def get_config_dict(
     path=[],
     effective=False,
@@ -72,11 +89,7 @@ def __init__(self, session, data):
         self._data = data
         self._name = convert_camel_case_to_snake(type(self).__name__)
 
-        try:
-            with open(op_mode_include_file) as f:
-                self._op_mode_list = json.loads(f.read())
-        except Exception:
-            self._op_mode_list = None
+        self._op_mode_list = get_op_mode_list()
 
     def show_config(self):
         session = self._session
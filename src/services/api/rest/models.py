@@ -124,7 +124,7 @@ class Config:
         json_schema_extra = {
             'example': {
                 'key': 'id_key',
-                'op': 'returnValue | returnValues | exists | showConfig',
+                'op': 'returnValue | returnValues | exists | showConfig | digest',
                 'path': ['config', 'mode', 'path'],
                 'configFormat': 'json (default) | json_ast | raw',
             }
@@ -20,6 +20,7 @@
 
 import json
 import copy
+import gzip
 import logging
 import traceback
 from threading import Lock
@@ -44,6 +45,7 @@
 from vyos.configtree import ConfigTree
 from vyos.configdiff import get_config_diff
 from vyos.configsession import ConfigSessionError
+from vyos.utils.dict import dict_digest
 
 from ..session import SessionState
 from .models import success
@@ -165,6 +167,12 @@ async def body(self) -> bytes:
             forms = {}
             merge = {}
             body = await super().body()
+            # config-sync compresses large section transfers
+            if self.orig_headers.get('Content-Encoding') == 'gzip':
+                try:
+                    body = gzip.decompress(body)
+                except (OSError, EOFError) as e:
+                    self.form_err = (400, f'Failed to decompress request body: {e}')
             self._body = body
 
             form_data = await self.form()
@@ -465,6 +473,12 @@ async def retrieve_op(data: RetrieveModel):
             res = config.return_values(path)
         elif op == 'exists':
             res = config.exists(path)
+        elif op == 'digest':
+            # lets config-sync find out if a section needs to be transferred
+            res = None
+            if config.exists(path):
+                config_tree = ConfigTree(session.show_config(path=data.path))
+                res = dict_digest(json.loads(config_tree.to_json()))
         elif op == 'showConfig':
             config_format = 'json'
             if data.configFormat:
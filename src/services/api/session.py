@@ -39,3 +39,5 @@ def _initialize(self):
         self.auth_type = None
         self.token_exp = None
         self.secret_len = None
+        # op-mode query name -> result cache lifetime in seconds
+        self.cache_ttl = {}
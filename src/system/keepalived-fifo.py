@@ -21,8 +21,9 @@
 import threading
 import re
 import logging
+import select
 
-from queue import Queue
+from collections import deque
 from logging.handlers import SysLogHandler
 
 from vyos.configquery import ConfigTreeQuery
@@ -41,6 +42,16 @@
 mdns_running_file = '/run/mdns_vrrp_active'
 mdns_update_command = 'sudo /usr/libexec/vyos/conf_mode/service_mdns_repeater.py'
 
+# number of transitions processed in parallel
+script_workers = 4
+# pseudo group used to serialize and coalesce mDNS repeater updates
+mdns_key = ('MDNS', None)
+
+regex_notify = re.compile(r'^(?P<type>\w+) "(?P<name>[\w-]+)" (?P<state>\w+) (?P<priority>\d+)$')
+
+def timestamp(wall_time):
+    return time.strftime('%H:%M:%S', time.localtime(wall_time)) + f'.{int(wall_time * 1000) % 1000:03d}'
+
 # class for all operations
 class KeepalivedFifo:
     # init - read command arguments
@@ -55,10 +66,18 @@ def __init__(self):
         self._config_load()
         self.pipe_path = cmd_args.PIPE
 
-        # create queue for messages and events for syncronization
-        self.message_queue = Queue(maxsize=100)
         self.stopme = threading.Event()
-        self.message_event = threading.Event()
+        # Transitions waiting for a worker, keyed by (type, name). Only the
+        # latest state of a group is kept: if keepalived reports several
+        # transitions before the previous ones were processed, the scripts
+        # for the intermediate states are skipped.
+        self.pending = {}
+        # groups with a pending transition, in order of arrival
+        self.ready = deque()
+        # groups currently processed by a worker, a group is never processed
+        # by two workers at the same time to keep transitions ordered
+        self.active = set()
+        self.condition = threading.Condition()
 
     # load configuration
     def _config_load(self):
@@ -103,69 +122,112 @@ def pipe_create(self):
         else:
             os.mkfifo(self.pipe_path)
 
+    # queue a transition, coalescing it with a not yet processed one
+    def _schedule(self, key, event):
+        with self.condition:
+            previous = self.pending.get(key)
+            if previous:
+                logger.info(f'{key[0]} {key[1]}: transition to {previous["state"]} superseded by {event["state"]}')
+                # keep the time of the first event for latency measurement
+                event['received'] = previous['received']
+            self.pending[key] = event
+            if previous is None and key not in self.active:
+                self.ready.append(key)
+                self.condition.notify()
+
     # process message from pipe
+    def _process_line(self, line, received):
+        logger.debug(f'Received message: {line}')
+        notify_message = regex_notify.search(line)
+        # try to process a message if it looks valid
+        if not notify_message:
+            return
+        n_type = notify_message.group('type')
+        n_name = notify_message.group('name')
+        n_state = notify_message.group('state')
+        logger.info(f'{n_type} {n_name} changed state to {n_state} (received {timestamp(received)})')
+        if n_type == 'INSTANCE':
+            config_path = f'group.{n_name}'
+        elif n_type == 'GROUP':
+            config_path = f'sync_group.{n_name}'
+        else:
+            return
+
+        if os.path.exists(mdns_running_file):
+            self._schedule(mdns_key, {'state': n_state, 'received': received,
+                                      'command': mdns_update_command})
+
+        tmp = dict_search(f'{config_path}.transition_script.{n_state.lower()}', self.vrrp_config_dict)
+        if tmp != None:
+            self._schedule((n_type, n_name), {'state': n_state, 'received': received,
+                                              'command': tmp})
+
+    # worker thread - run transition commands
     def pipe_process(self):
         logger.debug('Message processing start')
-        regex_notify = re.compile(r'^(?P<type>\w+) "(?P<name>[\w-]+)" (?P<state>\w+) (?P<priority>\d+)$', re.MULTILINE)
-        while self.stopme.is_set() is False:
-            # wait for a new message event from pipe_wait
-            self.message_event.wait()
+        while True:
+            with self.condition:
+                while not self.ready:
+                    # finish all pending transitions before terminating
+                    if self.stopme.is_set():
+                        logger.debug('Terminating messages processing thread')
+                        return
+                    self.condition.wait(timeout=0.5)
+                key = self.ready.popleft()
+                event = self.pending.pop(key)
+                self.active.add(key)
+
             try:
-                # clear mesage event flag
-                self.message_event.clear()
-                # get all messages from queue and try to process them
-                while self.message_queue.empty() is not True:
-                    message = self.message_queue.get()
-                    logger.debug(f'Received message: {message}')
-                    notify_message = regex_notify.search(message)
-                    # try to process a message if it looks valid
-                    if notify_message:
-                        n_type = notify_message.group('type')
-                        n_name = notify_message.group('name')
-                        n_state = notify_message.group('state')
-                        logger.info(f'{n_type} {n_name} changed state to {n_state}')
-                        # check and run commands for VRRP instances
-                        if n_type == 'INSTANCE':
-                            if os.path.exists(mdns_running_file):
-                                cmd(mdns_update_command)
-
-                            tmp = dict_search(f'group.{n_name}.transition_script.{n_state.lower()}', self.vrrp_config_dict)
-                            if tmp != None:
-                                self._run_command(tmp)
-                        # check and run commands for VRRP sync groups
-                        elif n_type == 'GROUP':
-                            if os.path.exists(mdns_running_file):
-                                cmd(mdns_update_command)
-
-                            tmp = dict_search(f'sync_group.{n_name}.transition_script.{n_state.lower()}', self.vrrp_config_dict)
-                            if tmp != None:
-                                self._run_command(tmp)
-                    # mark task in queue as done
-                    self.message_queue.task_done()
+                self._run_command(event['command'])
+                finished = time.time()
+                logger.info(f'{key[0]} {key[1]} transition to {event["state"]}: '
+                            f'"{event["command"]}" finished at {timestamp(finished)}, '
+                            f'{(finished - event["received"]) * 1000:.0f}ms after the event was received')
             except Exception as err:
                 logger.error(f'Error processing message: {err}')
-        logger.debug('Terminating messages processing thread')
+            finally:
+                with self.condition:
+                    self.active.discard(key)
+                    # a newer transition arrived while this one was running
+                    if key in self.pending:
+                        self.ready.append(key)
+                        self.condition.notify()
 
     # wait for messages
     def pipe_wait(self):
         logger.debug('Message reading start')
-        self.pipe_read = os.open(self.pipe_path, os.O_RDONLY | os.O_NONBLOCK)
+        # Open read-write to always have a writer on the FIFO, otherwise poll
+        # reports POLLHUP in a loop after keepalived closed its end
+        self.pipe_read = os.open(self.pipe_path, os.O_RDWR | os.O_NONBLOCK)
+        poller = select.poll()
+        poller.register(self.pipe_read, select.POLLIN)
+        buffer = b''
         while self.stopme.is_set() is False:
-            # sleep a bit to not produce 100% CPU load
-            time.sleep(0.250)
+            # blocks until a message arrives, the timeout only serves
+            # to notice termination
+            if not poller.poll(500):
+                continue
+            received = time.time()
             try:
-                # try to read a message from PIPE
-                message = os.read(self.pipe_read, 500)
-                if message:
-                    # split PIPE content by lines and put them into queue
-                    for line in message.decode().strip().splitlines():
-                        self.message_queue.put(line)
-                    # set new message flag to start processing
-                    self.message_event.set()
-            except Exception as err:
-                # ignore the "Resource temporarily unavailable" error
-                if err.errno != 11:
-                    logger.error(f'Error receiving message: {err}')
+                while True:
+                    message = os.read(self.pipe_read, 4096)
+                    if not message:
+                        break
+                    buffer += message
+            except BlockingIOError:
+                pass
+            except OSError as err:
+                logger.error(f'Error receiving message: {err}')
+            # keep an incomplete trailing line until the rest arrives
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                line = line.decode(errors='replace').strip()
+                if not line:
+                    continue
+                try:
+                    self._process_line(line, received)
+                except Exception as err:
+                    logger.error(f'Error processing message: {err}')
 
         logger.debug('Closing FIFO pipe')
         os.close(self.pipe_read)
@@ -175,8 +237,10 @@ def sigterm_handle(signum, frame):
     logger.info('Ending processing: Received SIGTERM signal')
     fifo.stopme.set()
     thread_wait_message.join()
-    fifo.message_event.set()
-    thread_process_message.join()
+    with fifo.condition:
+        fifo.condition.notify_all()
+    for thread in threads_process_message:
+        thread.join()
 
 signal.signal(signal.SIGTERM, sigterm_handle)
 
@@ -189,6 +253,8 @@ def sigterm_handle(signum, frame):
 fifo.pipe_create()
 # create and run dedicated threads for reading and processing messages
 thread_wait_message = threading.Thread(target=fifo.pipe_wait)
-thread_process_message = threading.Thread(target=fifo.pipe_process)
+threads_process_message = [threading.Thread(target=fifo.pipe_process)
+                           for _ in range(script_workers)]
 thread_wait_message.start()
-thread_process_message.start()
+for thread in threads_process_message:
+    thread.start()
@@ -18,13 +18,16 @@
 import json
 import re
 import select
+import threading
 
-from copy import deepcopy
+from collections import deque
 from os import getpid, environ
 from pathlib import Path
+from queue import Full, Queue
 from signal import signal, SIGTERM, SIGINT
 from sys import exit
 from systemd import journal
+from time import monotonic
 
 from vyos.utils.dict import dict_search
 from vyos.utils.process import run
@@ -33,6 +36,15 @@
 my_pid = getpid()
 my_name = Path(__file__).stem
 
+# Number of scripts executed in parallel
+script_workers = 4
+# Matched events waiting for a free worker, further events are dropped
+script_queue_size = 1024
+# Interval for reporting script queue metrics (seconds)
+metrics_interval = 60
+# Patterns using backreferences can not be merged into a combined regex
+backreference_re = re.compile(r'\\[1-9]|\(\?P=')
+
 # handle termination signal
 def handle_signal(signal_type, frame):
     if signal_type == SIGTERM:
@@ -44,12 +56,55 @@ def handle_signal(signal_type, frame):
     exit(0)
 
 
+# Patterns sharing the same syslog identifier
+class PatternGroup:
+    def __init__(self) -> None:
+        self.patterns = []
+        # Combined alternation of all mergeable patterns, rejects messages
+        # not matching any of them with a single regex call
+        self.combined = None
+        self.mergeable = []
+        self.unmergeable = []
+
+    def add(self, pattern_config: dict) -> None:
+        self.patterns.append(pattern_config)
+
+    def compile(self) -> None:
+        for pattern_config in self.patterns:
+            if backreference_re.search(pattern_config['pattern_raw']):
+                self.unmergeable.append(pattern_config)
+            else:
+                self.mergeable.append(pattern_config)
+        if len(self.mergeable) > 1:
+            try:
+                self.combined = re.compile('|'.join(
+                    f'(?:{pattern_config["pattern_raw"]})'
+                    for pattern_config in self.mergeable))
+            except re.error:
+                # e.g. the same group name used in different patterns
+                self.combined = None
+
+    # Return all patterns matching the message
+    def match(self, message: str) -> list:
+        matched = []
+        if self.combined is None or self.combined.fullmatch(message):
+            for pattern_config in self.mergeable:
+                if pattern_config['pattern_compiled'].fullmatch(message):
+                    matched.append(pattern_config)
+        for pattern_config in self.unmergeable:
+            if pattern_config['pattern_compiled'].fullmatch(message):
+                matched.append(pattern_config)
+        return matched
+
+
 # Class for analyzing and process messages
 class Analyzer:
     # Initialize settings
     def __init__(self, config: dict) -> None:
-        self.config = {}
-        # Prepare compiled regex objects
+        # Pattern index: syslog identifier -> patterns, None holds the
+        # patterns without a syslog identifier which apply to all messages
+        self.index = {}
+        # config keys are not mangled, see service_event-handler.py
         for event_id, event_config in config.items():
             script = dict_search('script.path', event_config)
             # Check for arguments
@@ -57,29 +112,46 @@ def __init__(self, config: dict) -> None:
                 script_arguments = dict_search('script.arguments', event_config)
                 script = f'{script} {script_arguments}'
             # Prepare environment
-            environment = deepcopy(environ)
+            environment = dict(environ)
             # Check for additional environment options
             if dict_search('script.environment', event_config):
                 for env_variable, env_value in dict_search(
                         'script.environment', event_config).items():
                     environment[env_variable] = env_value.get('value')
+            rate_limit = dict_search('script.rate-limit', event_config)
             # Create final config dictionary
             pattern_raw = event_config['filter']['pattern']
-            pattern_compiled = re.compile(
-                rf'{event_config["filter"]["pattern"]}')
+            syslog_id = dict_search('filter.syslog-identifier', event_config)
             pattern_config = {
-                pattern_compiled: {
-                    'pattern_raw':
-                        pattern_raw,
-                    'syslog_id':
-                        dict_search('filter.syslog-identifier', event_config),
-                    'pattern_script': {
-                        'path': script,
-                        'environment': environment
-                    }
-                }
+                'pattern_raw': pattern_raw,
+                'pattern_compiled': re.compile(rf'{pattern_raw}'),
+                'syslog_id': syslog_id,
+                'pattern_script': {
+                    'path': script,
+                    'environment': environment
+                },
+                # executions per minute
+                'rate_limit': int(rate_limit) if rate_limit else None,
+                'executions': deque(),
             }
-            self.config.update(pattern_config)
+            self.index.setdefault(syslog_id, PatternGroup()).add(pattern_config)
+
+        for group in self.index.values():
+            group.compile()
+
+        self.lock = threading.Lock()
+        self.queue = Queue(maxsize=script_queue_size)
+        self.metrics = {'matched': 0, 'executed': 0, 'failed': 0,
+                        'dropped': 0, 'rate_limited': 0}
+        self.metrics_reported = dict(self.metrics)
+        for _ in range(script_workers):
+            threading.Thread(target=self.script_worker, daemon=True).start()
+
+    # Syslog identifiers to pass to the journal, None if any message can match
+    def syslog_ids(self) -> list:
+        if None in self.index:
+            return None
+        return list(self.index)
 
     # Execute script safely
     def script_run(self, pattern: str, script_path: str,
@@ -89,27 +161,78 @@ def script_run(self, pattern: str, script_path: str,
             journal.send(
                 f'Pattern found: "{pattern}", script executed: "{script_path}"',
                 SYSLOG_IDENTIFIER=my_name)
+            self.count('executed')
         except Exception as err:
             journal.send(
                 f'Pattern found: "{pattern}", failed to execute script "{script_path}": {err}',
                 SYSLOG_IDENTIFIER=my_name)
+            self.count('failed')
+
+    # Worker thread, executes queued scripts
+    def script_worker(self) -> None:
+        while True:
+            pattern_config, message = self.queue.get()
+            # Add message to environment variables
+            environment = dict(pattern_config['pattern_script']['environment'])
+            environment['message'] = message
+            self.script_run(
+                pattern=pattern_config['pattern_raw'],
+                script_path=pattern_config['pattern_script']['path'],
+                script_env=environment)
+            self.queue.task_done()
+
+    def count(self, metric: str) -> None:
+        with self.lock:
+            self.metrics[metric] += 1
+
+    # Check and account the per pattern rate limit
+    def rate_limited(self, pattern_config: dict) -> bool:
+        rate_limit = pattern_config['rate_limit']
+        if not rate_limit:
+            return False
+        now = monotonic()
+        executions = pattern_config['executions']
+        while executions and executions[0] <= now - 60:
+            executions.popleft()
+        if len(executions) >= rate_limit:
+            return True
+        executions.append(now)
+        return False
+
+    # Queue the script of a matched pattern
+    def schedule(self, pattern_config: dict, message: str) -> None:
+        self.count('matched')
+        if self.rate_limited(pattern_config):
+            self.count('rate_limited')
+            return
+        try:
+            self.queue.put_nowait((pattern_config, message))
+        except Full:
+            self.count('dropped')
+
+    # Report script queue metrics if anything changed since the last report
+    def report_metrics(self) -> None:
+        with self.lock:
+            metrics = dict(self.metrics)
+        if metrics == self.metrics_reported and self.queue.empty():
+            return
+        self.metrics_reported = metrics
+        journal.send(
+            f'Script queue depth {self.queue.qsize()}/{script_queue_size}, '
+            f'matched {metrics["matched"]}, executed {metrics["executed"]}, '
+            f'failed {metrics["failed"]}, dropped {metrics["dropped"]}, '
+            f'rate limited {metrics["rate_limited"]}',
+            SYSLOG_IDENTIFIER=my_name)
 
     # Analyze a message
     def process_message(self, message: dict) -> None:
-        for pattern_compiled, pattern_config in self.config.items():
-            # Check if syslog id is presented in config and matches
-            syslog_id = pattern_config.get('syslog_id')
-            if syslog_id and message['SYSLOG_IDENTIFIER'] != syslog_id:
+        text = message['MESSAGE']
+        syslog_id = message.get('SYSLOG_IDENTIFIER')
+        for group in [self.index.get(syslog_id), self.index.get(None)]:
+            if group is None:
                 continue
-            if pattern_compiled.fullmatch(message['MESSAGE']):
-                # Add message to environment variables
-                pattern_config['pattern_script']['environment'][
-                    'message'] = message['MESSAGE']
-                # Run script
-                self.script_run(
-                    pattern=pattern_config['pattern_raw'],
-                    script_path=pattern_config['pattern_script']['path'],
-                    script_env=pattern_config['pattern_script']['environment'])
+            for pattern_config in group.match(text):
+                self.schedule(pattern_config, text)
 
 
 if __name__ == '__main__':
@@ -140,6 +263,11 @@ def process_message(self, message: dict) -> None:
 
     # Set up journal connection
     data = journal.Reader()
+    # Let the journal skip messages from processes without any pattern
+    syslog_ids = analyzer.syslog_ids()
+    if syslog_ids:
+        for syslog_id in syslog_ids:
+            data.add_match(SYSLOG_IDENTIFIER=syslog_id)
     data.seek_tail()
     data.get_previous()
     p = select.poll()
@@ -148,7 +276,12 @@ def process_message(self, message: dict) -> None:
     journal.send(f'Started with configuration: {config}',
                  SYSLOG_IDENTIFIER=my_name)
 
-    while p.poll():
+    next_report = monotonic() + metrics_interval
+    while True:
+        p.poll(metrics_interval * 1000)
+        if monotonic() >= next_report:
+            next_report = monotonic() + metrics_interval
+            analyzer.report_metrics()
         if data.process() != journal.APPEND:
             continue
         for entry in data:
@@ -158,7 +291,7 @@ def process_message(self, message: dict) -> None:
                 pid = entry['_PID']
             except Exception as ex:
                 journal.send(f'Unable to extract PID from message entry: {entry}', SYSLOG_IDENTIFIER=my_name)
-                continue            
+                continue
             # Skip empty messages and messages from this process
             if message and pid != my_pid:
                 try:
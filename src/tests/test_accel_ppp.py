@@ -0,0 +1,161 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import socket
+import threading
+
+from unittest import TestCase
+
+from vyos.accel_ppp import AccelClient
+from vyos.accel_ppp import get_client
+from vyos.accel_ppp import get_server_statistics
+from vyos.accel_ppp import parse_statistics
+
+statistics = '''uptime: 0.00:12:15
+cpu: 3%
+mem(rss/virt): 5000/100000 kB
+sessions:
+  starting: 0
+  active: 3
+  finishing: 0
+pppoe:
+  starting: 1
+  active: 2
+'''
+
+sessions = ''' ifname | username |      ip       | state
+--------+----------+---------------+--------
+ ppp0   | alice    | 192.0.2.10    | active
+ ppp1   | bob      | 192.0.2.11    | active
+ ppp2   | carol    | 192.0.2.12    | active
+'''
+
+class AccelServer:
+    """
+    accel-ppp TCP CLI answering the commands in replies, the output is sent
+    with CRLF line endings in small pieces
+    """
+    def __init__(self, replies):
+        self.replies = dict(replies, **{'show version': 'accel-ppp version 1.12.0\n'})
+        self.commands = []
+        self.connections = []
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            with conn.makefile('rb') as f:
+                for line in f:
+                    command = line.decode().strip()
+                    self.commands.append(command)
+                    reply = self.replies.get(command, 'unknown command\n')
+                    data = reply.replace('\n', '\r\n').encode()
+                    for i in range(0, len(data), 7):
+                        conn.sendall(data[i:i + 7])
+        except OSError:
+            pass
+
+    def drop(self):
+        """ Close all connections, like a restart of accel-ppp """
+        for conn in self.connections:
+            conn.shutdown(socket.SHUT_RDWR)
+            conn.close()
+        self.connections.clear()
+
+    def close(self):
+        self.drop()
+        self.sock.close()
+
+class TestVyOSAccelPPP(TestCase):
+    def setUp(self):
+        self.server = AccelServer({'show stat': statistics, 'show sessions': sessions,
+                                   'show sessions ifname,username,ip,state': sessions,
+                                   'show empty': ''})
+        self.client = AccelClient(self.server.port, timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_execute(self):
+        # the reply to the end marker command is not part of the output
+        self.assertEqual(self.client.execute('show stat'), statistics.rstrip('\n'))
+        self.assertEqual(self.client.execute('show empty'), '')
+        self.assertEqual(self.client.execute('show stat'), statistics.rstrip('\n'))
+        # one connection for all commands
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.server.commands,
+                         ['show version'] + ['show stat', 'show version',
+                                             'show empty', 'show version',
+                                             'show stat', 'show version'])
+
+    def test_early_stop(self):
+        lines = self.client.stream('show sessions')
+        self.assertEqual(next(lines), sessions.splitlines()[0])
+        lines.close()
+        # the rest of the output was skipped
+        self.assertEqual(self.client.execute('show stat'), statistics.rstrip('\n'))
+
+    def test_reconnect(self):
+        self.client.execute('show stat')
+        self.server.drop()
+        self.assertEqual(self.client.execute('show stat'), statistics.rstrip('\n'))
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_sessions(self):
+        columns = ['ifname', 'username', 'ip', 'state']
+        result = list(self.client.sessions(columns))
+        self.assertEqual([s['username'] for s in result], ['alice', 'bob', 'carol'])
+        self.assertEqual(result[0], {'ifname': 'ppp0', 'username': 'alice',
+                                     'ip': '192.0.2.10', 'state': 'active'})
+
+        result = list(self.client.sessions(columns, limit=2))
+        self.assertEqual([s['ifname'] for s in result], ['ppp0', 'ppp1'])
+        self.assertEqual(self.client.execute('show stat'), statistics.rstrip('\n'))
+
+        list(self.client.sessions(['ifname'], match=('username', 'al.*'), order='ip'))
+        self.assertIn('show sessions ifname order ip match username al.*', self.server.commands)
+        for regex in ['a b', 'a;reboot', 'a\nshutdown', '$(id)']:
+            with self.assertRaises(ValueError):
+                list(self.client.sessions(['ifname'], match=('username', regex)))
+
+    def test_get_client(self):
+        client = get_client(self.server.port)
+        self.assertIs(get_client(self.server.port), client)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_client(self.server.port)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], client)
+
+    def test_parse_statistics(self):
+        result = parse_statistics(statistics)
+        self.assertEqual(result['uptime'], '0.00:12:15')
+        self.assertEqual(result['mem(rss/virt)'], '5000/100000 kB')
+        self.assertEqual(result['sessions'], {'starting': '0', 'active': '3', 'finishing': '0'})
+        self.assertEqual(result['pppoe'], {'starting': '1', 'active': '2'})
+
+        self.assertEqual(get_server_statistics(statistics, 'pppoe:'),
+                         {'cpu_load_percentage': 3,
+                          'sessions': {'starting': '1', 'active': '2'}})
@@ -0,0 +1,109 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+
+from pathlib import Path
+from time import monotonic
+from unittest import TestCase
+from unittest.mock import patch
+
+from vyos.bootplan import BootPlan
+from vyos.utils.process import command_stats_start
+from vyos.utils.process import command_stats_stop
+from vyos.utils.process import run
+
+class TestVyOSBootPlan(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.plan_file = os.path.join(self.tmp.name, 'plan.json')
+        self.timeline_file = os.path.join(self.tmp.name, 'timeline.json')
+        self.artefact = os.path.join(self.tmp.name, 'service.conf')
+        command_stats_start()
+
+    def tearDown(self):
+        command_stats_stop()
+        self.tmp.cleanup()
+
+    def _boot(self, config, generate):
+        plan = BootPlan.load(self.plan_file)
+        skipped = plan.can_skip_generate('service', config)
+        if not skipped:
+            with plan.record_generate('service', config):
+                generate(config)
+        plan.add_timeline('service', monotonic(), {'apply': 0.0}, skipped)
+        plan.save(self.plan_file, self.timeline_file)
+        return skipped
+
+    def _generate(self, config):
+        with open(self.artefact, 'w') as f:
+            f.write(config['name'])
+
+    def test_skip_unchanged(self):
+        config = {'name': 'foo'}
+        self.assertFalse(self._boot(config, self._generate))
+        self.assertTrue(self._boot(config, self._generate))
+        # entries of skipped scripts are carried over to the next boot
+        self.assertTrue(self._boot(config, self._generate))
+
+        self.assertFalse(self._boot({'name': 'bar'}, self._generate))
+        self.assertTrue(self._boot({'name': 'bar'}, self._generate))
+
+        with open(self.artefact, 'w') as f:
+            f.write('changed')
+        self.assertFalse(self._boot({'name': 'bar'}, self._generate))
+
+    def test_not_skippable(self):
+        def generate_command(config):
+            self._generate(config)
+            run('true')
+
+        def generate_modify(config):
+            config['generated'] = True
+
+        for generate in [generate_command, generate_modify]:
+            self.assertFalse(self._boot({'name': 'foo'}, generate))
+            self.assertFalse(self._boot({'name': 'foo'}, generate))
+
+    def test_pathlib_write(self):
+        def generate_pathlib(config):
+            Path(self.artefact).write_text(config['name'])
+
+        self.assertFalse(self._boot({'name': 'foo'}, generate_pathlib))
+        os.unlink(self.artefact)
+        self.assertFalse(self._boot({'name': 'foo'}, generate_pathlib))
+        self.assertTrue(os.path.isfile(self.artefact))
+        self.assertTrue(self._boot({'name': 'foo'}, generate_pathlib))
+
+    def test_untracked_calls(self):
+        link = os.path.join(self.tmp.name, 'link')
+
+        def generate_symlink(config):
+            self._generate(config)
+            if os.path.lexists(link):
+                os.unlink(link)
+            os.symlink(self.artefact, link)
+
+        def generate_unlink(config):
+            Path(self.artefact).unlink(missing_ok=True)
+
+        for generate in [generate_symlink, generate_unlink]:
+            self.assertFalse(self._boot({'name': 'foo'}, generate))
+            self.assertFalse(self._boot({'name': 'foo'}, generate))
+
+    def test_volatile_artefact(self):
+        with patch('vyos.bootplan.volatile_dirs', (self.tmp.name + '/',)):
+            self.assertFalse(self._boot({'name': 'foo'}, self._generate))
+            self.assertFalse(self._boot({'name': 'foo'}, self._generate))
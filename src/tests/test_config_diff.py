@@ -65,3 +65,12 @@ def test_identity(self):
                          self.config_right.to_string(ordered_values=True))
         self.assertEqual(l_union.to_string(),
                          self.config_left.to_string(ordered_values=True))
+
+    def test_iter_commands(self):
+        lr_diff = vyos.configtree.DiffTree(self.config_left,
+                                           self.config_right)
+
+        commands = [c for c in lr_diff.to_commands().splitlines() if c]
+        chunks = list(lr_diff.iter_commands(chunk_size=3))
+        self.assertTrue(all(0 < len(chunk) <= 3 for chunk in chunks))
+        self.assertEqual([c for chunk in chunks for c in chunk], commands)
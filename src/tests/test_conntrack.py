@@ -0,0 +1,113 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import socket
+import struct
+
+from unittest import TestCase
+
+from vyos.conntrack import CTA_FILTER
+from vyos.conntrack import CTA_MARK
+from vyos.conntrack import CTA_PROTOINFO
+from vyos.conntrack import CTA_PROTOINFO_TCP
+from vyos.conntrack import CTA_PROTO_DST_PORT
+from vyos.conntrack import CTA_PROTO_NUM
+from vyos.conntrack import CTA_PROTO_SRC_PORT
+from vyos.conntrack import CTA_TUPLE_IP
+from vyos.conntrack import CTA_TUPLE_ORIG
+from vyos.conntrack import CTA_TUPLE_PROTO
+from vyos.conntrack import CTA_TUPLE_REPLY
+from vyos.conntrack import IPCTNL_MSG_CT_NEW
+from vyos.conntrack import IP_TUPLE_KEYS
+from vyos.conntrack import ConntrackFilter
+from vyos.conntrack import decode_flow
+from vyos.conntrack import nla
+from vyos.conntrack import nla_table
+from vyos.conntrack import nlmsg
+from vyos.conntrack import raw_flow
+
+def _tuple(family, src, dst, sport, dport):
+    src_key, dst_key = IP_TUPLE_KEYS[family]
+    ip = nla(src_key, socket.inet_pton(family, src)) + \
+         nla(dst_key, socket.inet_pton(family, dst))
+    l4 = nla(CTA_PROTO_NUM, bytes([socket.IPPROTO_TCP])) + \
+         nla(CTA_PROTO_SRC_PORT, struct.pack('!H', sport)) + \
+         nla(CTA_PROTO_DST_PORT, struct.pack('!H', dport))
+    return nla(CTA_TUPLE_IP, ip, nested=True) + nla(CTA_TUPLE_PROTO, l4, nested=True)
+
+def _flow(family, src, dst, sport, dport):
+    attrs = nla(CTA_TUPLE_ORIG, _tuple(family, src, dst, sport, dport), nested=True)
+    attrs += nla(CTA_TUPLE_REPLY, _tuple(family, dst, src, dport, sport), nested=True)
+    attrs += nla(CTA_MARK, struct.pack('!I', 10))
+    attrs += nla(CTA_PROTOINFO, nla(CTA_PROTOINFO_TCP, nla(1, bytes([3])), nested=True), nested=True)
+    return nlmsg(IPCTNL_MSG_CT_NEW, 0, family, attrs)
+
+class TestVyOSConntrack(TestCase):
+    def test_decode_flow(self):
+        data = _flow(socket.AF_INET6, '2001:db8::1', '2001:db8::2', 40000, 22)
+        entry = decode_flow(data, 0, len(data))
+
+        self.assertEqual(entry['family'], 'inet6')
+        self.assertEqual(entry['protocol'], 'tcp')
+        self.assertEqual(entry['state'], 'ESTABLISHED')
+        self.assertEqual(entry['mark'], 10)
+        self.assertIsNone(entry['timeout'])
+        self.assertEqual(entry['original'], {'src': '2001:db8::1', 'dst': '2001:db8::2',
+                                             'sport': 40000, 'dport': 22})
+        self.assertEqual(entry['reply']['sport'], 22)
+
+    def test_filter_match(self):
+        data = _flow(socket.AF_INET, '192.0.2.10', '198.51.100.1', 40000, 443)
+        entry = decode_flow(data, 0, len(data))
+
+        self.assertTrue(ConntrackFilter(family='inet', source='192.0.2.0/24').match(entry))
+        self.assertTrue(ConntrackFilter(protocol='6', destination_port=443,
+                                        state='established').match(entry))
+        self.assertFalse(ConntrackFilter(protocol='udp').match(entry))
+        self.assertFalse(ConntrackFilter(destination='198.51.100.2').match(entry))
+        self.assertFalse(ConntrackFilter(mark=11).match(entry))
+
+    def test_filter_request(self):
+        # prefixes are matched in userspace only
+        self.assertEqual(ConntrackFilter(family='inet', source='192.0.2.0/24').request_attrs(), b'')
+
+        attrs = ConntrackFilter(family='inet', source='192.0.2.10', protocol='tcp',
+                                destination_port=443).request_attrs()
+        table = nla_table(attrs, 0, len(attrs))
+        self.assertIn(CTA_TUPLE_ORIG, table)
+        self.assertIn(CTA_FILTER, table)
+
+        with self.assertRaises(ValueError):
+            ConntrackFilter(family='inet', source='2001:db8::1')
+        with self.assertRaises(ValueError):
+            ConntrackFilter(protocol='no-such-protocol')
+
+    def test_raw_flow(self):
+        data = _flow(socket.AF_INET, '192.0.2.10', '198.51.100.1', 40000, 443)
+        entry = decode_flow(data, 0, len(data))
+        entry['original'].update({'packets': 3, 'bytes': 180})
+
+        # layout of `conntrack --output xml` converted by xmltodict
+        flow = raw_flow(entry)
+        original, reply, independent = flow['meta']
+        self.assertEqual(original['direction'], 'original')
+        self.assertEqual(original['layer3'], {'protonum': '2', 'protoname': 'ipv4',
+                                              'src': '192.0.2.10', 'dst': '198.51.100.1'})
+        self.assertEqual(original['layer4'], {'protonum': '6', 'protoname': 'tcp',
+                                              'sport': '40000', 'dport': '443'})
+        self.assertEqual(original['counters'], {'packets': '3', 'bytes': '180'})
+        self.assertNotIn('counters', reply)
+        self.assertEqual(reply['layer4']['sport'], '443')
+        self.assertEqual(independent, {'direction': 'independent', 'state': 'ESTABLISHED',
+                                       'mark': '10', 'unreplied': None})
@@ -0,0 +1,96 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import importlib.util
+import os
+import sys
+
+from queue import Queue
+from unittest import TestCase
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+base_dir = os.path.join(os.path.dirname(__file__), '..')
+
+def load_script(path, name):
+    # python3-systemd is not a build dependency, the journal is only read
+    # by the main loop which is not tested
+    stubs = {}
+    try:
+        import systemd.journal
+    except ImportError:
+        journal = MagicMock()
+        stubs = {'systemd': MagicMock(journal=journal), 'systemd.journal': journal}
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(base_dir, path))
+    module = importlib.util.module_from_spec(spec)
+    with patch.dict(sys.modules, stubs):
+        spec.loader.exec_module(module)
+    return module
+
+event_handler = load_script('system/vyos-event-handler.py', 'vyos_event_handler')
+
+class TestVyOSEventHandler(TestCase):
+    def setUp(self):
+        # config as written by service_event-handler.py: get_config_dict()
+        # without key mangling
+        self.config = {
+            'sshd-login': {
+                'filter': {'pattern': 'Accepted .* for (\\w+)',
+                           'syslog-identifier': 'sshd'},
+                'script': {'path': '/bin/true', 'rate-limit': '2',
+                           'environment': {'FOO': {'value': 'bar'}}},
+            },
+            'any-error': {
+                'filter': {'pattern': '.*error.*'},
+                'script': {'path': '/bin/true', 'arguments': '--quiet'},
+            },
+        }
+        self.analyzer = event_handler.Analyzer(self.config)
+        # do not hand jobs to the worker threads
+        self.analyzer.queue = Queue()
+
+    def _queued(self):
+        jobs = []
+        while not self.analyzer.queue.empty():
+            jobs.append(self.analyzer.queue.get_nowait())
+        return [(pattern['pattern_raw'], message) for pattern, message in jobs]
+
+    def test_syslog_identifier(self):
+        self.assertEqual(self.analyzer.syslog_ids(), None)
+        self.assertEqual(set(self.analyzer.index), {'sshd', None})
+
+        login = 'Accepted publickey for vyos'
+        self.analyzer.process_message({'MESSAGE': login, 'SYSLOG_IDENTIFIER': 'sshd'})
+        self.analyzer.process_message({'MESSAGE': login, 'SYSLOG_IDENTIFIER': 'su'})
+        self.assertEqual(self._queued(), [('Accepted .* for (\\w+)', login)])
+
+        self.analyzer.process_message({'MESSAGE': 'an error', 'SYSLOG_IDENTIFIER': 'su'})
+        self.assertEqual(self._queued(), [('.*error.*', 'an error')])
+
+    def test_script_config(self):
+        pattern = self.analyzer.index['sshd'].patterns[0]
+        self.assertEqual(pattern['rate_limit'], 2)
+        self.assertEqual(pattern['pattern_script']['environment']['FOO'], 'bar')
+        pattern = self.analyzer.index[None].patterns[0]
+        self.assertEqual(pattern['rate_limit'], None)
+        self.assertEqual(pattern['pattern_script']['path'], '/bin/true --quiet')
+
+    def test_rate_limit(self):
+        login = {'MESSAGE': 'Accepted password for vyos', 'SYSLOG_IDENTIFIER': 'sshd'}
+        for _ in range(3):
+            self.analyzer.process_message(login)
+        self.assertEqual(len(self._queued()), 2)
+        self.assertEqual(self.analyzer.metrics['matched'], 3)
+        self.assertEqual(self.analyzer.metrics['rate_limited'], 1)
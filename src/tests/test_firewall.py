@@ -0,0 +1,96 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest import TestCase
+
+from vyos.firewall import merge_group_members
+from vyos.firewall import resolve_firewall_groups
+from vyos.firewall import resolve_nested_groups
+
+class TestVyOSFirewallGroups(TestCase):
+    def test_merge_overlapping(self):
+        self.assertEqual(merge_group_members(['192.0.2.1-192.0.2.10', '192.0.2.5-192.0.2.20'], 'ipv4'),
+                         ['192.0.2.1-192.0.2.20'])
+        self.assertEqual(merge_group_members(['192.0.2.7', '192.0.2.0/24', '192.0.2.7'], 'ipv4'),
+                         ['192.0.2.0/24'])
+        self.assertEqual(merge_group_members(['100-200', '150', '180-300'], 'port'), ['100-300'])
+
+    def test_merge_adjacent(self):
+        self.assertEqual(merge_group_members(['192.0.2.0-192.0.2.9', '192.0.2.10'], 'ipv4'),
+                         ['192.0.2.0-192.0.2.10'])
+        self.assertEqual(merge_group_members(['80', '81', '82-90', '92'], 'port'), ['80-90', '92'])
+        # not adjacent
+        self.assertEqual(merge_group_members(['192.0.2.1', '192.0.2.3'], 'ipv4'),
+                         ['192.0.2.1', '192.0.2.3'])
+
+    def test_merge_prefixes(self):
+        # ranges matching a prefix are rendered as prefix
+        self.assertEqual(merge_group_members(['192.0.2.0/25', '192.0.2.128/25'], 'ipv4'),
+                         ['192.0.2.0/24'])
+        self.assertEqual(merge_group_members(['2001:db8::/64', '2001:db8:0:1::/64'], 'ipv6'),
+                         ['2001:db8::/63'])
+        self.assertEqual(merge_group_members(['198.51.100.0/24', '192.0.2.0/24'], 'ipv4'),
+                         ['192.0.2.0/24', '198.51.100.0/24'])
+        # members of the other address family are kept as is
+        self.assertEqual(merge_group_members(['192.0.2.1', '2001:db8::1'], 'ipv4'),
+                         ['192.0.2.1', '2001:db8::1'])
+
+    def test_merge_ports_and_services(self):
+        self.assertEqual(merge_group_members(['443', 'http', '80', '81', 'ssh'], 'port'),
+                         ['80-81', '443', 'http', 'ssh'])
+
+    def test_resolve_nested(self):
+        groups = {
+            'A': {'port': ['22'], 'include': ['B', 'C']},
+            'B': {'port': ['80', '81'], 'include': ['C']},
+            'C': {'port': ['82', 'http']},
+            'D': None,
+        }
+        self.assertEqual(resolve_nested_groups(groups, 'port', 'port'),
+                         {'A': ['22', '80-82', 'http'], 'B': ['80-82', 'http'],
+                          'C': ['82', 'http'], 'D': []})
+        # without a kind only duplicates are removed
+        self.assertEqual(resolve_nested_groups(groups, 'port')['A'],
+                         ['22', '80', '81', '82', 'http'])
+
+    def test_resolve_cycle(self):
+        groups = {
+            'A': {'address': ['192.0.2.1'], 'include': ['B']},
+            'B': {'address': ['192.0.2.2'], 'include': ['A']},
+        }
+        with self.assertRaises(ValueError) as e:
+            resolve_nested_groups(groups, 'address', 'ipv4')
+        self.assertIn('circular reference', str(e.exception))
+
+        resolved = resolve_nested_groups(groups, 'address', 'ipv4', strict=False)
+        self.assertEqual(resolved['A'], ['192.0.2.1-192.0.2.2'])
+
+    def test_resolve_missing(self):
+        groups = {'A': {'interface': ['eth0'], 'include': ['B']}}
+        with self.assertRaises(ValueError) as e:
+            resolve_nested_groups(groups, 'interface')
+        self.assertIn('"B" does not exist', str(e.exception))
+
+        self.assertEqual(resolve_nested_groups(groups, 'interface', strict=False),
+                         {'A': ['eth0']})
+
+    def test_resolve_firewall_groups(self):
+        group = {
+            'network_group': {'N': {'network': ['192.0.2.0/25'], 'include': ['M', 'X']},
+                              'M': {'network': ['192.0.2.128/25']}},
+            'domain_group': {'D': {'address': ['vyos.io']}},
+        }
+        resolve_firewall_groups(group)
+        self.assertEqual(group['resolved'], {'network_group': {'N': ['192.0.2.0/24'],
+                                                               'M': ['192.0.2.128/25']}})
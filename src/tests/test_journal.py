@@ -0,0 +1,184 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+
+from datetime import datetime
+from datetime import timedelta
+from unittest import TestCase
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import UUID
+
+from vyos.utils.journal import journalctl_args
+from vyos.utils.journal import read_journal
+
+boot_id = UUID('0123456789abcdef0123456789abcdef')
+start = datetime(2025, 1, 1, 12, 0, 0)
+
+class Reader:
+    """
+    Minimal systemd.journal.Reader over the entries in the class attribute.
+    The position is the gap before entry "pos", like the journal's after a
+    seek, except that after seek_cursor() both directions return the entry
+    at the cursor.
+    """
+    entries = []
+
+    def __init__(self):
+        self.matches = {}
+        self.level = None
+        self.pos = 0
+        self.pending = None
+        self.current = None
+
+    def _visible(self):
+        return [entry for entry in self.entries
+                if all(str(entry.get(key)) == value for key, value in self.matches.items())
+                and (self.level is None or entry['PRIORITY'] <= self.level)]
+
+    def this_boot(self):
+        self.matches['_BOOT_ID'] = str(boot_id)
+
+    def add_match(self, **kwargs):
+        self.matches.update(kwargs)
+
+    def log_level(self, level):
+        self.level = level
+
+    def seek_head(self):
+        self.pos = 0
+
+    def seek_tail(self):
+        self.pos = len(self._visible())
+
+    def seek_realtime(self, time):
+        self.pos = len([e for e in self._visible() if e['__REALTIME_TIMESTAMP'] < time])
+
+    def seek_cursor(self, cursor):
+        entries = self._visible()
+        self.pending = [e['__CURSOR'] for e in entries].index(cursor)
+
+    def test_cursor(self, cursor):
+        return self.current is not None and self.current['__CURSOR'] == cursor
+
+    def _get(self, index, pos):
+        entries = self._visible()
+        self.pending = None
+        if not 0 <= index < len(entries):
+            return {}
+        self.pos = pos
+        self.current = entries[index]
+        return self.current
+
+    def get_next(self):
+        index = self.pending if self.pending is not None else self.pos
+        return self._get(index, index + 1)
+
+    def get_previous(self):
+        index = self.pending if self.pending is not None else self.pos - 1
+        return self._get(index, index)
+
+def _entry(n, **kwargs):
+    entry = {
+        '__REALTIME_TIMESTAMP': start + timedelta(minutes=n),
+        '__CURSOR': f's=1;i={n}',
+        '_BOOT_ID': boot_id,
+        'MESSAGE': f'message {n}',
+        'PRIORITY': 6,
+        'SYSLOG_FACILITY': 3,
+        '_SYSTEMD_UNIT': 'cron.service',
+    }
+    entry.update(kwargs)
+    return entry
+
+class TestVyOSJournal(TestCase):
+    def setUp(self):
+        Reader.entries = [_entry(n) for n in range(10)]
+        Reader.entries[4].update(PRIORITY=3, _SYSTEMD_UNIT='ssh.service', SYSLOG_FACILITY=4)
+        Reader.entries[7].update(PRIORITY=2, _SYSTEMD_UNIT='ssh.service', SYSLOG_FACILITY=4)
+        journal = MagicMock(Reader=Reader)
+        modules = {'systemd': MagicMock(journal=journal), 'systemd.journal': journal}
+        self.modules = patch.dict(sys.modules, modules)
+        self.modules.start()
+
+    def tearDown(self):
+        self.modules.stop()
+
+    def _messages(self, entries):
+        return [int(entry['MESSAGE'].split()[-1]) for entry in entries]
+
+    def test_entry(self):
+        entry = next(read_journal(count=1))
+        self.assertEqual(entry['MESSAGE'], 'message 9')
+        self.assertEqual(entry['PRIORITY'], '6')
+        self.assertEqual(entry['_BOOT_ID'], boot_id.hex)
+        self.assertEqual(entry['__REALTIME_TIMESTAMP'],
+                         str(round((start + timedelta(minutes=9)).timestamp() * 1000000)))
+
+    def test_count(self):
+        # the last entries in chronological order
+        self.assertEqual(self._messages(read_journal(count=3)), [7, 8, 9])
+        self.assertEqual(self._messages(read_journal(count=3, reverse=True)), [9, 8, 7])
+        self.assertEqual(self._messages(read_journal()), list(range(10)))
+
+    def test_matches(self):
+        self.assertEqual(self._messages(read_journal(unit='ssh')), [4, 7])
+        self.assertEqual(self._messages(read_journal(facility='auth')), [4, 7])
+        self.assertEqual(self._messages(read_journal(priority='crit')), [7])
+        self.assertEqual(self._messages(read_journal(priority='3', unit='ssh.service')), [4, 7])
+
+    def test_time_range(self):
+        since = str(start + timedelta(minutes=2, seconds=30))
+        until = str(start + timedelta(minutes=6, seconds=30))
+        self.assertEqual(self._messages(read_journal(since=since, until=until)), [3, 4, 5, 6])
+        self.assertEqual(self._messages(read_journal(since=since, count=2)), [3, 4])
+        self.assertEqual(self._messages(read_journal(until=until, count=2)), [5, 6])
+        self.assertEqual(self._messages(read_journal(since=since, until=until, reverse=True)),
+                         [6, 5, 4, 3])
+
+    def test_cursor(self):
+        page = list(read_journal(since=str(start), count=4))
+        self.assertEqual(self._messages(page), [0, 1, 2, 3])
+        page = list(read_journal(cursor=page[-1]['__CURSOR'], count=4))
+        self.assertEqual(self._messages(page), [4, 5, 6, 7])
+        page = list(read_journal(cursor=page[-1]['__CURSOR'], count=4))
+        self.assertEqual(self._messages(page), [8, 9])
+
+        page = list(read_journal(cursor='s=1;i=5', count=2, reverse=True))
+        self.assertEqual(self._messages(page), [4, 3])
+
+    def test_invalid(self):
+        # raised before the first entry is read
+        with self.assertRaisesRegex(ValueError, 'Unknown syslog facility'):
+            read_journal(facility='nosuch')
+        with self.assertRaisesRegex(ValueError, 'Unknown syslog priority'):
+            read_journal(priority='8')
+        with self.assertRaisesRegex(ValueError, 'Invalid time'):
+            read_journal(since='yesterday')
+        with self.assertRaises(ValueError):
+            read_journal(count=0)
+
+    def test_journalctl_args(self):
+        self.assertEqual(journalctl_args(boot=True, count=10, facility='auth', priority='err',
+                                         since='2025-01-01 10:00', unit='ssh'),
+                         ['--no-hostname', '--quiet', '--boot', '--lines=10',
+                          '--since=2025-01-01 10:00', '--unit=ssh', '--facility=4',
+                          '--priority=3'])
+        self.assertEqual(journalctl_args(cursor='s=1;i=5" --file=/etc/shadow'),
+                         ['--no-hostname', '--quiet', '--after-cursor=s=1;i=5" --file=/etc/shadow'])
+        with self.assertRaises(ValueError):
+            journalctl_args(since='"; reboot; "')
+        with self.assertRaises(ValueError):
+            journalctl_args(priority='err; reboot')
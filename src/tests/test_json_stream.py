@@ -0,0 +1,62 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from io import StringIO
+from json import dumps
+from unittest import TestCase
+
+from vyos.utils.json_stream import iter_json_members
+from vyos.utils.process import cmd_json_stream
+
+class TestVyOSJSONStream(TestCase):
+    def test_members(self):
+        table = {f'10.0.{i}.0/24': [{'metric': i * 1000, 'selected': i % 2 == 0}]
+                 for i in range(100)}
+        document = dumps({'vrfId': 0, 'routes': table, 'totalRoutes': 100, 'ratio': 1.5e10},
+                         indent=2)
+
+        # small chunks split keys, strings and numbers
+        for chunk_size in [1, 7, 65536]:
+            meta = {}
+            members = iter_json_members(StringIO(document), ['routes'], meta, chunk_size)
+            self.assertEqual({keys[-1]: value for keys, value in members}, table)
+            self.assertEqual(meta, {'vrfId': 0, 'totalRoutes': 100, 'ratio': 1.5e10})
+
+    def test_wildcard_and_arrays(self):
+        document = StringIO('{"red": {"a": [1]}, "blue": {"b": [2, 3]}}')
+        self.assertEqual(list(iter_json_members(document, [None])),
+                         [(('red', 'a'), [1]), (('blue', 'b'), [2, 3])])
+
+        document = StringIO('[{"a": 1}, {"a": 2}]')
+        self.assertEqual(list(iter_json_members(document, [1])), [((1, 'a'), 2)])
+
+    def test_invalid(self):
+        self.assertEqual(list(iter_json_members(StringIO(' \n'))), [])
+
+        with self.assertRaisesRegex(ValueError, '% Unknown command'):
+            list(iter_json_members(StringIO('% Unknown command: show foo\n')))
+        with self.assertRaises(ValueError):
+            list(iter_json_members(StringIO('{"a": 1,')))
+
+    def test_cmd_json_stream(self):
+        # warnings on stderr are not parsed
+        command = ['sh', '-c', 'echo warning >&2; echo \'{"a": {"b": 1}}\'']
+        self.assertEqual(list(cmd_json_stream(command, ['a'])), [(('a', 'b'), 1)])
+
+        command = ['sh', '-c', 'echo \'{"a": {}}\'; echo "no such table" >&2; exit 2']
+        with self.assertRaisesRegex(OSError, 'no such table') as e:
+            list(cmd_json_stream(command, ['a']))
+        self.assertEqual(e.exception.errno, 2)
+        with self.assertRaisesRegex(OSError, 'exit code 1'):
+            list(cmd_json_stream(['false']))
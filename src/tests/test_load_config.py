@@ -0,0 +1,163 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from vyos.configtree import ConfigTreeError
+from vyos.load_config import apply_commands
+from vyos.load_config import command_re
+from vyos.load_config import load_failed_re
+
+# reference tree: node -> (type, multi, valueless), children of tag nodes
+# are listed below the tag node without the tag value
+reference = {
+    ('interfaces',): ('node', False, False),
+    ('interfaces', 'ethernet'): ('tag', False, False),
+    ('interfaces', 'ethernet', 'address'): ('leaf', True, False),
+    ('interfaces', 'ethernet', 'description'): ('leaf', False, False),
+    ('interfaces', 'ethernet', 'disable'): ('leaf', False, True),
+    ('service',): ('node', False, False),
+    ('service', 'ssh'): ('node', False, False),
+}
+
+def _ref_node(path: list) -> tuple:
+    ref_path = []
+    rest = list(path)
+    while rest:
+        ref_path.append(rest.pop(0))
+        node = reference.get(tuple(ref_path))
+        if node is None:
+            raise ValueError('non-existent node data')
+        if node[0] == 'tag' and rest:
+            if len(rest) == 1:
+                return ('tag_value', False, False)
+            rest.pop(0)
+    return reference[tuple(ref_path)]
+
+class FakeTree:
+    """ Records the operations of apply_commands() """
+    def __init__(self, paths=()):
+        self.ops = []
+        self.paths = set(paths)
+
+    def set(self, path, value=None, replace=True):
+        self.ops.append(('set', path, value, replace))
+
+    def delete(self, path):
+        if tuple(path) not in self.paths:
+            raise ConfigTreeError(f"Path doesn't exist: {path}")
+        self.ops.append(('delete', path))
+
+    def delete_value(self, path, value):
+        self.ops.append(('delete_value', path, value))
+
+    def set_tag(self, path, value=True):
+        self.ops.append(('set_tag', path))
+
+@patch('vyos.load_config.is_tag', lambda path: _ref_node(path)[0] == 'tag')
+@patch('vyos.load_config.is_leaf', lambda path: _ref_node(path)[0] == 'leaf')
+@patch('vyos.load_config.is_multi', lambda path: _ref_node(path)[1])
+@patch('vyos.load_config.is_valueless', lambda path: _ref_node(path)[2])
+class TestVyOSLoadConfig(TestCase):
+    def test_command_parsing(self):
+        cases = [
+            ("set interfaces ethernet eth0 address '192.0.2.1/24'",
+             ('set', 'interfaces ethernet eth0 address', '192.0.2.1/24')),
+            ("set interfaces ethernet eth0 description 'it's a 'test''",
+             ('set', 'interfaces ethernet eth0 description', "it's a 'test'")),
+            ("set interfaces ethernet eth0 description ''",
+             ('set', 'interfaces ethernet eth0 description', '')),
+            ('set service ssh', ('set', 'service ssh', None)),
+            ('delete interfaces ethernet eth0', ('delete', 'interfaces ethernet eth0', None)),
+            ("delete interfaces ethernet eth0 address '192.0.2.1/24'",
+             ('delete', 'interfaces ethernet eth0 address', '192.0.2.1/24')),
+        ]
+        for line, expected in cases:
+            self.assertEqual(command_re.match(line).groups(), expected)
+        self.assertIsNone(command_re.match('show interfaces'))
+
+    def test_set_replace(self):
+        tree = FakeTree()
+        count, errors = apply_commands(tree, [
+            "set interfaces ethernet eth0 address '192.0.2.1/24'",
+            "set interfaces ethernet eth0 description 'uplink'",
+            'set interfaces ethernet eth0 disable',
+        ])
+        self.assertEqual((count, errors), (3, []))
+        sets = [op for op in tree.ops if op[0] == 'set']
+        self.assertEqual(sets, [
+            ('set', ['interfaces', 'ethernet', 'eth0', 'address'], '192.0.2.1/24', False),
+            ('set', ['interfaces', 'ethernet', 'eth0', 'description'], 'uplink', True),
+            ('set', ['interfaces', 'ethernet', 'eth0', 'disable'], None, True),
+        ])
+
+    def test_tag_nodes(self):
+        tree = FakeTree()
+        apply_commands(tree, [
+            "set interfaces ethernet eth0 address '192.0.2.1/24'",
+            "set interfaces ethernet eth1 address '192.0.2.2/24'",
+            'set service ssh',
+        ])
+        # the tag flag is set once, after the first node below it was created
+        self.assertEqual([op for op in tree.ops if op[0] == 'set_tag'],
+                         [('set_tag', ['interfaces', 'ethernet'])])
+        self.assertEqual(tree.ops[1][0], 'set_tag')
+
+    def test_delete(self):
+        tree = FakeTree(paths=[('interfaces', 'ethernet', 'eth0')])
+        count, errors = apply_commands(tree, [
+            'delete interfaces ethernet eth0',
+            "delete interfaces ethernet eth1 address '192.0.2.1/24'",
+        ])
+        self.assertEqual((count, errors), (2, []))
+        self.assertEqual(tree.ops, [
+            ('delete', ['interfaces', 'ethernet', 'eth0']),
+            ('delete_value', ['interfaces', 'ethernet', 'eth1', 'address'], '192.0.2.1/24'),
+        ])
+
+    def test_errors(self):
+        tree = FakeTree()
+        commands = [
+            "set interfaces bogus eth0 address '192.0.2.1/24'",
+            'set interfaces ethernet eth0 bogus',
+            'set interfaces ethernet eth0 description',
+            "set interfaces ethernet eth0 disable 'yes'",
+            "set service ssh 'on'",
+            'delete interfaces ethernet eth9',
+            'show interfaces',
+            "set interfaces ethernet eth0 description 'valid'",
+        ]
+        count, errors = apply_commands(tree, commands)
+        self.assertEqual(count, len(commands))
+        self.assertEqual(errors, [
+            "Invalid path: set interfaces bogus eth0 address '192.0.2.1/24'",
+            'Invalid path: set interfaces ethernet eth0 bogus',
+            'Invalid value: set interfaces ethernet eth0 description',
+            "Invalid value: set interfaces ethernet eth0 disable 'yes'",
+            "Invalid value: set service ssh 'on'",
+            "delete interfaces ethernet eth9: Path doesn't exist: ['interfaces', 'ethernet', 'eth9']",
+            'Invalid command: show interfaces',
+        ])
+        # only the valid command was applied
+        self.assertEqual([op[0] for op in tree.ops], ['set', 'set_tag'])
+
+    def test_load_failed(self):
+        out = ("Set [interfaces ethernet eth0 address '300.1.1.1/24'] failed\n"
+               'Loading configuration\n'
+               'Delete [service ssh] failed\n')
+        self.assertEqual(load_failed_re.findall(out), [
+            "Set [interfaces ethernet eth0 address '300.1.1.1/24'] failed",
+            'Delete [service ssh] failed',
+        ])
@@ -60,3 +60,16 @@ def test_dict_fields_normalization_primitive(self):
 
         data = [1, False, "foo"]
         self.assertEqual(_normalize_field_names(data), [1, False, "foo"])
+
+    def test_json_stream(self):
+        from io import StringIO
+        from json import dumps
+        from unittest.mock import patch
+        from vyos.opmode import _print_json_stream
+
+        data = [{"Foo-Bar": 1, "baz": ["a", "b"]}, {"Foo-Bar": 2, "baz": []}]
+        for items in [data, []]:
+            with patch('sys.stdout', new_callable=StringIO) as stdout:
+                _print_json_stream(item for item in items)
+            expected = dumps([{"foo_bar": d["Foo-Bar"], "baz": d["baz"]} for d in items], indent=4)
+            self.assertEqual(stdout.getvalue(), expected + '\n')
@@ -0,0 +1,66 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest import TestCase
+
+from vyos.openvpn import parse_status
+from vyos.openvpn import get_tunnel_address
+
+server_status = """OpenVPN CLIENT LIST
+Updated,Fri Aug 23 16:26:13 2019
+Common Name,Real Address,Bytes Received,Bytes Sent,Connected Since
+client1,172.18.202.10:55904,2880587,2882653,Fri Aug 23 16:25:48 2019
+client2,172.18.203.10:48987,2856153,2871022,Fri Aug 23 16:25:45 2019
+client2,172.18.203.10:48988,1024,2048,Fri Aug 23 16:25:46 2019
+ROUTING TABLE
+Virtual Address,Common Name,Real Address,Last Ref
+10.10.2.0/25,client1,172.18.202.10:55904,Fri Aug 23 16:26:10 2019
+10.23.1.10,client1,172.18.202.10:55904,Fri Aug 23 16:26:10 2019
+10.23.1.11,client2,172.18.203.10:48987,Fri Aug 23 16:26:11 2019
+GLOBAL STATS
+Max bcast/mcast queue length,0
+END
+"""
+
+client_status = """OpenVPN STATISTICS
+Updated,Fri Aug 23 16:26:13 2019
+TUN/TAP read bytes,1024
+TUN/TAP write bytes,2048
+TCP/UDP read bytes,4096
+END
+"""
+
+class TestOpenVPNStatus(TestCase):
+    def test_server_status(self):
+        status = parse_status(server_status.splitlines(keepends=True))
+        self.assertEqual(status['header'], 'OpenVPN CLIENT LIST')
+        self.assertEqual(status['updated'], 'Fri Aug 23 16:26:13 2019')
+        self.assertEqual(len(status['clients']), 3)
+        self.assertEqual(len(status['clients_by_name']['client2']), 2)
+        self.assertEqual(status['clients_by_address']['172.18.202.10:55904']['bytes_sent'], 2882653)
+        self.assertEqual(status['routes']['10.10.2.0/25']['name'], 'client1')
+
+    def test_tunnel_address(self):
+        status = parse_status(server_status.splitlines(keepends=True))
+        # iroute subnet entries must be skipped
+        self.assertEqual(get_tunnel_address(status, '172.18.202.10:55904'), '10.23.1.10')
+        self.assertEqual(get_tunnel_address(status, '172.18.203.10:48987'), '10.23.1.11')
+        self.assertEqual(get_tunnel_address(status, '172.18.203.10:48988'), 'n/a')
+
+    def test_client_status(self):
+        status = parse_status(client_status.splitlines(keepends=True))
+        self.assertEqual(status['header'], 'OpenVPN STATISTICS')
+        self.assertEqual(status['clients'], [])
+        self.assertEqual(status['statistics']['TUN/TAP read bytes'], '1024')
+        self.assertEqual(status['statistics']['TUN/TAP write bytes'], '2048')
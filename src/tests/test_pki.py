@@ -0,0 +1,68 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest import TestCase
+
+from vyos.pki import CertificateIndex
+from vyos.pki import create_certificate
+from vyos.pki import create_certificate_request
+from vyos.pki import create_private_key
+from vyos.pki import encode_certificate
+from vyos.pki import find_chain
+from vyos.pki import load_certificate
+from vyos.pki import sort_ca_chain
+from vyos.pki import verify_ca_chain
+
+def _certificate(name, ca_cert=None, ca_key=None, is_ca=True):
+    key = create_private_key('ec', 256)
+    subject = {'country': 'GB', 'state': 'Some-State', 'locality': 'Some-City',
+               'organization': 'VyOS', 'common_name': name}
+    req = create_certificate_request(subject, key)
+    if ca_cert is None:
+        return create_certificate(req, req, key, is_ca=True), key
+    return create_certificate(req, ca_cert, ca_key, is_ca=is_ca, is_sub_ca=is_ca), key
+
+def _cli(cert):
+    # certificate as stored on the CLI, without PEM armor
+    return ''.join(encode_certificate(cert).strip().split('\n')[1:-1])
+
+class TestVyOSPKI(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.root, root_key = _certificate('root')
+        cls.inter, inter_key = _certificate('intermediate', cls.root, root_key)
+        cls.leaf, _ = _certificate('leaf', cls.inter, inter_key, is_ca=False)
+        cls.pki_ca = {'root': {'certificate': _cli(cls.root)},
+                      'intermediate': {'certificate': _cli(cls.inter)}}
+
+    def test_load_certificate_cache(self):
+        cert = load_certificate(_cli(self.leaf))
+        self.assertEqual(cert, self.leaf)
+        self.assertIs(load_certificate(_cli(self.leaf)), cert)
+        self.assertFalse(load_certificate('invalid'))
+
+    def test_certificate_index(self):
+        index = CertificateIndex.from_config(self.pki_ca)
+        self.assertEqual(index.find_issuer(self.leaf)[0], 'intermediate')
+        self.assertEqual(index.find_issuer(self.inter)[0], 'root')
+        self.assertEqual(index.find_issuer(self.root)[0], 'root')
+        self.assertIsNone(index.find_issuer(self.root, exclude=['root']))
+
+    def test_chain(self):
+        chain = find_chain(self.leaf, [self.root, self.inter])
+        self.assertEqual(chain, [self.leaf, self.inter, self.root])
+
+        names = sort_ca_chain(['root', 'intermediate'], self.pki_ca)
+        self.assertEqual(names, ['intermediate', 'root'])
+        self.assertTrue(verify_ca_chain(names, self.pki_ca))
@@ -0,0 +1,180 @@
+# Copyright (C) 2025 VyOS maintainers and contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 2 or later as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+from requests import Session
+
+from vyos.remote import HttpDownload
+
+data = bytes(range(256)) * 4096
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Serves data with range support. Requests are recorded on the server,
+    the first "drop" GET responses are cut off after half of their range,
+    the first "fail" ones right after the headers.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, status, length):
+        self.send_response(status)
+        self.send_header('Content-Length', str(length))
+        self.send_header('ETag', '"v1"')
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+
+    def do_HEAD(self):
+        self._headers(200, len(data))
+        self.end_headers()
+
+    def do_GET(self):
+        self.server.requests.append(self.headers.get('Range'))
+        if self.server.status:
+            self.send_error(self.server.status)
+            return
+        start, end = 0, len(data)
+        if self.server.ranges and (tmp := re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))):
+            start, end = int(tmp[1]), int(tmp[2]) + 1
+            self._headers(206, end - start)
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{len(data)}')
+        else:
+            self._headers(200, len(data))
+        self.end_headers()
+        if self.server.fail:
+            self.server.fail -= 1
+            self.close_connection = True
+            return
+        if self.server.drop:
+            self.server.drop -= 1
+            self.wfile.write(data[start:start + (end - start) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(data[start:end])
+
+class TestHttpDownload(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.ranges = True
+        self.server.drop = 0
+        self.server.fail = 0
+        self.server.status = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/image.iso'
+        self.dir = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.dir.name, 'image.iso')
+        self.session = Session()
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.dir.cleanup()
+
+    def _download(self, **kwargs):
+        headers = self.session.head(self.url).headers
+        return HttpDownload(self.session, self.url, self.location, headers, **kwargs)
+
+    def _assert_downloaded(self, digest):
+        self.assertEqual(digest, hashlib.sha256(data).hexdigest())
+        with open(self.location, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(os.listdir(self.dir.name), ['image.iso'])
+
+    def test_segments(self):
+        with patch('vyos.remote.SEGMENT_MIN_SIZE', 1024):
+            digest = self._download(connections=4).run()
+        self._assert_downloaded(digest)
+        step = len(data) // 4
+        self.assertEqual(sorted(self.server.requests, key=lambda r: int(r[6:].split('-')[0])),
+                         [f'bytes={start}-{start + step - 1}' for start in range(0, len(data), step)])
+
+    def test_flaky(self):
+        # an interrupted range continues where the connection was closed
+        self.server.drop = 1
+        with patch('vyos.remote.time.sleep'):
+            digest = self._download().run(sha256=hashlib.sha256(data).hexdigest())
+        self._assert_downloaded(digest)
+        self.assertEqual(self.server.requests, [f'bytes=0-{len(data) - 1}',
+                                                f'bytes={len(data) // 2}-{len(data) - 1}'])
+
+    def test_resume(self):
+        half = len(data) // 2
+        transfer = self._download()
+        with open(transfer.part, 'wb') as f:
+            f.write(data[:half])
+            f.truncate(len(data))
+        with open(transfer.state_file, 'w') as f:
+            json.dump({'validators': transfer.validators,
+                       'segments': [[0, len(data), half]]}, f)
+
+        self._assert_downloaded(transfer.run())
+        self.assertEqual(self.server.requests, [f'bytes={half}-{len(data) - 1}'])
+
+    def test_stale_part(self):
+        # state of a different version of the file is not used
+        transfer = self._download()
+        with open(transfer.part, 'wb') as f:
+            f.write(b'\0' * len(data))
+        with open(transfer.state_file, 'w') as f:
+            json.dump({'validators': dict(transfer.validators, etag='"v0"'),
+                       'segments': [[0, len(data), len(data)]]}, f)
+
+        self._assert_downloaded(transfer.run())
+        self.assertEqual(self.server.requests, [f'bytes=0-{len(data) - 1}'])
+
+    def test_failed(self):
+        # errors a retry can not fix remove the partial download
+        self.server.status = 404
+        with self.assertRaises(Exception):
+            self._download().run()
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+        self.server.status = None
+        with self.assertRaises(OSError):
+            self._download().run(sha256='0' * 64)
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_failed_without_ranges(self):
+        # without range support nothing can be resumed
+        self.server.ranges = False
+        self.server.fail = 10
+        with patch('vyos.remote.time.sleep'):
+            with self.assertRaises(Exception):
+                self._download().run()
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_failed_resumable(self):
+        # an interrupted range download keeps its data and state
+        self.server.fail = 10
+        with patch('vyos.remote.time.sleep'):
+            with self.assertRaises(Exception):
+                self._download().run()
+        self.assertEqual(sorted(os.listdir(self.dir.name)),
+                         ['image.iso.part', 'image.iso.part.state'])
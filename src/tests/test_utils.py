@@ -21,6 +21,63 @@ def test_key_mangling(self):
         new_data = mangle_dict_keys(data, '-', '_')
         self.assertEqual(new_data, expected_data)
 
+    def test_dict_to_delta_commands(self):
+        from vyos.utils.dict import dict_digest
+        from vyos.utils.dict import dict_to_delta_commands
+        old = {'group': {'address-group': {'A': {'address': ['1.1.1.1', '2.2.2.2']},
+                                           'B': {'address': ['3.3.3.3']}}},
+               'global-options': {'all-ping': 'enable', 'log-martians': {}}}
+        new = {'group': {'address-group': {'A': {'address': ['1.1.1.1', '4.4.4.4']}}},
+               'global-options': {'all-ping': 'disable', 'log-martians': {}}}
+        expected = [
+            {'op': 'delete', 'path': ['firewall', 'group', 'address-group', 'A', 'address'], 'value': '2.2.2.2'},
+            {'op': 'delete', 'path': ['firewall', 'group', 'address-group', 'B']},
+            {'op': 'set', 'path': ['firewall', 'group', 'address-group', 'A', 'address'], 'value': '4.4.4.4'},
+            {'op': 'set', 'path': ['firewall', 'global-options', 'all-ping'], 'value': 'disable'},
+        ]
+        self.assertEqual(dict_to_delta_commands(old, new, ['firewall']), expected)
+        self.assertEqual(dict_to_delta_commands(new, new), [])
+        self.assertEqual(dict_to_delta_commands({}, {'a': {}}), [{'op': 'set', 'path': ['a']}])
+
+        reordered = {'global-options': new['global-options'], 'group': new['group']}
+        self.assertEqual(dict_digest(new), dict_digest(reordered))
+        self.assertNotEqual(dict_digest(old), dict_digest(new))
+        self.assertIsNone(dict_digest(None))
+
+    def test_dict_merge_set(self):
+        from vyos.utils.dict import dict_merge_set
+        from vyos.utils.dict import dict_to_delta_commands
+        old = {'group': {'A': {'address': ['1.1.1.1', '2.2.2.2']}, 'B': {}},
+               'all-ping': 'enable'}
+        new = {'group': {'A': {'address': ['1.1.1.1', '4.4.4.4']}, 'C': {}},
+               'all-ping': 'disable'}
+        merged = dict_merge_set(old, new)
+        self.assertEqual(merged, {'group': {'A': {'address': ['1.1.1.1', '2.2.2.2', '4.4.4.4']},
+                                            'B': {}, 'C': {}},
+                                  'all-ping': 'disable'})
+        self.assertEqual(old['group']['A']['address'], ['1.1.1.1', '2.2.2.2'])
+        # a second set-only update from the merged base has nothing to add
+        delta = dict_to_delta_commands(merged, new)
+        self.assertEqual([c for c in delta if c['op'] == 'set'], [])
+
     def test_sysctl_read(self):
         from vyos.utils.system import sysctl_read
         self.assertEqual(sysctl_read('net.ipv4.conf.lo.forwarding'), '1')
+
+    def test_command_stats(self):
+        from vyos.utils.process import command_stats_start
+        from vyos.utils.process import command_stats_stop
+        from vyos.utils.process import cmd
+        from vyos.utils.process import rc_cmd
+
+        command_stats_start()
+        self.assertEqual(cmd("echo 'a  b' c"), 'a  b c')
+        self.assertEqual(cmd('echo a | tr a b'), 'b')
+        # not an executable, handled by the shell
+        self.assertEqual(rc_cmd('command -v sh')[0], 0)
+        stats = command_stats_stop()
+
+        self.assertEqual([s['shell'] for s in stats], [False, True, True])
+        self.assertEqual([s['exit_code'] for s in stats], [0, 0, 0])
+        self.assertIn('test_command_stats', stats[0]['caller'])
+        self.assertEqual(command_stats_stop(), [])